@@ -24,12 +24,19 @@ Requerimientos:
 - fastmcp
 - openai
 - python-dotenv
+- tiktoken
 """
 
 import os
+import re
+import asyncio
 import json
 import time
-from typing import Dict, List, Any, Optional, Union
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 from fastmcp import FastMCP
 from starlette.middleware import Middleware
@@ -39,11 +46,14 @@ from dotenv import load_dotenv
 import tempfile
 import subprocess
 import logging
-import uuid
 
 # Importar modelos de IA
 import openai
 from openai import OpenAI
+import tiktoken
+
+from result_cache import ResultCache
+from downloader import Downloader
 
 # Cargar variables de entorno
 load_dotenv()
@@ -78,19 +88,58 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # segundos
 
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHÉ DE RESULTADOS (ver result_cache.py)
+# ═══════════════════════════════════════════════════════════════════════════
+
+MCP_CACHE_ENABLED = os.getenv("MCP_CACHE_ENABLED", "true").lower() == "true"
+MCP_CACHE_PATH = os.getenv("MCP_CACHE_PATH", "mcp_cache.db")
+MCP_CACHE_TTL_DAYS = float(os.getenv("MCP_CACHE_TTL_DAYS", "30"))
+MCP_CACHE_MAX_MB = int(os.getenv("MCP_CACHE_MAX_MB", "512"))
+
+# Subir la versión al cambiar el prompt de una herramienta: invalida solo sus entradas
+PROMPT_VERSIONS = {
+    "translate_text": 1,
+    "summarize_meeting": 2,
+    "extract_action_items": 2,
+    "analyze_sentiment": 2,
+    "generate_meeting_minutes": 2,
+}
+
+result_cache = ResultCache(
+    MCP_CACHE_PATH,
+    ttl_seconds=MCP_CACHE_TTL_DAYS * 86400,
+    max_bytes=MCP_CACHE_MAX_MB * 1024 * 1024,
+    enabled=MCP_CACHE_ENABLED
+)
+
+def cached_tool(tool: str):
+    """Cachear por (herramienta, modelo, versión del prompt, sha256 de los argumentos)"""
+    return result_cache.cached(tool, model=OPENAI_MODEL, prompt_version=PROMPT_VERSIONS[tool])
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHÉ DE DESCARGAS (ver downloader.py)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# DOWNLOAD_CACHE_DIR, DOWNLOAD_PARTS, DOWNLOAD_CACHE_MAX_GB, DOWNLOAD_CACHE_TTL_DAYS
+video_downloader = Downloader.from_env()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # FUNCIONES AUXILIARES
 # ═══════════════════════════════════════════════════════════════════════════
 
-def download_video(video_url: str) -> str:
+async def download_video(video_url: str) -> str:
     """
     Descargar video desde URL
     
+    Las descargas HTTP pasan por la caché de downloader.py: rangos en
+    paralelo, reanudación y sin volver a bajar una URL ya descargada.
+    
     Args:
         video_url: URL del video
         
     Returns:
-        str: Ruta local del video descargado
+        str: Ruta local del video descargado (dentro de la caché)
     """
     logger.info(f"📥 Descargando video: {video_url}")
     
@@ -100,37 +149,39 @@ def download_video(video_url: str) -> str:
         if os.path.exists(local_path):
             return local_path
     
-    # Crear directorio temporal
-    temp_dir = tempfile.mkdtemp()
-    temp_path = os.path.join(temp_dir, f"video_{uuid.uuid4()}.mp4")
-    
     try:
         if "zoom.us" in video_url or "drive.google.com" in video_url or "onedrive" in video_url:
-            # Para URLs de Zoom/Google/Microsoft, usar requests
-            response = requests.get(video_url, stream=True)
-            with open(temp_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        f.write(chunk)
+            # Para URLs de Zoom/Google/Microsoft, descarga HTTP directa
+            video_path = await video_downloader.fetch(video_url)
         else:
             # Usar youtube-dl para servicios de streaming
-            subprocess.run(
-                ["yt-dlp", video_url, "-o", temp_path],
-                check=True
+            temp_path = video_downloader.temp_path(video_url, ".mp4")
+            process = await asyncio.create_subprocess_exec(
+                "yt-dlp", video_url, "-o", temp_path, "--force-overwrites",
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
             )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode(errors="replace").strip()[-500:])
+            video_path = await video_downloader.adopt(video_url, temp_path)
         
-        logger.info(f"✅ Video descargado: {temp_path}")
-        return temp_path
+        logger.info(f"✅ Video descargado: {video_path}")
+        return video_path
     except Exception as e:
         logger.error(f"❌ Error descargando video: {str(e)}")
         raise Exception(f"Error descargando video: {str(e)}")
 
-def extract_audio(video_path: str) -> str:
+def extract_audio(video_path: str, audio_path: Optional[str] = None) -> str:
     """
     Extraer audio de un video
     
+    Mono a 16 kHz y 48 kbps: es lo que usa Whisper, y una hora de audio
+    ocupa ~21 MB en vez de ~70 MB.
+    
     Args:
         video_path: Ruta del video
+        audio_path: Ruta de salida (por defecto, junto al video)
         
     Returns:
         str: Ruta del archivo de audio
@@ -138,7 +189,10 @@ def extract_audio(video_path: str) -> str:
     logger.info(f"🔊 Extrayendo audio de: {video_path}")
     
     # Crear archivo de salida
-    audio_path = video_path.rsplit(".", 1)[0] + ".mp3"
+    if audio_path is None:
+        audio_path = video_path.rsplit(".", 1)[0] + ".mp3"
+    if audio_path == video_path:
+        audio_path = video_path.rsplit(".", 1)[0] + "_audio.mp3"
     
     # Extraer audio usando FFmpeg
     try:
@@ -147,8 +201,10 @@ def extract_audio(video_path: str) -> str:
                 "ffmpeg", "-y",
                 "-i", video_path,
                 "-vn",  # Sin video
+                "-ac", "1",
+                "-ar", "16000",
                 "-acodec", "libmp3lame",
-                "-q:a", "4",
+                "-b:a", "48k",
                 audio_path
             ],
             check=True,
@@ -192,7 +248,9 @@ def transcribe_audio_openai(audio_path: str) -> str:
         except Exception as e:
             logger.error(f"❌ Error en transcripción (intento {retries+1}/{MAX_RETRIES}): {str(e)}")
             retries += 1
-            time.sleep(RETRY_DELAY)
+            if retries < MAX_RETRIES:
+                # Backoff exponencial: solo se repite este archivo/segmento
+                time.sleep(RETRY_DELAY * 2 ** (retries - 1))
     
     raise Exception("Falló la transcripción después de varios intentos")
 
@@ -282,10 +340,151 @@ def transcribe_audio(audio_path: str) -> str:
         # Usar OpenAI por defecto
         return transcribe_audio_openai(audio_path)
 
+# ═══════════════════════════════════════════════════════════════════════════
+# TRANSCRIPCIÓN SEGMENTADA (GRABACIONES LARGAS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+TRANSCRIBE_SEGMENT_SECONDS = int(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "600"))  # duración objetivo
+TRANSCRIBE_MAX_SEGMENT_SECONDS = int(os.getenv("TRANSCRIBE_MAX_SEGMENT_SECONDS", "900"))  # corte forzado
+TRANSCRIBE_MAX_WORKERS = int(os.getenv("TRANSCRIBE_MAX_WORKERS", "4"))
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.5
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: ([\d.]+)")
+_DURATION = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+def probe_duration(audio_path: str) -> Optional[float]:
+    """Duración según la cabecera (ffprobe, sin decodificar); None si no la informa"""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            audio_path
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+def probe_silences(audio_path: str) -> Tuple[float, List[float]]:
+    """
+    Detectar silencios con ffmpeg (silencedetect)
+    
+    Returns:
+        Tuple: (duración en segundos, punto medio de cada silencio)
+    """
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-nostdin",
+            "-i", audio_path,
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+            "-f", "null", "-"
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    match = _DURATION.search(result.stderr)
+    if not match:
+        raise Exception(f"No se pudo leer la duración de {audio_path}")
+    hours, minutes, seconds = match.groups()
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    starts = [max(0.0, float(t)) for t in _SILENCE_START.findall(result.stderr)]
+    ends = [float(t) for t in _SILENCE_END.findall(result.stderr)]
+    return duration, [(start + end) / 2 for start, end in zip(starts, ends)]
+
+def plan_cuts(duration: float, silences: List[float],
+              target: float = TRANSCRIBE_SEGMENT_SECONDS,
+              maximum: float = TRANSCRIBE_MAX_SEGMENT_SECONDS) -> List[float]:
+    """
+    Elegir dónde cortar: en el silencio más cercano a `target` segundos desde
+    el corte anterior, sin pasar de `maximum` (si no hay silencio, corte forzado)
+    """
+    cuts, start = [], 0.0
+    while duration - start > maximum:
+        window = [t for t in silences if start + target / 2 <= t <= start + maximum]
+        cut = min(window, key=lambda t: abs(t - (start + target))) if window else start + maximum
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+def split_audio(audio_path: str, cuts: List[float], output_dir: str) -> List[str]:
+    """Cortar el audio en una sola pasada de ffmpeg, sin recodificar"""
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-hide_banner", "-nostdin", "-loglevel", "error",
+            "-i", audio_path,
+            "-f", "segment",
+            "-segment_times", ",".join(f"{cut:.3f}" for cut in cuts),
+            "-reset_timestamps", "1",
+            "-c", "copy",
+            os.path.join(output_dir, "part_%04d.mp3")
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    return sorted(
+        os.path.join(output_dir, name) for name in os.listdir(output_dir) if name.startswith("part_")
+    )
+
+def _timestamp(seconds: float) -> str:
+    return time.strftime("%H:%M:%S", time.gmtime(seconds))
+
+def transcribe_long_audio(audio_path: str) -> str:
+    """
+    Transcribir audio de cualquier duración
+    
+    Hasta TRANSCRIBE_MAX_SEGMENT_SECONDS se transcribe de una vez, sin buscar
+    silencios (p. ej. las ventanas de 30 s del bot). Si es más largo, se
+    corta en silencios en segmentos de ~TRANSCRIBE_SEGMENT_SECONDS
+    que se transcriben en paralelo (TRANSCRIBE_MAX_WORKERS); cada segmento
+    reintenta por su cuenta. El resultado lleva el timestamp de inicio de
+    cada segmento.
+    
+    Args:
+        audio_path: Ruta del archivo de audio
+        
+    Returns:
+        str: Transcripción
+    """
+    duration = probe_duration(audio_path)
+    if duration is not None and duration <= TRANSCRIBE_MAX_SEGMENT_SECONDS:
+        return transcribe_audio(audio_path)
+    
+    duration, silences = probe_silences(audio_path)
+    cuts = plan_cuts(duration, silences)
+    if not cuts:
+        return transcribe_audio(audio_path)
+    
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="segments_") as output_dir:
+        parts = split_audio(audio_path, cuts, output_dir)
+        logger.info(f"✂️ {duration / 60:.0f} min de audio en {len(parts)} segmentos "
+                    f"({TRANSCRIBE_MAX_WORKERS} en paralelo)")
+        with ThreadPoolExecutor(max_workers=min(TRANSCRIBE_MAX_WORKERS, len(parts))) as pool:
+            texts = list(pool.map(transcribe_audio, parts))
+    
+    logger.info(f"✅ Transcripción segmentada completada en {time.perf_counter() - started:.1f}s")
+    return "\n\n".join(
+        f"[{_timestamp(start)}] {text.strip()}"
+        for start, text in zip([0.0] + cuts, texts)
+        if text.strip()
+    )
+
 # ═══════════════════════════════════════════════════════════════════════════
 # TRADUCCIÓN Y PROCESAMIENTO DE TEXTO
 # ═══════════════════════════════════════════════════════════════════════════
 
+@cached_tool("translate_text")
 def translate_text_openai(text: str, target_language: str) -> str:
     """
     Traducir texto usando OpenAI
@@ -344,6 +543,203 @@ def translate_text(text: str, target_language: str) -> str:
     # Por ahora solo implementamos OpenAI
     return translate_text_openai(text, target_language)
 
+# ═══════════════════════════════════════════════════════════════════════════
+# RESUMEN MAP-REDUCE (TRANSCRIPCIONES LARGAS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Presupuestos en tokens del modelo (tiktoken), no en caracteres
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", "12000"))  # cabe en una sola llamada
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "4000"))  # fragmento de la fase map
+SUMMARY_NOTES_TOKENS = 700  # máximo de salida por fragmento / combinación
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+SUMMARY_REQUESTS_PER_MINUTE = int(os.getenv("SUMMARY_REQUESTS_PER_MINUTE", "60"))
+DIGEST_CACHE_SIZE = 16  # transcripciones largas con notas en memoria
+
+# Prompts fijos: solo cambia el fragmento, al final del mensaje
+NOTES_SYSTEM_PROMPT = (
+    "Eres un asistente que toma notas de reuniones. Recibirás un fragmento de una "
+    "transcripción larga. Escribe notas concisas en viñetas con: temas tratados, "
+    "decisiones, elementos de acción (responsable, tarea y fecha límite si se mencionan), "
+    "preguntas abiertas y tono o dinámica de los participantes. "
+    "No añadas nada que no esté en el fragmento."
+)
+MERGE_SYSTEM_PROMPT = (
+    "Eres un asistente que toma notas de reuniones. Recibirás notas de partes "
+    "consecutivas de una misma reunión. Combínalas en unas solas notas con la misma "
+    "estructura, sin perder decisiones ni elementos de acción (responsable y fecha)."
+)
+# Los análisis leen la transcripción original (sin esperar a la traducción)
+ANSWER_IN_SPANISH = " Responde siempre en español, aunque la transcripción esté en otro idioma."
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+")
+
+try:
+    _encoding = tiktoken.encoding_for_model(OPENAI_MODEL)
+except KeyError:
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    return len(_encoding.encode_ordinary(text))
+
+def _pack(units: List[str], max_tokens: int, separator: str = "\n", min_per_group: int = 1) -> List[str]:
+    """Agrupar unidades consecutivas sin pasar de `max_tokens` por grupo"""
+    groups, current, current_tokens = [], [], 0
+    for unit in units:
+        tokens = count_tokens(unit) + 1
+        if len(current) >= min_per_group and current_tokens + tokens > max_tokens:
+            groups.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        groups.append(separator.join(current))
+    return groups
+
+def split_transcript(transcript: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+    """
+    Dividir una transcripción en fragmentos de como máximo `max_tokens`
+    
+    Corta entre intervenciones (una línea por hablante o timestamp); una
+    intervención demasiado larga se corta entre frases, y una frase
+    demasiado larga, por tokens.
+    """
+    units = []
+    for turn in transcript.splitlines():
+        turn = turn.strip()
+        if not turn:
+            continue
+        if count_tokens(turn) <= max_tokens:
+            units.append(turn)
+            continue
+        for sentence in _SENTENCE_BREAK.split(turn):
+            tokens = _encoding.encode_ordinary(sentence)
+            if len(tokens) <= max_tokens:
+                units.append(sentence)
+            else:
+                units.extend(_encoding.decode(tokens[i:i + max_tokens])
+                             for i in range(0, len(tokens), max_tokens))
+    return _pack(units, max_tokens)
+
+class RateLimiter:
+    """Espaciar las llamadas al LLM (compartido entre hilos)"""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / max(1, per_minute)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_llm_rate_limiter = RateLimiter(SUMMARY_REQUESTS_PER_MINUTE)
+
+def _take_notes(system_prompt: str, content: str) -> str:
+    """Una llamada de la fase map/reduce, con límite de ritmo y reintentos"""
+    retries = 0
+    while True:
+        _llm_rate_limiter.wait()
+        try:
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content}
+                ],
+                temperature=0.3,
+                max_tokens=SUMMARY_NOTES_TOKENS
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            retries += 1
+            logger.error(f"❌ Error tomando notas (intento {retries}/{MAX_RETRIES}): {str(e)}")
+            if retries >= MAX_RETRIES:
+                raise
+            time.sleep(RETRY_DELAY)
+
+def _map_parallel(system_prompt: str, contents: List[str]) -> List[str]:
+    with ThreadPoolExecutor(max_workers=min(SUMMARY_MAX_WORKERS, len(contents))) as pool:
+        return list(pool.map(lambda content: _take_notes(system_prompt, content), contents))
+
+def _build_digest(transcript: str) -> str:
+    started = time.perf_counter()
+    chunks = split_transcript(transcript)
+    logger.info(f"🧩 Map: {len(chunks)} fragmentos de ≤{SUMMARY_CHUNK_TOKENS} tokens "
+                f"({SUMMARY_MAX_WORKERS} en paralelo)")
+    notes = _map_parallel(NOTES_SYSTEM_PROMPT, [
+        f"Fragmento {i}/{len(chunks)}:\n\n{chunk}" for i, chunk in enumerate(chunks, 1)
+    ])
+    # Reduce por niveles: combinar notas vecinas hasta que quepan en una llamada
+    level = 0
+    while len(notes) > 1 and count_tokens("\n\n".join(notes)) > SUMMARY_MAX_INPUT_TOKENS:
+        level += 1
+        groups = _pack(notes, SUMMARY_MAX_INPUT_TOKENS, separator="\n\n---\n\n", min_per_group=2)
+        logger.info(f"🧩 Reduce nivel {level}: {len(notes)} notas → {len(groups)}")
+        notes = _map_parallel(MERGE_SYSTEM_PROMPT, groups)
+    logger.info(f"✅ Notas de la reunión listas en {time.perf_counter() - started:.1f}s")
+    return "\n\n".join(notes)
+
+_digest_cache: "OrderedDict[str, str]" = OrderedDict()
+_digest_inflight: Dict[str, Future] = {}
+_digest_lock = threading.Lock()
+
+def meeting_digest(transcript: str) -> Tuple[str, bool]:
+    """
+    Texto sobre el que trabajan resumen, acciones, sentimiento y minutas
+    
+    Si la transcripción cabe en SUMMARY_MAX_INPUT_TOKENS se usa tal cual.
+    Si no, se resume por fragmentos en paralelo (map) y se combinan las notas
+    por niveles (reduce). Las notas se guardan por hash de la transcripción:
+    las herramientas que reciben la misma reunión, incluso a la vez, la leen
+    una sola vez.
+    
+    Returns:
+        Tuple: (texto, True si son notas condensadas en vez de la transcripción)
+    """
+    if count_tokens(transcript) <= SUMMARY_MAX_INPUT_TOKENS:
+        return transcript, False
+    
+    key = hashlib.sha256(f"{OPENAI_MODEL}:{SUMMARY_CHUNK_TOKENS}:{transcript}".encode("utf-8")).hexdigest()
+    with _digest_lock:
+        if key in _digest_cache:
+            _digest_cache.move_to_end(key)
+            logger.info("♻️ Reutilizando notas de la reunión")
+            return _digest_cache[key], True
+        future = _digest_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _digest_inflight[key] = Future()
+    
+    if not owner:
+        logger.info("⏳ Esperando notas que ya se están generando")
+        return future.result(), True
+    
+    try:
+        digest = _build_digest(transcript)
+    except Exception as e:
+        with _digest_lock:
+            _digest_inflight.pop(key, None)
+        future.set_exception(e)
+        raise
+    
+    with _digest_lock:
+        _digest_cache[key] = digest
+        while len(_digest_cache) > DIGEST_CACHE_SIZE:
+            _digest_cache.popitem(last=False)
+        _digest_inflight.pop(key, None)
+    future.set_result(digest)
+    return digest, True
+
+def _digest_label(condensed: bool) -> str:
+    if condensed:
+        return "estas notas de una reunión larga (por fragmentos, en orden cronológico)"
+    return "esta transcripción de reunión"
+
+@cached_tool("summarize_meeting")
 def summarize_text_openai(transcript: str) -> str:
     """
     Resumir texto usando OpenAI
@@ -356,27 +752,14 @@ def summarize_text_openai(transcript: str) -> str:
     """
     logger.info("📝 Generando resumen con OpenAI")
     
-    # Verificar longitud y dividir si es necesario
-    if len(transcript) > 80000:  # Límite aproximado para GPT-4
-        logger.info("⚠️ Transcripción demasiado larga, dividiendo...")
-        # Dividir en partes y resumir cada una
-        parts = [transcript[i:i+80000] for i in range(0, len(transcript), 80000)]
-        summaries = []
-        
-        for i, part in enumerate(parts):
-            logger.info(f"Resumiendo parte {i+1}/{len(parts)}...")
-            part_summary = summarize_text_openai(part)
-            summaries.append(part_summary)
-        
-        # Juntar resúmenes y hacer un meta-resumen
-        combined = "\n\n".join(summaries)
-        return summarize_text_openai(combined)
+    # Transcripciones largas: resumir sobre las notas map-reduce
+    text, condensed = meeting_digest(transcript)
     
     response = openai_client.chat.completions.create(
         model=OPENAI_MODEL,
         messages=[
-            {"role": "system", "content": "Eres un asistente experto en crear resúmenes ejecutivos concisos pero completos. Resume la transcripción de la reunión destacando los puntos clave, decisiones y próximos pasos."},
-            {"role": "user", "content": f"Resume esta transcripción de reunión:\n\n{transcript}"}
+            {"role": "system", "content": "Eres un asistente experto en crear resúmenes ejecutivos concisos pero completos. Resume la transcripción de la reunión destacando los puntos clave, decisiones y próximos pasos." + ANSWER_IN_SPANISH},
+            {"role": "user", "content": f"Resume {_digest_label(condensed)}:\n\n{text}"}
         ],
         temperature=0.3
     )
@@ -399,6 +782,7 @@ def summarize_meeting(transcript: str) -> str:
     # Por ahora solo implementamos OpenAI
     return summarize_text_openai(transcript)
 
+@cached_tool("extract_action_items")
 def extract_action_items_openai(transcript: str) -> str:
     """
     Extraer elementos de acción usando OpenAI
@@ -411,11 +795,13 @@ def extract_action_items_openai(transcript: str) -> str:
     """
     logger.info("📋 Extrayendo acciones con OpenAI")
     
+    text, condensed = meeting_digest(transcript)
+    
     response = openai_client.chat.completions.create(
         model=OPENAI_MODEL,
         messages=[
-            {"role": "system", "content": "Eres un asistente experto en identificar elementos de acción concretos en transcripciones de reuniones. Extrae todos los elementos de acción mencionados, incluyendo quién es responsable, qué debe hacer y cualquier fecha límite mencionada. Presenta los resultados en una lista clara y estructurada."},
-            {"role": "user", "content": f"Extrae los elementos de acción de esta transcripción de reunión:\n\n{transcript}"}
+            {"role": "system", "content": "Eres un asistente experto en identificar elementos de acción concretos en transcripciones de reuniones. Extrae todos los elementos de acción mencionados, incluyendo quién es responsable, qué debe hacer y cualquier fecha límite mencionada. Presenta los resultados en una lista clara y estructurada." + ANSWER_IN_SPANISH},
+            {"role": "user", "content": f"Extrae los elementos de acción de {_digest_label(condensed)}:\n\n{text}"}
         ],
         temperature=0.3
     )
@@ -438,6 +824,7 @@ def extract_action_items(transcript: str) -> str:
     # Por ahora solo implementamos OpenAI
     return extract_action_items_openai(transcript)
 
+@cached_tool("analyze_sentiment")
 def analyze_sentiment_openai(transcript: str) -> Dict:
     """
     Analizar sentimiento usando OpenAI
@@ -450,11 +837,13 @@ def analyze_sentiment_openai(transcript: str) -> Dict:
     """
     logger.info("🔍 Analizando sentimiento con OpenAI")
     
+    text, condensed = meeting_digest(transcript)
+    
     response = openai_client.chat.completions.create(
         model=OPENAI_MODEL,
         messages=[
-            {"role": "system", "content": "Eres un analista experto de sentimiento y tono en reuniones. Analiza la transcripción y proporciona un análisis del sentimiento general (positivo, neutro, negativo), nivel de confianza (0.0-1.0), y 3-5 insights clave sobre el tono, nivel de participación y dinámica de la reunión."},
-            {"role": "user", "content": f"Analiza el sentimiento de esta transcripción de reunión y devuelve el resultado en formato JSON con los campos overall_sentiment, confidence y key_insights:\n\n{transcript}"}
+            {"role": "system", "content": "Eres un analista experto de sentimiento y tono en reuniones. Analiza la transcripción y proporciona un análisis del sentimiento general (positivo, neutro, negativo), nivel de confianza (0.0-1.0), y 3-5 insights clave sobre el tono, nivel de participación y dinámica de la reunión." + ANSWER_IN_SPANISH},
+            {"role": "user", "content": f"Analiza el sentimiento de {_digest_label(condensed)} y devuelve el resultado en formato JSON con los campos overall_sentiment, confidence y key_insights:\n\n{text}"}
         ],
         temperature=0.3,
         response_format={"type": "json_object"}
@@ -479,6 +868,7 @@ def analyze_sentiment(transcript: str) -> Dict:
     # Por ahora solo implementamos OpenAI
     return analyze_sentiment_openai(transcript)
 
+@cached_tool("generate_meeting_minutes")
 def generate_meeting_minutes_openai(transcript: str) -> str:
     """
     Generar minutas de reunión usando OpenAI
@@ -491,6 +881,9 @@ def generate_meeting_minutes_openai(transcript: str) -> str:
     """
     logger.info("📄 Generando minutas con OpenAI")
     
+    # Resumen, acciones y sentimiento comparten las notas de meeting_digest:
+    # una reunión larga se lee una sola vez
+    
     # Obtener resumen
     summary = summarize_text_openai(transcript)
     
@@ -587,7 +980,7 @@ def process_transcript_chunk(meeting_id: str, transcript_chunk: str, platform: s
 # HERRAMIENTAS MCP
 # ═══════════════════════════════════════════════════════════════════════════
 
-def transcribe_audio_tool(video_url: str) -> str:
+async def transcribe_audio_tool(video_url: str) -> str:
     """
     Herramienta MCP para transcribir audio/video
     
@@ -598,18 +991,17 @@ def transcribe_audio_tool(video_url: str) -> str:
         str: Transcripción
     """
     try:
-        # Descargar video
-        video_path = download_video(video_url)
+        # Descargar video (el archivo queda en la caché de descargas)
+        video_path = await download_video(video_url)
         
-        # Extraer audio
-        audio_path = extract_audio(video_path)
-        
-        # Transcribir audio
-        transcript = transcribe_audio(audio_path)
-        
-        # Limpiar archivos temporales (opcional)
-        # os.unlink(video_path)
-        # os.unlink(audio_path)
+        with tempfile.TemporaryDirectory(prefix="audio_") as work_dir:
+            # Extraer audio
+            audio_path = await asyncio.to_thread(
+                extract_audio, video_path, os.path.join(work_dir, "audio.mp3")
+            )
+            
+            # Transcribir audio (en segmentos paralelos si es largo)
+            transcript = await asyncio.to_thread(transcribe_long_audio, audio_path)
         
         return transcript
     except Exception as e:
@@ -723,13 +1115,13 @@ def process_transcript_chunk_tool(meeting_id: str, transcript_chunk: str, platfo
 mcp = FastMCP("Meeting Processor AI", stateless_http=True)
 
 # Registrar herramientas usando decoradores
-@mcp.tool()
-def transcribe_audio(video_url: str) -> str:
+@mcp.tool(name="transcribe_audio")
+async def transcribe_audio_mcp(video_url: str) -> str:
     """Transcribe audio/video from URL to text"""
-    return transcribe_audio_tool(video_url)
+    return await transcribe_audio_tool(video_url)
 
-@mcp.tool()
-def translate_text(text: str, target_language: str = "es") -> str:
+@mcp.tool(name="translate_text")
+def translate_text_mcp(text: str, target_language: str = "es") -> str:
     """Translate text to another language"""
     return translate_text_tool(text, target_language)
 
@@ -764,26 +1156,31 @@ def summarize_meeting_mcp(transcript: str) -> dict:
         
         return error_dict
 
-@mcp.tool()
-def extract_action_items(transcript: str) -> str:
+@mcp.tool(name="extract_action_items")
+def extract_action_items_mcp(transcript: str) -> str:
     """Extract action items from meeting transcript"""
     return extract_action_items_tool(transcript)
 
-@mcp.tool()
-def analyze_sentiment(transcript: str) -> str:
+@mcp.tool(name="analyze_sentiment")
+def analyze_sentiment_mcp(transcript: str) -> dict:
     """Analyze sentiment and tone of meeting transcript"""
     return analyze_sentiment_tool(transcript)
 
-@mcp.tool()
-def generate_meeting_minutes(transcript: str) -> str:
+@mcp.tool(name="generate_meeting_minutes")
+def generate_meeting_minutes_mcp(transcript: str) -> str:
     """Generate comprehensive meeting minutes"""
     return generate_meeting_minutes_tool(transcript)
 
-@mcp.tool()
-def process_transcript_chunk(meeting_id: str, transcript_chunk: str, platform: str) -> str:
+@mcp.tool(name="process_transcript_chunk")
+def process_transcript_chunk_mcp(meeting_id: str, transcript_chunk: str, platform: str) -> str:
     """Process a chunk of transcription in real-time"""
     return process_transcript_chunk_tool(meeting_id, transcript_chunk, platform)
 
+@mcp.resource("cache://stats", name="cache_stats", mime_type="application/json")
+def cache_stats_mcp() -> dict:
+    """Hit rate, entries and size of the tool result cache"""
+    return result_cache.stats()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # NOTA IMPORTANTE SOBRE DOCUMENTACIÓN
 # ═══════════════════════════════════════════════════════════════════════════
@@ -802,6 +1199,9 @@ def process_transcript_chunk(meeting_id: str, transcript_chunk: str, platform: s
 # - analyze_sentiment(transcript)
 # - generate_meeting_minutes(transcript)
 # - process_transcript_chunk(meeting_id, transcript_chunk, platform)
+#
+# Recursos:
+# - cache://stats (estadísticas de la caché de resultados)
 # ═══════════════════════════════════════════════════════════════════════════
 
 
@@ -821,6 +1221,9 @@ if __name__ == "__main__":
     print("  • generate_meeting_minutes(transcript)")
     print("  • process_transcript_chunk(meeting_id, transcript_chunk, platform)")
     print()
+    print("📦 Recursos:")
+    print(f"  • cache://stats (caché {'activa' if MCP_CACHE_ENABLED else 'desactivada'}: {MCP_CACHE_PATH})")
+    print()
     print("🔗 Modelos configurados:")
     print(f"  • Transcripción: {TRANSCRIPTION_MODEL}")
     print(f"  • LLM: {LLM_MODEL} ({OPENAI_MODEL if LLM_MODEL == 'openai' else GOOGLE_MODEL})")
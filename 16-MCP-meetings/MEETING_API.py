@@ -19,13 +19,15 @@ Componentes principales:
   * Graba video/audio automáticamente
   * NO necesita Zoom SDK ni Node.js
   * Funciona con Zoom, Google Meet y Teams
-- Base de datos: Diccionarios en memoria (desarrollo) / PostgreSQL (producción)
+- Base de datos: SQLAlchemy async - SQLite (desarrollo) / PostgreSQL (producción), ver meetings_db.py
 - WebSockets: Transcripción en tiempo real
 
 Requerimientos (100% Python):
 - fastapi
 - uvicorn
 - requests
+- httpx (cliente MCP asíncrono)
+- sqlalchemy[asyncio] + aiosqlite (o asyncpg para PostgreSQL)
 - python-dotenv
 - openai
 - starlette
@@ -37,20 +39,29 @@ Playwright es suficiente para grabar reuniones de cualquier plataforma.
 """
 
 import os
+import re
 import sys
 import json
 import time
 import uuid
+import wave
+import shutil
 import asyncio
+import difflib
 import subprocess
 import logging
 import requests
 import signal
 import tempfile
-from typing import Dict, List, Optional, Union
+import itertools
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import httpx
+
 from fastapi import FastAPI, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
 from fastapi import HTTPException, Depends, Body
 from fastapi.middleware.cors import CORSMiddleware
@@ -59,6 +70,11 @@ from pydantic import BaseModel
 
 from dotenv import load_dotenv
 
+from meetings_db import DEFAULT_PAGE_SIZE, MeetingRepository
+from transcript_broadcast import create_broadcaster
+from downloader import Downloader
+from job_queue import STATUSES as JOB_STATUSES, JobContext, JobQueue, JobWorker
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -100,6 +116,15 @@ AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 # Base de datos
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///meetings.db")
 
+# Transcripción en vivo entre workers (vacío = en memoria, un solo worker)
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Cola de trabajos (ver job_queue.py; los procesa job_worker.py)
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.db")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_MAX_RUNNING_MEETINGS = int(os.getenv("JOB_MAX_RUNNING_MEETINGS", "4"))  # entre todos los workers
+JOB_INLINE_WORKERS = int(os.getenv("JOB_INLINE_WORKERS", "0"))  # >0: la API también procesa (desarrollo)
+
 # Crear app FastAPI
 app = FastAPI(
     title="Meeting API - Sistema de Reuniones con IA",
@@ -136,104 +161,89 @@ class MeetingStatus(BaseModel):
     status: str
 
 # ═══════════════════════════════════════════════════════════════════════════
-# BASE DE DATOS (Simulada con diccionarios - usar SQLAlchemy en prod)
+# BASE DE DATOS (SQLAlchemy async sobre DATABASE_URL - ver meetings_db.py)
 # ═══════════════════════════════════════════════════════════════════════════
 
-# En producción: usar SQLAlchemy + PostgreSQL
-# Aquí usamos diccionarios para simplificar el ejemplo
+# SQLite en desarrollo, PostgreSQL en producción. El estado sobrevive a
+# reinicios y se comparte entre varios workers de uvicorn.
+db = MeetingRepository(DATABASE_URL)
 
-USERS_DB = {}  # {user_id: {email, platform, access_token, refresh_token}}
-MEETINGS_DB = {}  # {meeting_id: {host_id, topic, status, start_time, etc}}
-PROCESSED_MEETINGS_DB = {}  # {meeting_id: {transcript, summary, actions, etc}}
+# Pub/sub de la transcripción en vivo (ver transcript_broadcast.py)
+transcript_broadcaster = create_broadcaster(REDIS_URL)
 
-def save_user_credentials(user_id: str, email: str, platform: str, 
-                          access_token: str, refresh_token: str):
+# Descargas con rangos en paralelo, reanudación y caché por contenido, compartida
+# con MCP_SERVER: misma carpeta y mismos límites del GC (ver Downloader.from_env)
+file_downloader = Downloader.from_env()
+
+async def save_user_credentials(user_id: str, email: str, platform: str, 
+                                access_token: str, refresh_token: str):
     """Guardar credenciales de usuario en BD"""
-    USERS_DB[user_id] = {
-        "email": email,
-        "platform": platform,
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "created_at": datetime.now().isoformat()
-    }
+    await db.save_user(user_id, email, platform, access_token, refresh_token)
     logger.info(f"💾 Usuario guardado: {email}")
 
-def save_meeting_started(meeting_id: str, host_id: str, topic: str, platform: str):
+async def save_meeting_started(meeting_id: str, host_id: str, topic: str, platform: str):
     """Guardar que reunión comenzó"""
-    MEETINGS_DB[meeting_id] = {
-        "host_id": host_id,
-        "topic": topic,
-        "platform": platform,
-        "status": "in_progress",
-        "start_time": datetime.now().isoformat()
-    }
+    await db.save_meeting(meeting_id, host_id, topic, platform, status="in_progress")
     logger.info(f"💾 Reunión iniciada: {meeting_id}")
 
-def save_recording_url(meeting_id: str, recording_url: str):
+async def ensure_meeting_saved(meeting_id: str, host_id: str, topic: Optional[str] = None,
+                               platform: Optional[str] = None, status: str = "ended"):
+    """Crear la reunión si no existe (p. ej. grabación sin meeting.started previo)"""
+    if await db.ensure_meeting(meeting_id, host_id, topic, platform, status):
+        logger.info(f"💾 Reunión registrada: {meeting_id}")
+
+async def save_recording_url(meeting_id: str, recording_url: str):
     """Guardar URL de grabación"""
-    if meeting_id in MEETINGS_DB:
-        MEETINGS_DB[meeting_id]["recording_url"] = recording_url
+    if await db.update_meeting(meeting_id, recording_url=recording_url):
         logger.info(f"💾 URL de grabación guardada: {meeting_id}")
 
-def update_meeting_status(meeting_id: str, status: str):
-    """Actualizar estado de reunión"""
-    if meeting_id in MEETINGS_DB:
-        MEETINGS_DB[meeting_id]["status"] = status
-        MEETINGS_DB[meeting_id]["updated_at"] = datetime.now().isoformat()
+async def update_meeting_status(meeting_id: str, status: str, error: Optional[str] = None):
+    """Actualizar estado de reunión (y el error, si lo hay)"""
+    fields = {"status": status}
+    if error is not None:
+        fields["error"] = error
+    if await db.update_meeting(meeting_id, **fields):
         logger.info(f"📝 Estado actualizado: {meeting_id} → {status}")
 
-def save_processed_meeting(meeting_id: str, host_id: str, platform: str,
-                           recording_url: str, transcript: str, translated: str,
-                           summary: str, actions: str, sentiment: str):
-    """Guardar reunión procesada"""
-    PROCESSED_MEETINGS_DB[meeting_id] = {
-        "meeting_id": meeting_id,
-        "host_id": host_id,
-        "platform": platform,
-        "recording_url": recording_url,
-        "transcript": transcript,
-        "translated": translated,
-        "summary": summary,
-        "actions": actions,
-        "sentiment": sentiment,
-        "processed_at": datetime.now().isoformat()
-    }
+async def save_step_result(meeting_id: str, step: str, status: str, seconds: float):
+    """Guardar el estado y la duración de un paso del pipeline al terminar"""
+    await db.save_step(meeting_id, step, status, seconds)
+    logger.info(f"💾 Paso {step} de {meeting_id}: {status} ({seconds:.1f}s)")
+
+async def save_processed_meeting(meeting_id: str, host_id: str, platform: str,
+                                 recording_url: str, transcript: str, translated: str,
+                                 summary: str, actions: str, sentiment: str,
+                                 minutes: str = "", timings: Optional[Dict] = None):
+    """Guardar reunión procesada (la transcripción va a su propia tabla)"""
+    await db.save_result(meeting_id, host_id, platform, recording_url, transcript,
+                         translated, summary, actions, sentiment, minutes, timings)
     logger.info(f"💾 Reunión procesada guardada: {meeting_id}")
 
-def get_meetings_from_db(user_id: str) -> List[Dict]:
-    """Obtener reuniones de un usuario"""
-    meetings = []
-    for meeting_id, data in PROCESSED_MEETINGS_DB.items():
-        if data.get("host_id") == user_id:
-            meeting_info = MEETINGS_DB.get(meeting_id, {})
-            meetings.append({
-                "meeting_id": meeting_id,
-                "topic": meeting_info.get("topic"),
-                "summary": data.get("summary"),
-                "processed_at": data.get("processed_at")
-            })
-    return meetings
+async def get_meetings_from_db(user_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Obtener una página de reuniones procesadas de un usuario y el cursor siguiente"""
+    return await db.list_results(user_id, limit, cursor)
 
-def get_meeting_from_db(meeting_id: str) -> Optional[Dict]:
+async def get_meeting_from_db(meeting_id: str) -> Optional[Dict]:
     """Obtener detalles de una reunión"""
-    return PROCESSED_MEETINGS_DB.get(meeting_id)
+    return await db.get_result(meeting_id)
 
-def save_manual_meeting(user_id: str, meeting_url: str, title: str, platform: str) -> str:
+async def save_manual_meeting(user_id: str, meeting_url: str, title: str, platform: str) -> str:
     """Guardar reunión invitada manualmente"""
     meeting_id = f"manual_{int(datetime.now().timestamp())}"
-    MEETINGS_DB[meeting_id] = {
-        "host_id": user_id,
-        "topic": title or "Reunión sin título",
-        "platform": platform or detect_platform(meeting_url),
-        "meeting_url": meeting_url,
-        "status": "pending",
-        "start_time": datetime.now().isoformat()
-    }
+    await db.save_meeting(
+        meeting_id,
+        host_id=user_id,
+        topic=title or "Reunión sin título",
+        platform=platform or detect_platform(meeting_url),
+        status="pending",
+        meeting_url=meeting_url
+    )
     return meeting_id
 
-def notify_user(user_id: str, meeting_id: str, message: str):
+async def notify_user(user_id: str, meeting_id: str, message: str):
     """Enviar notificación a usuario"""
-    user = USERS_DB.get(user_id)
+    user = await db.get_user(user_id)
     if user:
         logger.info(f"📧 Notificando a {user['email']}: {message}")
         # En producción: enviar email con SendGrid/AWS SES
@@ -295,10 +305,13 @@ def extract_meeting_id(meeting_url: str, platform: Optional[str] = None) -> str:
     # ID genérico si no se puede extraer
     return f"meeting_{int(datetime.now().timestamp())}"
 
-def download_file(url: str, output_path: str) -> bool:
+async def download_file(url: str, output_path: str) -> bool:
     """
     Descargar archivo desde URL
     
+    La descarga queda en la caché de downloader.py y se enlaza (o copia)
+    en output_path, así que la misma URL no se descarga dos veces.
+    
     Args:
         url: URL del archivo
         output_path: Ruta de destino
@@ -308,13 +321,15 @@ def download_file(url: str, output_path: str) -> bool:
     """
     try:
         logger.info(f"📥 Descargando archivo: {url}")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
+        cached_path = await file_downloader.fetch(url)
         
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        try:
+            os.link(cached_path, output_path)
+        except OSError:
+            # Otro sistema de archivos: copiar
+            await asyncio.to_thread(shutil.copyfile, cached_path, output_path)
         
         logger.info(f"✅ Archivo descargado: {output_path}")
         return True
@@ -392,152 +407,455 @@ def upload_to_storage(file_path: str, meeting_id: str) -> str:
 # INTEGRACIÓN CON MCP SERVER
 # ═══════════════════════════════════════════════════════════════════════════
 
-async def call_mcp_tool(tool_name: str, arguments: Dict) -> Any:
+# Timeouts por herramienta (segundos). transcribe_audio descarga y transcribe
+# la grabación completa; el resto son llamadas cortas al LLM.
+MCP_DEFAULT_TIMEOUT = float(os.getenv("MCP_TIMEOUT", "120"))
+MCP_TOOL_TIMEOUTS = {
+    "transcribe_audio": float(os.getenv("MCP_TRANSCRIBE_TIMEOUT", "900")),
+    "generate_meeting_minutes": 300.0,
+    "summarize_meeting": 300.0,
+    "process_transcript_chunk": 30.0,
+}
+MCP_CONNECT_TIMEOUT = 10.0
+MCP_MAX_CONNECTIONS = int(os.getenv("MCP_MAX_CONNECTIONS", "20"))
+MCP_PROTOCOL_VERSION = "2025-06-18"
+
+class MCPToolStats:
+    """Latencias de una herramienta MCP (ventana de las últimas llamadas)"""
+
+    def __init__(self, window: int = 500):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, ok: bool, timed_out: bool = False):
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.timeouts += 1 if timed_out else 0
+        self.latencies_ms.append(elapsed_ms)
+
+    def snapshot(self) -> Dict:
+        ordered = sorted(self.latencies_ms)
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1) if ordered else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(ordered[-1], 1) if ordered else 0.0,
+        }
+
+class MCPClient:
     """
-    Llamar herramienta del MCP Server
+    Cliente MCP asíncrono (Streamable HTTP) para el MCP Server
     
-    Args:
-        tool_name: Nombre de la herramienta
-        arguments: Argumentos para la herramienta
-    
-    Returns:
-        Any: Resultado de la herramienta
+    - Un único httpx.AsyncClient con keep-alive, compartido por todas las llamadas
+    - Un handshake `initialize` por sesión; el Mcp-Session-Id se reutiliza
+      y, si el servidor la expira (404), se renegocia una sola vez
+    - Respuestas SSE parseadas de forma incremental, evento a evento
+    - Timeout total por herramienta y métricas de latencia por herramienta
     """
-    logger.info(f"🔧 Llamando herramienta MCP: {tool_name}")
-    
-    # Generar ID de sesión único
-    import uuid
-    session_id = str(uuid.uuid4())
-    
-    # Configurar headers con todas las variantes posibles de session ID
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json, text/event-stream",  # Ambos tipos son requeridos
-        "X-Session-Id": session_id,
-        "Session-Id": session_id,
-        "session-id": session_id
-    }
-    
-    # Configurar payload con session_id incluido para asegurar
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "tools/call",
-        "params": {
-            "name": tool_name,
-            "arguments": arguments
-        },
-        "session_id": session_id  # Incluir aquí también
-    }
-    
-    try:
-        # Hacer POST al servidor MCP
-        logger.info(f"Enviando solicitud a {MCP_SERVER_URL} con session_id: {session_id}")
-        logger.info(f"Headers: {headers}")
-        logger.info(f"Payload: {payload}")
-        
-        # Intentar otra forma de pasar el ID de sesión
-        # FastMCP puede esperar que el ID de sesión se pase de otra manera
-        cookies = {"sessionid": session_id}
-        
-        # Aumentar el timeout para herramientas que pueden tomar tiempo
-        response = requests.post(
-            MCP_SERVER_URL, 
-            headers=headers, 
-            json=payload, 
-            cookies=cookies,
-            timeout=300
+
+    def __init__(self, url: str, max_connections: int = MCP_MAX_CONNECTIONS):
+        self.url = url
+        self.max_connections = max_connections
+        self.stats: Dict[str, MCPToolStats] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._session_id: Optional[str] = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return self._session_id
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(MCP_DEFAULT_TIMEOUT, connect=MCP_CONNECT_TIMEOUT),
+            )
+        return self._client
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",  # Ambos tipos son requeridos
+        }
+        if self._session_id:
+            headers["Mcp-Session-Id"] = self._session_id
+        return headers
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._session_id = None
+        self._initialized = False
+
+    # ── Transporte ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    async def _iter_sse(response: httpx.Response):
+        """Eventos `data:` de una respuesta SSE, a medida que llegan"""
+        data: List[str] = []
+        async for line in response.aiter_lines():
+            if line == "":
+                if data:
+                    yield "\n".join(data)
+                    data = []
+            elif line.startswith("data:"):
+                data.append(line[5:].lstrip(" "))
+        if data:
+            yield "\n".join(data)
+
+    async def _post(self, message: Dict, timeout: float) -> Optional[Dict]:
+        """
+        Enviar un mensaje JSON-RPC y devolver la respuesta con el mismo id
+        (None para notificaciones). Lanza httpx.HTTPStatusError si status >= 400.
+        """
+        request = self._http().build_request(
+            "POST",
+            self.url,
+            json=message,
+            headers=self._headers(),
+            timeout=httpx.Timeout(timeout, connect=MCP_CONNECT_TIMEOUT),
         )
-        
-        logger.info(f"Respuesta: {response.status_code}")
-        
-        # Procesar respuesta
-        if response.status_code == 200:
-            # La respuesta puede venir como SSE (Server-Sent Events)
-            response_text = response.text
-            logger.info(f"Respuesta raw: {response_text[:200]}...")
-            
-            # Si la respuesta es SSE, parsearla
-            if response_text.startswith("event:") or "data:" in response_text:
-                # Parsear SSE
-                lines = response_text.strip().split("\n")
-                for line in lines:
-                    if line.startswith("data:"):
-                        json_str = line[5:].strip()  # Remover "data:" prefix
-                        try:
-                            result = json.loads(json_str)
-                            logger.info(f"Respuesta parseada: {result.keys()}")
-                            
-                            # Extraer structuredContent si existe (FastMCP lo genera automáticamente)
-                            if "result" in result:
-                                result_data = result["result"]
-                                
-                                # Si FastMCP envolvió la respuesta, extraer structuredContent
-                                if isinstance(result_data, dict) and "structuredContent" in result_data:
-                                    return result_data["structuredContent"]
-                                
-                                # Si no, retornar el resultado directo
-                                return result_data
-                            elif "error" in result:
-                                return {
-                                    "success": False,
-                                    "error": result["error"]
-                                }
-                            
-                            return result
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Error parseando JSON de SSE: {e}")
-                            continue
-            else:
-                # Respuesta JSON normal
-                result = response.json()
-                logger.info(f"Respuesta exitosa: {result.keys()}")
-                
-                # Extraer structuredContent si existe (FastMCP lo genera automáticamente)
-                if "result" in result:
-                    result_data = result["result"]
-                    
-                    # Si FastMCP envolvió la respuesta, extraer structuredContent
-                    if isinstance(result_data, dict) and "structuredContent" in result_data:
-                        return result_data["structuredContent"]
-                    
-                    # Si no, retornar el resultado directo
-                    return result_data
-                elif "error" in result:
-                    return {
-                        "success": False,
-                        "error": result["error"]
+        response = await self._http().send(request, stream=True)
+        try:
+            if response.status_code >= 400:
+                await response.aread()
+                response.raise_for_status()
+            if "mcp-session-id" in response.headers:
+                self._session_id = response.headers["mcp-session-id"]
+            if "id" not in message or response.status_code == 202:
+                return None
+
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                async for data in self._iter_sse(response):
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Evento SSE no válido ignorado: {e}")
+                        continue
+                    # El servidor puede intercalar notificaciones (progreso, logs)
+                    if isinstance(event, dict) and event.get("id") == message["id"]:
+                        return event
+                raise httpx.RemoteProtocolError("Stream SSE cerrado sin respuesta")
+
+            await response.aread()
+            return response.json()
+        finally:
+            await response.aclose()
+
+    async def _ensure_session(self):
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            self._session_id = None
+            result = await self._post({
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": MCP_PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "meeting-api", "version": app.version},
+                },
+            }, MCP_CONNECT_TIMEOUT * 3)
+            if result and "error" in result:
+                raise RuntimeError(f"initialize rechazado: {result['error']}")
+            await self._post(
+                {"jsonrpc": "2.0", "method": "notifications/initialized"},
+                MCP_CONNECT_TIMEOUT,
+            )
+            self._initialized = True
+            logger.info(f"🔌 Sesión MCP iniciada ({self._session_id or 'stateless'})")
+
+    # ── Herramientas ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def _unwrap(result: Dict) -> Any:
+        if "result" in result:
+            result_data = result["result"]
+            # Si FastMCP envolvió la respuesta, extraer structuredContent
+            if isinstance(result_data, dict) and "structuredContent" in result_data:
+                return result_data["structuredContent"]
+            return result_data
+        if "error" in result:
+            return {"success": False, "error": result["error"]}
+        return result
+
+    async def call_tool(self, tool_name: str, arguments: Dict) -> Any:
+        timeout = MCP_TOOL_TIMEOUTS.get(tool_name, MCP_DEFAULT_TIMEOUT)
+        stats = self.stats.setdefault(tool_name, MCPToolStats())
+        started = time.perf_counter()
+        ok, timed_out = False, False
+        try:
+            async with asyncio.timeout(timeout):
+                for attempt in range(2):
+                    await self._ensure_session()
+                    message = {
+                        "jsonrpc": "2.0",
+                        "id": next(self._ids),
+                        "method": "tools/call",
+                        "params": {"name": tool_name, "arguments": arguments},
                     }
-                
-                return result
-        else:
-            error_msg = f"❌ Error MCP ({response.status_code}): {response.text}"
+                    try:
+                        result = await self._post(message, timeout)
+                        break
+                    except httpx.HTTPStatusError as e:
+                        # Sesión expirada en el servidor: renegociar una vez
+                        if e.response.status_code == 404 and self._session_id and attempt == 0:
+                            self._initialized = False
+                            continue
+                        raise
+            unwrapped = self._unwrap(result)
+            ok = not (isinstance(unwrapped, dict) and unwrapped.get("success") is False)
+            return unwrapped
+
+        except (TimeoutError, httpx.TimeoutException):
+            timed_out = True
+            error_msg = f"⏲️ Timeout llamando MCP tool: {tool_name} ({timeout:.0f}s)"
+            logger.error(error_msg)
+            return {"success": False, "error_type": "TimeoutError", "error_message": error_msg}
+        except httpx.HTTPStatusError as e:
+            error_msg = f"❌ Error MCP ({e.response.status_code}): {e.response.text[:500]}"
             logger.error(error_msg)
             return {
                 "success": False,
                 "error_type": "HTTPError",
                 "error_message": error_msg,
-                "status_code": response.status_code
+                "status_code": e.response.status_code,
             }
-            
-    except requests.exceptions.Timeout:
-        error_msg = f"⏲️ Timeout llamando MCP tool: {tool_name}"
-        logger.error(error_msg)
-        return {
-            "success": False,
-            "error_type": "TimeoutError",
-            "error_message": error_msg
-        }
-    except Exception as e:
-        error_msg = f"❌ Error general llamando MCP: {str(e)}"
-        logger.error(error_msg)
-        return {
-            "success": False,
-            "error_type": type(e).__name__,
-            "error_message": error_msg
+        except Exception as e:
+            if isinstance(e, httpx.TransportError):
+                self._initialized = False  # reconectar y renegociar en la próxima llamada
+            error_msg = f"❌ Error general llamando MCP: {str(e)}"
+            logger.error(error_msg)
+            return {"success": False, "error_type": type(e).__name__, "error_message": error_msg}
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.record(elapsed_ms, ok, timed_out)
+            logger.info(f"🔧 MCP {tool_name}: {'ok' if ok else 'error'} en {elapsed_ms:.0f} ms")
+            logger.debug(f"MCP {tool_name} argumentos: {list(arguments)} "
+                         f"({len(json.dumps(arguments, ensure_ascii=False))} caracteres)")
+
+    def metrics(self) -> Dict[str, Dict]:
+        return {name: stats.snapshot() for name, stats in sorted(self.stats.items())}
+
+mcp_client = MCPClient(MCP_SERVER_URL)
+
+async def call_mcp_tool(tool_name: str, arguments: Dict) -> Any:
+    """
+    Llamar herramienta del MCP Server
+    
+    Args:
+        tool_name: Nombre de la herramienta
+        arguments: Argumentos para la herramienta
+    
+    Returns:
+        Any: Resultado de la herramienta (structuredContent si existe), o
+        {"success": False, "error_type": ..., "error_message": ...} si falla
+    """
+    return await mcp_client.call_tool(tool_name, arguments)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PIPELINE DE PROCESAMIENTO (DAG)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Pasos del pipeline que pueden estar en vuelo a la vez (llamadas MCP concurrentes)
+PIPELINE_MAX_CONCURRENCY = int(os.getenv("PIPELINE_MAX_CONCURRENCY", "4"))
+PIPELINE_STEP_ATTEMPTS = int(os.getenv("PIPELINE_STEP_ATTEMPTS", "3"))  # intentos por paso
+PIPELINE_RETRY_DELAY = 5.0  # segundos antes del 2º intento (se duplica en cada uno)
+
+class PipelineStepError(Exception):
+    """Un paso del pipeline devolvió un error del MCP Server"""
+
+@dataclass
+class PipelineStep:
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]  # recibe los resultados de `deps`
+    deps: Tuple[str, ...] = ()
+
+class MeetingPipeline:
+    """
+    Ejecuta pasos con dependencias (DAG) de forma concurrente
+    
+    Cada paso arranca en cuanto terminan sus dependencias, con como máximo
+    `max_concurrency` pasos en ejecución. Un paso que falla se reintenta
+    (`max_attempts`, con backoff); si sigue fallando, los que dependen de él
+    se marcan como "skipped". `on_step_done(name, status, seconds)` se
+    llama al terminar cada paso, para persistir el progreso.
+    Los pasos con resultado en `checkpoints` (de un intento anterior del
+    trabajo) no se repiten; `on_checkpoint(name, result)` guarda los nuevos.
+    El tiempo total queda acotado por la rama más larga, no por la suma.
+    """
+
+    def __init__(self, steps: List[PipelineStep],
+                 max_concurrency: int = PIPELINE_MAX_CONCURRENCY,
+                 on_step_done: Optional[Callable[[str, str, float], Awaitable[None]]] = None,
+                 max_attempts: int = PIPELINE_STEP_ATTEMPTS,
+                 checkpoints: Optional[Dict[str, Any]] = None,
+                 on_checkpoint: Optional[Callable[[str, Any], Awaitable[None]]] = None):
+        seen = set()
+        for step in steps:
+            missing = [d for d in step.deps if d not in seen]
+            if missing:
+                # Exigir orden topológico también descarta ciclos
+                raise ValueError(f"Paso '{step.name}' depende de pasos no declarados antes: {missing}")
+            seen.add(step.name)
+        self.steps = steps
+        self.max_concurrency = max_concurrency
+        self.on_step_done = on_step_done
+        self.max_attempts = max(1, max_attempts)
+        self.on_checkpoint = on_checkpoint
+        self.results: Dict[str, Any] = dict(checkpoints or {})
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_step(step: PipelineStep) -> bool:
+            if step.name in self.results:
+                logger.info(f"♻️ Paso {step.name} ya hecho en un intento anterior")
+                return True
+            deps_ok = [await tasks[d] for d in step.deps]
+            if not all(deps_ok):
+                await self._finish(step.name, "skipped", 0.0)
+                return False
+            started = time.perf_counter()
+            for attempt in range(1, self.max_attempts + 1):
+                async with semaphore:
+                    try:
+                        result = await step.run({d: self.results[d] for d in step.deps})
+                        break
+                    except Exception as e:
+                        error = e
+                if attempt == self.max_attempts:
+                    self.errors[step.name] = str(error)
+                    logger.error(f"❌ Paso {step.name} falló: {error}")
+                    await self._finish(step.name, "error", time.perf_counter() - started)
+                    return False
+                delay = PIPELINE_RETRY_DELAY * 2 ** (attempt - 1)
+                logger.warning(f"⚠️ Paso {step.name} falló (intento {attempt}/{self.max_attempts}), "
+                               f"reintentando en {delay:.0f}s: {error}")
+                await asyncio.sleep(delay)
+            self.results[step.name] = result
+            if self.on_checkpoint:
+                await self.on_checkpoint(step.name, result)
+            await self._finish(step.name, "ok", time.perf_counter() - started)
+            return True
+
+        for step in self.steps:
+            tasks[step.name] = asyncio.create_task(run_step(step), name=f"pipeline:{step.name}")
+        await asyncio.gather(*tasks.values())
+        return self.results
+
+    async def _finish(self, name: str, status: str, seconds: float):
+        self.timings[name] = round(seconds, 2)
+        if self.on_step_done:
+            try:
+                await self.on_step_done(name, status, seconds)
+            except Exception as e:
+                logger.error(f"❌ No se pudo guardar el paso {name}: {e}")
+
+def _mcp_check(result: Any, tool_name: str) -> Dict:
+    """Lanzar PipelineStepError si la herramienta MCP no tuvo éxito"""
+    if not isinstance(result, dict) or not result.get("success"):
+        error = result.get("error_message") or result.get("error") if isinstance(result, dict) else result
+        raise PipelineStepError(f"{tool_name}: {error}")
+    return result
+
+def _mcp_text(result: Any, tool_name: str) -> str:
+    """Texto de una respuesta MCP ({"success", "data": {"content": [...]}})"""
+    data = _mcp_check(result, tool_name).get("data", {})
+    if isinstance(data, dict) and "content" in data:
+        return data["content"][0].get("text", "") if isinstance(data["content"], list) else ""
+    return str(data)
+
+async def _step_transcribe(recording_url: str) -> str:
+    logger.info("📝 Transcribiendo audio...")
+    return _mcp_text(await call_mcp_tool("transcribe_audio", {"video_url": recording_url}), "transcribe_audio")
+
+async def _step_translate(deps: Dict[str, Any]) -> str:
+    logger.info("🌐 Traduciendo a español...")
+    result = await call_mcp_tool("translate_text", {"text": deps["transcribe"], "target_language": "es"})
+    return _mcp_text(result, "translate_text")
+
+async def _step_summarize(deps: Dict[str, Any]) -> str:
+    logger.info("📋 Generando resumen...")
+    # summarize_meeting devuelve structuredContent: {"success", "summary"} o el error estructurado
+    result = await call_mcp_tool("summarize_meeting", {"transcript": deps["transcribe"]})
+    if not isinstance(result, dict):
+        return str(result)
+    if not result.get("success"):
+        error_info = {
+            "error_type": result.get("error_type"),
+            "error_message": result.get("error_message"),
+            "error_details": result.get("error_details")
         }
+        raise PipelineStepError(f"summarize_meeting: {json.dumps(error_info)}")
+    return result.get("summary", "")
+
+async def _step_actions(deps: Dict[str, Any]) -> str:
+    logger.info("✅ Extrayendo acciones...")
+    result = await call_mcp_tool("extract_action_items", {"transcript": deps["transcribe"]})
+    return _mcp_text(result, "extract_action_items")
+
+async def _step_sentiment(deps: Dict[str, Any]) -> Dict:
+    logger.info("📈 Analizando sentimiento...")
+    result = await call_mcp_tool("analyze_sentiment", {"transcript": deps["transcribe"]})
+    return _mcp_check(result, "analyze_sentiment").get("data", {})
+
+async def _step_minutes(deps: Dict[str, Any]) -> str:
+    # Se arma con los resultados ya calculados: la herramienta
+    # generate_meeting_minutes repetiría resumen, acciones y sentimiento
+    return (
+        "# 📝 MINUTAS DE REUNIÓN\n\n"
+        f"## 📋 RESUMEN:\n{deps['summarize']}\n\n"
+        f"## ✅ ELEMENTOS DE ACCIÓN:\n{deps['actions']}\n\n"
+        f"## 📊 ANÁLISIS DE SENTIMIENTO:\n{json.dumps(deps['sentiment'], ensure_ascii=False, indent=2)}\n"
+    )
 
-async def process_meeting_with_mcp(meeting_id: str, recording_url: str, host_id: str):
+def build_meeting_pipeline(recording_url: str,
+                           on_step_done: Optional[Callable[[str, str, float], Awaitable[None]]] = None,
+                           **pipeline_options) -> MeetingPipeline:
+    """
+    transcribe ─┬─ translate
+                ├─ summarize ─┐
+                ├─ actions ───┼─ minutes
+                └─ sentiment ─┘
+    
+    Los análisis dependen solo de la transcripción (los prompts del MCP
+    Server piden responder en español aunque el audio esté en otro idioma),
+    así que corren en paralelo con la traducción.
+    """
+    return MeetingPipeline([
+        PipelineStep("transcribe", lambda deps: _step_transcribe(recording_url)),
+        PipelineStep("translate", _step_translate, ("transcribe",)),
+        PipelineStep("summarize", _step_summarize, ("transcribe",)),
+        PipelineStep("actions", _step_actions, ("transcribe",)),
+        PipelineStep("sentiment", _step_sentiment, ("transcribe",)),
+        PipelineStep("minutes", _step_minutes, ("summarize", "actions", "sentiment")),
+    ], on_step_done=on_step_done, **pipeline_options)
+
+async def process_meeting_with_mcp(meeting_id: str, recording_url: str, host_id: str,
+                                   checkpoints: Optional[Dict[str, Any]] = None,
+                                   on_checkpoint: Optional[Callable[[str, Any], Awaitable[None]]] = None) -> str:
     """
     Procesar grabación con MCP Server
     
@@ -545,120 +863,347 @@ async def process_meeting_with_mcp(meeting_id: str, recording_url: str, host_id:
         meeting_id: ID de reunión
         recording_url: URL de grabación
         host_id: ID del usuario host
+        checkpoints: Resultados de pasos de un intento anterior (no se repiten)
+        on_checkpoint: Se llama con (paso, resultado) al terminar cada paso
+    
+    Returns:
+        str: Estado final de la reunión ("completed", "error_transcription" o "error")
     """
     logger.info(f"🤖 Procesando reunión {meeting_id} con MCP Server")
     
     # Actualizar estado
-    update_meeting_status(meeting_id, "processing")
+    await update_meeting_status(meeting_id, "processing")
     
     try:
-        # 1. TRANSCRIBIR
-        logger.info("📝 Transcribiendo audio...")
-        transcript_result = await call_mcp_tool("transcribe_audio", {
-            "video_url": recording_url
-        })
-        
-        # Verificar si hay error
-        if not transcript_result.get("success"):
-            logger.error(f"Error en transcripción: {transcript_result.get('error')}")
-            update_meeting_status(meeting_id, "error_transcription")
-            MEETINGS_DB[meeting_id]["error"] = transcript_result.get("error")
-            return
+        started = time.perf_counter()
+        pipeline = build_meeting_pipeline(
+            recording_url,
+            on_step_done=lambda step, status, seconds: save_step_result(meeting_id, step, status, seconds),
+            checkpoints=checkpoints,
+            on_checkpoint=on_checkpoint
+        )
+        results = await pipeline.run()
         
-        # Extraer el texto de la transcripción
-        transcript_data = transcript_result.get("data", {})
-        if isinstance(transcript_data, dict) and "content" in transcript_data:
-            transcript = transcript_data["content"][0].get("text", "") if isinstance(transcript_data["content"], list) else ""
-        else:
-            transcript = str(transcript_data)
-        
-        # 2. TRADUCIR (opcional - si transcript está en inglés)
-        logger.info("🌐 Traduciendo a español...")
-        translated_result = await call_mcp_tool("translate_text", {
-            "text": transcript,
-            "target_language": "es"
-        })
-        
-        translated = ""
-        if translated_result.get("success"):
-            translated_data = translated_result.get("data", {})
-            if isinstance(translated_data, dict) and "content" in translated_data:
-                translated = translated_data["content"][0].get("text", "") if isinstance(translated_data["content"], list) else ""
-            else:
-                translated = str(translated_data)
-        
-        # 3. RESUMIR
-        logger.info("📋 Generando resumen...")
-        summary_result = await call_mcp_tool("summarize_meeting", {
-            "transcript": translated or transcript
-        })
-        
-        summary = ""
-        # Ahora summary_result ya es el structuredContent directo
-        if isinstance(summary_result, dict):
-            if summary_result.get("success"):
-                summary = summary_result.get("summary", "")
-            else:
-                # Error estructurado
-                error_info = {
-                    "error_type": summary_result.get("error_type"),
-                    "error_message": summary_result.get("error_message"),
-                    "error_details": summary_result.get("error_details")
-                }
-                summary = f"Error: {json.dumps(error_info)}"
-                logger.error(f"Error en resumen: {error_info}")
-        else:
-            summary = str(summary_result)
-        
-        # 4. EXTRAER ACCIONES
-        logger.info("✅ Extrayendo acciones...")
-        actions_result = await call_mcp_tool("extract_action_items", {
-            "transcript": translated or transcript
-        })
-        
-        actions = ""
-        if actions_result.get("success"):
-            actions_data = actions_result.get("data", {})
-            if isinstance(actions_data, dict) and "content" in actions_data:
-                actions = actions_data["content"][0].get("text", "") if isinstance(actions_data["content"], list) else ""
-            else:
-                actions = str(actions_data)
-        
-        # 5. ANALIZAR SENTIMIENTO (opcional)
-        logger.info("📈 Analizando sentimiento...")
-        sentiment_result = await call_mcp_tool("analyze_sentiment", {
-            "transcript": translated or transcript
-        })
-        
-        sentiment = {}
-        if sentiment_result.get("success"):
-            sentiment = sentiment_result.get("data", {})
-        
-        # 6. GUARDAR EN BD
-        save_processed_meeting(
+        # Sin transcripción no hay nada que guardar
+        if "transcribe" in pipeline.errors:
+            logger.error(f"Error en transcripción: {pipeline.errors['transcribe']}")
+            await update_meeting_status(meeting_id, "error_transcription", error=pipeline.errors["transcribe"])
+            return "error_transcription"
+        
+        summary = results.get("summarize", "")
+        if "summarize" in pipeline.errors:
+            summary = f"Error: {pipeline.errors['summarize']}"
+        sentiment = results.get("sentiment", {})
+        meeting = await db.get_meeting(meeting_id) or {}
+        
+        # Guardar en BD
+        await save_processed_meeting(
             meeting_id=meeting_id,
             host_id=host_id,
-            platform=MEETINGS_DB[meeting_id].get("platform", "unknown"),
+            platform=meeting.get("platform") or "unknown",
             recording_url=recording_url,
-            transcript=transcript,
-            translated=translated,
+            transcript=results["transcribe"],
+            translated=results.get("translate", ""),
             summary=summary,
-            actions=actions,
-            sentiment=json.dumps(sentiment) if sentiment else ""
+            actions=results.get("actions", ""),
+            sentiment=json.dumps(sentiment) if sentiment else "",
+            minutes=results.get("minutes", ""),
+            timings=pipeline.timings
         )
         
-        # 7. ACTUALIZAR ESTADO
-        update_meeting_status(meeting_id, "completed")
+        # Actualizar estado
+        await update_meeting_status(meeting_id, "completed")
         
-        # 8. NOTIFICAR USUARIO
-        notify_user(host_id, meeting_id, f"Reunión {MEETINGS_DB[meeting_id].get('topic', 'sin título')} procesada")
+        # Notificar usuario
+        await notify_user(host_id, meeting_id, f"Reunión {meeting.get('topic') or 'sin título'} procesada")
         
-        logger.info(f"✅ Reunión {meeting_id} procesada exitosamente")
+        total = time.perf_counter() - started
+        logger.info(f"✅ Reunión {meeting_id} procesada en {total:.1f}s "
+                    f"(suma de pasos: {sum(pipeline.timings.values()):.1f}s)")
+        return "completed"
         
     except Exception as e:
         logger.error(f"❌ Error procesando reunión: {str(e)}")
-        update_meeting_status(meeting_id, "error")
-        MEETINGS_DB[meeting_id]["error"] = str(e)
+        await update_meeting_status(meeting_id, "error", error=str(e))
+        return "error"
+
+# ═══════════════════════════════════════════════════════════════════════════
+# COLA DE TRABAJOS (ver job_queue.py y job_worker.py)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# La API encola y responde; el pipeline corre en los procesos de job_worker.py
+job_queue = JobQueue(JOB_QUEUE_PATH)
+JOB_LIMITS = {"process_meeting": JOB_MAX_RUNNING_MEETINGS}
+inline_worker: Optional[JobWorker] = None
+inline_worker_task: Optional[asyncio.Task] = None
+
+async def enqueue_meeting_processing(meeting_id: str, recording_url: str, host_id: str,
+                                     idempotency_key: str) -> Dict:
+    """
+    Encolar el procesamiento de una grabación
+    
+    Args:
+        idempotency_key: Identifica el evento de origen; si ya se encoló,
+            se devuelve el trabajo existente sin duplicarlo
+    
+    Returns:
+        Dict: Trabajo encolado (o el existente)
+    """
+    # Los pasos y resultados referencian meetings.id: la fila debe existir
+    await ensure_meeting_saved(meeting_id, host_id)
+    job, created = await asyncio.to_thread(
+        job_queue.enqueue, "process_meeting",
+        {"meeting_id": meeting_id, "recording_url": recording_url, "host_id": host_id},
+        idempotency_key, JOB_MAX_ATTEMPTS
+    )
+    if created:
+        await update_meeting_status(meeting_id, "queued")
+    else:
+        logger.info(f"♻️ Evento repetido ({idempotency_key}): trabajo {job.id} ya está {job.status}")
+    return job.to_dict()
+
+async def run_process_meeting_job(ctx: JobContext) -> Dict:
+    """Handler de "process_meeting": el pipeline retoma desde los checkpoints del trabajo"""
+    payload = ctx.payload
+    status = await process_meeting_with_mcp(
+        meeting_id=payload["meeting_id"],
+        recording_url=payload["recording_url"],
+        host_id=payload["host_id"],
+        checkpoints=ctx.checkpoints,
+        on_checkpoint=ctx.checkpoint
+    )
+    if status != "completed":
+        # La cola lo reintenta con backoff; los pasos ya hechos no se repiten
+        raise RuntimeError(f"Reunión {payload['meeting_id']} terminó con estado {status}")
+    return {"meeting_id": payload["meeting_id"], "status": status}
+
+JOB_HANDLERS = {"process_meeting": run_process_meeting_job}
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TRANSCRIPCIÓN EN TIEMPO REAL (SEGMENTADOR FFMPEG)
+# ═══════════════════════════════════════════════════════════════════════════
+
+REALTIME_SEGMENT_SECONDS = int(os.getenv("REALTIME_SEGMENT_SECONDS", "30"))
+REALTIME_OVERLAP_SECONDS = float(os.getenv("REALTIME_OVERLAP_SECONDS", "2"))
+REALTIME_WORKERS = int(os.getenv("REALTIME_WORKERS", "2"))
+REALTIME_QUEUE_SIZE = 8  # segmentos esperando transcripción antes de frenar al lector
+REALTIME_DRAIN_TIMEOUT = 120  # segundos para transcribir lo pendiente al detener
+REALTIME_SAMPLE_RATE = 16000
+REALTIME_READ_SIZE = 1024 * 1024  # bytes leídos de la grabación por iteración
+REALTIME_POLL_SECONDS = 1.0  # espera cuando la grabación no ha crecido
+STITCH_MAX_WORDS = 30  # palabras que se comparan a cada lado del corte
+STITCH_MIN_WORDS = 2  # coincidencia mínima para considerar texto repetido
+STITCH_SLACK_WORDS = 3  # palabras mal transcritas toleradas junto al corte
+
+@dataclass
+class AudioSegment:
+    seq: int
+    path: str  # WAV: cola del segmento anterior + segmento actual
+    start: float  # segundo de la grabación donde empieza el segmento (sin solape)
+    overlap: float  # segundos repetidos del segmento anterior
+    closed_at: float  # time.perf_counter() cuando ffmpeg cerró el segmento
+
+def _stitch_words(text: str) -> List[str]:
+    return [re.sub(r"\W+", "", w.lower()) for w in text.split()]
+
+def stitch_overlap(previous: str, text: str) -> str:
+    """
+    Quitar del principio de `text` lo que ya se transcribió al final de `previous`
+    
+    Los segmentos se transcriben con unos segundos de solape, así que la
+    primera frase de uno suele repetir la última del anterior. Se busca la
+    coincidencia de palabras más larga entre el final de `previous` y el
+    inicio de `text` (ignorando mayúsculas y puntuación). Si no hay una
+    coincidencia clara, `text` se devuelve sin cambios.
+    """
+    prev_words = _stitch_words(previous)[-STITCH_MAX_WORDS:]
+    words = text.split()
+    head = _stitch_words(" ".join(words[:STITCH_MAX_WORDS]))
+    match = difflib.SequenceMatcher(None, prev_words, head, autojunk=False).find_longest_match(
+        0, len(prev_words), 0, len(head)
+    )
+    if (match.size >= STITCH_MIN_WORDS
+            and match.a + match.size >= len(prev_words) - STITCH_SLACK_WORDS
+            and match.b <= STITCH_SLACK_WORDS):
+        return " ".join(words[match.b + match.size:])
+    return text
+
+class RealtimeTranscriber:
+    """
+    Transcripción continua de una grabación que sigue creciendo
+    
+    Un único proceso ffmpeg recibe por stdin lo que se va añadiendo a la
+    grabación y la corta con el muxer `segment` en WAV de 16 kHz mono. Al
+    detener, se cierra stdin y ffmpeg cierra el último segmento con
+    normalidad. Cada segmento cerrado se anuncia por stdout
+    (`-segment_list pipe:1`), se le antepone la cola del anterior y pasa por
+    una cola asyncio a `workers` tareas que llaman a `transcribe_audio`.
+    Los textos se entregan en orden a `on_text(seq, start, text)`, sin lo
+    repetido por el solape, y cada archivo se borra en cuanto deja de hacer
+    falta. La grabación no se vuelve a abrir ni a recorrer por cada
+    segmento, así que la latencia es la misma en el minuto 1 que en la hora 3.
+    """
+
+    def __init__(self, recording_path: str, segments_dir: str,
+                 on_text: Callable[[int, float, str], Awaitable[None]],
+                 segment_seconds: int = REALTIME_SEGMENT_SECONDS,
+                 overlap_seconds: float = REALTIME_OVERLAP_SECONDS,
+                 workers: int = REALTIME_WORKERS):
+        self.recording_path = recording_path
+        self.segments_dir = segments_dir
+        self.on_text = on_text
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.workers = max(1, workers)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=REALTIME_QUEUE_SIZE)
+        self._stopping = asyncio.Event()
+        self._done: Dict[int, Tuple[AudioSegment, Optional[str]]] = {}  # terminados fuera de orden
+        self._next_seq = 0
+        self._last_text = ""
+        self._emit_lock = asyncio.Lock()
+
+    def _ffmpeg_command(self) -> List[str]:
+        return [
+            "ffmpeg", "-hide_banner", "-nostdin", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-vn", "-ac", "1", "-ar", str(REALTIME_SAMPLE_RATE), "-c:a", "pcm_s16le",
+            "-f", "segment", "-segment_time", str(self.segment_seconds),
+            "-reset_timestamps", "1",
+            "-segment_list", "pipe:1", "-segment_list_type", "csv",
+            os.path.join(self.segments_dir, "segment_%06d.wav"),
+        ]
+
+    async def run(self):
+        """Segmentar y transcribir hasta que se llame a stop() y se vacíe la cola"""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self.process = await asyncio.create_subprocess_exec(
+            *self._ffmpeg_command(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        tasks = [asyncio.create_task(self._worker(), name=f"realtime:worker{i}")
+                 for i in range(self.workers)]
+        tasks.append(asyncio.create_task(self._feed_recording(), name="realtime:feed"))
+        tasks.append(asyncio.create_task(self._log_stderr(), name="realtime:stderr"))
+        try:
+            await self._read_segments()
+            for _ in range(self.workers):
+                await self.queue.put(None)
+            await asyncio.gather(*tasks[:self.workers])
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.process.returncode is None:
+                self.process.kill()
+                await self.process.wait()
+            shutil.rmtree(self.segments_dir, ignore_errors=True)
+
+    async def stop(self):
+        """Dejar de leer la grabación: run() termina al vaciar la cola"""
+        self._stopping.set()
+
+    async def _feed_recording(self):
+        """Pasar a ffmpeg lo que se va escribiendo en la grabación"""
+        try:
+            with open(self.recording_path, "rb") as recording:
+                while True:
+                    data = await asyncio.to_thread(recording.read, REALTIME_READ_SIZE)
+                    if data:
+                        self.process.stdin.write(data)
+                        await self.process.stdin.drain()
+                        continue
+                    # Al final del archivo: esperar a que crezca o a stop()
+                    if self._stopping.is_set():
+                        break
+                    try:
+                        async with asyncio.timeout(REALTIME_POLL_SECONDS):
+                            await self._stopping.wait()
+                    except TimeoutError:
+                        pass
+        except (BrokenPipeError, ConnectionResetError):
+            logger.error("❌ ffmpeg cerró la entrada antes de tiempo")
+        finally:
+            self.process.stdin.close()
+
+    async def _read_segments(self):
+        seq = 0
+        tail = b""
+        async for line in self.process.stdout:
+            # csv: nombre,inicio,fin (segundos dentro de la grabación)
+            name, start, _end = line.decode().strip().rsplit(",", 2)
+            closed_at = time.perf_counter()
+            window, overlap, tail = await asyncio.to_thread(
+                self._build_window, os.path.join(self.segments_dir, name), tail
+            )
+            await self.queue.put(AudioSegment(seq, window, float(start), overlap, closed_at))
+            seq += 1
+        returncode = await self.process.wait()
+        if returncode != 0:
+            logger.error(f"❌ ffmpeg terminó con código {returncode}")
+
+    def _build_window(self, path: str, tail: bytes) -> Tuple[str, float, bytes]:
+        """
+        Escribir cola del segmento anterior + segmento y borrar el segmento
+        
+        Returns:
+            Tuple: (ruta de la ventana, segundos de solape, nueva cola en memoria)
+        """
+        with wave.open(path, "rb") as src:
+            params = src.getparams()
+            frames = src.readframes(src.getnframes())
+        window_path = path[:-len(".wav")] + "_window.wav"
+        with wave.open(window_path, "wb") as dst:
+            dst.setparams(params)
+            dst.writeframes(tail + frames)
+        os.remove(path)
+        frame_size = params.sampwidth * params.nchannels
+        keep = int(self.overlap_seconds * params.framerate) * frame_size
+        overlap = len(tail) / (frame_size * params.framerate)
+        return window_path, overlap, frames[-keep:] if keep else b""
+
+    async def _worker(self):
+        while (segment := await self.queue.get()) is not None:
+            text = None
+            try:
+                result = await call_mcp_tool("transcribe_audio", {"video_url": f"file://{segment.path}"})
+                text = _mcp_text(result, "transcribe_audio").strip()
+                if text.startswith("Error:"):
+                    raise PipelineStepError(f"transcribe_audio: {text}")
+            except Exception as e:
+                logger.error(f"❌ Error transcribiendo segmento {segment.seq}: {str(e)}")
+                text = None
+            finally:
+                # El MCP Server extrae el audio a un .mp3 junto a la ventana
+                for path in (segment.path, segment.path[:-len(".wav")] + ".mp3"):
+                    if os.path.exists(path):
+                        os.remove(path)
+            await self._emit(segment, text)
+
+    async def _emit(self, segment: AudioSegment, text: Optional[str]):
+        """Entregar los textos en orden de segmento aunque terminen desordenados"""
+        self._done[segment.seq] = (segment, text)
+        async with self._emit_lock:
+            while self._next_seq in self._done:
+                segment, text = self._done.pop(self._next_seq)
+                self._next_seq += 1
+                if not text:
+                    continue
+                stitched = stitch_overlap(self._last_text, text) if segment.overlap else text
+                self._last_text = text
+                if not stitched:
+                    continue
+                latency = time.perf_counter() - segment.closed_at
+                logger.info(f"📝 Segmento {segment.seq} transcrito {latency:.1f}s después de cerrarse")
+                try:
+                    await self.on_text(segment.seq, segment.start, stitched)
+                except Exception as e:
+                    logger.error(f"❌ Error entregando segmento {segment.seq}: {str(e)}")
+
+    async def _log_stderr(self):
+        async for line in self.process.stderr:
+            logger.warning(f"⚠️ ffmpeg: {line.decode(errors='replace').strip()}")
 
 # ═══════════════════════════════════════════════════════════════════════════
 # BOT RECORDER - GRABACIÓN AUTOMÁTICA
@@ -670,16 +1215,25 @@ class BotRecorder:
     Funciona con múltiples plataformas usando Puppeteer o SDKs nativos.
     """
     
-    def __init__(self):
+    def __init__(self, transcript_channel: Optional[str] = None):
         """
         Inicializar el bot recorder
+        
+        Args:
+            transcript_channel: ID con el que se publica la transcripción en vivo
+                (el de /ws/transcript/{meeting_id}); por defecto, el de la reunión
         """
+        self.transcript_channel = transcript_channel
+        # Identifica esta sesión de grabación: la misma reunión puede grabarse varias veces
+        self.session_id = uuid.uuid4().hex
         self.meeting_id = None
         self.platform = None
         self.meeting_url = None
         self.recording_path = None
         self.transcript_path = None
         self.process = None
+        self.transcriber = None
+        self.realtime_task = None
         self.bot_name = "Loquera Bot"
         self.bot_email = BOT_EMAIL
         self.active = False
@@ -752,6 +1306,7 @@ class BotRecorder:
         self.meeting_url = meeting_url
         self.platform = meeting_info["platform"]
         self.meeting_id = meeting_info["meeting_id"]
+        self.transcript_channel = self.transcript_channel or self.meeting_id
         
         # Crear directorio temporal para grabación
         recording_dir = tempfile.mkdtemp()
@@ -763,6 +1318,7 @@ class BotRecorder:
         await self._join_with_playwright()
         
         self.active = True
+        await transcript_broadcaster.open(self.transcript_channel)
         return self.recording_path
     
     
@@ -816,7 +1372,7 @@ class BotRecorder:
             self.page = page
             
             # Iniciar transcripción en tiempo real
-            asyncio.create_task(self._transcribe_realtime())
+            self.realtime_task = asyncio.create_task(self._transcribe_realtime())
             
             logger.info(f"🎥 Grabación iniciada: {self.recording_path}")
             logger.info(f"📝 Transcripción: {self.transcript_path}")
@@ -972,65 +1528,40 @@ class BotRecorder:
             await asyncio.sleep(5)
             if not self.active:
                 return
+        if not self.active:
+            return
         
         # Inicializar archivo de transcripción
         with open(self.transcript_path, "w") as f:
             f.write("[Transcripción en tiempo real]\n\n")
         
-        # Procesar chunks de audio cada X segundos
-        chunk_interval = 30  # segundos
-        chunk_number = 0
-        
-        # Crear directorio para chunks
-        chunks_dir = os.path.join(os.path.dirname(self.recording_path), "chunks")
-        os.makedirs(chunks_dir, exist_ok=True)
+        # Los segmentos viven junto a la grabación y se borran al transcribirse
+        segments_dir = os.path.join(os.path.dirname(self.recording_path), "segments")
         
         with open(self.transcript_path, "a") as transcript_file:
-            # Mientras la grabación esté activa
-            while self.active and self.process and self.process.poll() is None:
-                chunk_number += 1
-                chunk_path = os.path.join(chunks_dir, f"chunk_{chunk_number}.mp3")
+            async def on_text(seq: int, start: float, text: str):
+                # Añadir timestamp
+                timestamp = time.strftime("%H:%M:%S", time.gmtime(start))
+                transcript_chunk = f"[{timestamp}] {text}\n\n"
                 
-                # Extraer chunk de audio de la grabación en curso
-                try:
-                    subprocess.run([
-                        "ffmpeg", "-y",
-                        "-ss", str(chunk_interval * (chunk_number - 1)),
-                        "-t", str(chunk_interval),
-                        "-i", self.recording_path,
-                        "-vn", "-acodec", "libmp3lame", "-ac", "1", "-ar", "16000",
-                        chunk_path
-                    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
-                    
-                    # Verificar si el chunk tiene contenido
-                    if os.path.exists(chunk_path) and os.path.getsize(chunk_path) > 1024:
-                        # Llamar a MCP para transcripción
-                        transcription = await call_mcp_tool("transcribe_audio", {
-                            "video_url": f"file://{chunk_path}"
-                        })
-                        
-                        if isinstance(transcription, str) and transcription:
-                            # Añadir timestamp
-                            timestamp = time.strftime("%H:%M:%S", time.gmtime(chunk_interval * (chunk_number - 1)))
-                            transcript_chunk = f"[{timestamp}] {transcription}\n\n"
-                            
-                            # Escribir a archivo
-                            transcript_file.write(transcript_chunk)
-                            transcript_file.flush()
-                            
-                            # Procesar chunk con MCP
-                            await call_mcp_tool("process_transcript_chunk", {
-                                "meeting_id": self.meeting_id,
-                                "transcript_chunk": transcript_chunk,
-                                "platform": self.platform
-                            })
-                            
-                            logger.info(f"📝 Transcripción chunk {chunk_number}: {transcription[:50]}...")
-                except Exception as e:
-                    logger.error(f"❌ Error procesando chunk {chunk_number}: {str(e)}")
+                # Escribir a archivo
+                transcript_file.write(transcript_chunk)
+                transcript_file.flush()
+                
+                # Enviar a los WebSockets conectados
+                await transcript_broadcaster.publish(self.transcript_channel, transcript_chunk)
+                
+                # Procesar chunk con MCP
+                await call_mcp_tool("process_transcript_chunk", {
+                    "meeting_id": self.meeting_id,
+                    "transcript_chunk": transcript_chunk,
+                    "platform": self.platform
+                })
                 
-                # Esperar para el siguiente chunk
-                await asyncio.sleep(chunk_interval)
+                logger.info(f"📝 Transcripción segmento {seq}: {text[:50]}...")
+            
+            self.transcriber = RealtimeTranscriber(self.recording_path, segments_dir, on_text)
+            await self.transcriber.run()
         
         logger.info("✅ Transcripción en tiempo real finalizada")
     
@@ -1044,6 +1575,19 @@ class BotRecorder:
         self.active = False
         logger.info("🛑 Deteniendo grabación...")
         
+        # Cerrar el segmentador y esperar a que se transcriba lo pendiente
+        if self.transcriber:
+            await self.transcriber.stop()
+        if self.realtime_task:
+            try:
+                async with asyncio.timeout(REALTIME_DRAIN_TIMEOUT):
+                    await self.realtime_task
+            except TimeoutError:
+                logger.warning("⚠️ Transcripción en tiempo real cancelada: se agotó el tiempo de espera")
+            except Exception as e:
+                logger.error(f"❌ Error en transcripción en tiempo real: {str(e)}")
+        await transcript_broadcaster.close(self.transcript_channel)
+        
         # Cerrar Playwright si está activo
         if hasattr(self, 'page') and self.page:
             try:
@@ -1124,7 +1668,7 @@ async def join_bot(invite: MeetingInvite, background_tasks: BackgroundTasks):
             invite.platform = detect_platform(invite.meeting_url)
         
         # Guardar en BD
-        meeting_id = save_manual_meeting(
+        meeting_id = await save_manual_meeting(
             user_id=invite.user_id,
             meeting_url=invite.meeting_url,
             title=invite.title or "Reunión sin título",
@@ -1167,7 +1711,7 @@ async def stop_bot(meeting_id: str):
         bot = ACTIVE_BOTS[meeting_id]
         
         # Actualizar estado
-        update_meeting_status(meeting_id, "stopping")
+        await update_meeting_status(meeting_id, "stopping")
         
         # Detener bot
         recording_url = await bot.stop()
@@ -1176,19 +1720,19 @@ async def stop_bot(meeting_id: str):
         del ACTIVE_BOTS[meeting_id]
         
         # Actualizar estado
-        update_meeting_status(meeting_id, "stopped")
+        await update_meeting_status(meeting_id, "stopped")
         
         # Si hay URL de grabación, guardarla
         if recording_url:
-            save_recording_url(meeting_id, recording_url)
+            await save_recording_url(meeting_id, recording_url)
+            meeting = await db.get_meeting(meeting_id)
             
-            # Procesar grabación
-            asyncio.create_task(
-                process_meeting_with_mcp(
-                    meeting_id=meeting_id,
-                    recording_url=recording_url,
-                    host_id=MEETINGS_DB[meeting_id]["host_id"]
-                )
+            # Encolar procesamiento de la grabación
+            await enqueue_meeting_processing(
+                meeting_id=meeting_id,
+                recording_url=recording_url,
+                host_id=meeting["host_id"],
+                idempotency_key=f"bot:{meeting_id}:{bot.session_id}"
             )
         
         return {
@@ -1199,10 +1743,10 @@ async def stop_bot(meeting_id: str):
         }
     else:
         # Verificar si existe la reunión
-        if meeting_id not in MEETINGS_DB:
+        if not await db.get_meeting(meeting_id):
             raise HTTPException(status_code=404, detail="Reunión no encontrada")
         
-        update_meeting_status(meeting_id, "not_recording")
+        await update_meeting_status(meeting_id, "not_recording")
         
         return {
             "status": "not_found",
@@ -1246,11 +1790,11 @@ async def join_bot_and_process(meeting_url: str, user_id: str, meeting_id: str,
         auto_stop_after: Minutos para detener automáticamente
     """
     # Actualizar estado
-    update_meeting_status(meeting_id, "bot_joining")
+    await update_meeting_status(meeting_id, "bot_joining")
     
     try:
         # Crear bot
-        bot = BotRecorder()
+        bot = BotRecorder(transcript_channel=meeting_id)
         
         # Registrar en bots activos
         ACTIVE_BOTS[meeting_id] = bot
@@ -1259,10 +1803,10 @@ async def join_bot_and_process(meeting_url: str, user_id: str, meeting_id: str,
         recording_path = await bot.join_meeting(meeting_url)
         
         # Actualizar estado
-        update_meeting_status(meeting_id, "recording")
+        await update_meeting_status(meeting_id, "recording")
         
         # Notificar usuario
-        notify_user(user_id, meeting_id, f"Bot unido a la reunión y grabando")
+        await notify_user(user_id, meeting_id, f"Bot unido a la reunión y grabando")
         
         logger.info(f"✅ Bot unido a reunión: {meeting_id}")
         
@@ -1278,7 +1822,7 @@ async def join_bot_and_process(meeting_url: str, user_id: str, meeting_id: str,
                 logger.info(f"⏰ Deteniendo bot automáticamente: {meeting_id}")
                 
                 # Actualizar estado
-                update_meeting_status(meeting_id, "stopping")
+                await update_meeting_status(meeting_id, "stopping")
                 
                 # Detener bot
                 recording_url = await bot.stop()
@@ -1287,32 +1831,33 @@ async def join_bot_and_process(meeting_url: str, user_id: str, meeting_id: str,
                 del ACTIVE_BOTS[meeting_id]
                 
                 # Actualizar estado
-                update_meeting_status(meeting_id, "completed_auto")
+                await update_meeting_status(meeting_id, "completed_auto")
                 
                 # Si hay URL de grabación, guardarla
                 if recording_url:
-                    save_recording_url(meeting_id, recording_url)
+                    await save_recording_url(meeting_id, recording_url)
                     
-                    # Procesar grabación
-                    await process_meeting_with_mcp(
+                    # Encolar procesamiento de la grabación
+                    await enqueue_meeting_processing(
                         meeting_id=meeting_id,
                         recording_url=recording_url,
-                        host_id=MEETINGS_DB[meeting_id]["host_id"]
+                        host_id=user_id,
+                        idempotency_key=f"bot:{meeting_id}:{bot.session_id}"
                     )
         
     except Exception as e:
         logger.error(f"❌ Error con bot: {str(e)}")
         
         # Actualizar estado
-        update_meeting_status(meeting_id, "error")
-        MEETINGS_DB[meeting_id]["error"] = str(e)
+        await update_meeting_status(meeting_id, "error", error=str(e))
         
         # Notificar usuario
-        notify_user(user_id, meeting_id, f"Error: {str(e)}")
+        await notify_user(user_id, meeting_id, f"Error: {str(e)}")
         
         # Limpiar registro
         if meeting_id in ACTIVE_BOTS:
             del ACTIVE_BOTS[meeting_id]
+        await transcript_broadcaster.close(meeting_id)
 
 # ═══════════════════════════════════════════════════════════════════════════
 # ENDPOINTS PARA OAUTH Y WEBHOOKS
@@ -1383,7 +1928,7 @@ async def oauth_callback(platform: str, code: str):
     user_info = await get_user_info(platform, tokens['access_token'])
     
     # 3. Guardar en BD
-    save_user_credentials(
+    await save_user_credentials(
         user_id=user_info['id'],
         email=user_info['email'],
         platform=platform,
@@ -1492,7 +2037,7 @@ async def setup_zoom_webhook(user_id: str, access_token: str):
 # ═══════════════════════════════════════════════════════════════════════════
 
 @app.post("/webhook/zoom")
-async def zoom_webhook(request: Request, background_tasks: BackgroundTasks):
+async def zoom_webhook(request: Request):
     """
     Webhook de Zoom - Recibe eventos de reuniones
     
@@ -1509,7 +2054,7 @@ async def zoom_webhook(request: Request, background_tasks: BackgroundTasks):
     if event_type == "meeting.started":
         # Reunión comenzó
         meeting_data = payload["payload"]["object"]
-        save_meeting_started(
+        await save_meeting_started(
             meeting_id=meeting_data["id"],
             host_id=meeting_data["host_id"],
             topic=meeting_data.get("topic"),
@@ -1522,8 +2067,7 @@ async def zoom_webhook(request: Request, background_tasks: BackgroundTasks):
         meeting_id = meeting_data["id"]
         
         # Actualizar estado
-        if meeting_id in MEETINGS_DB:
-            update_meeting_status(meeting_id, "ended")
+        await update_meeting_status(meeting_id, "ended")
         
     elif event_type == "recording.completed":
         # ¡GRABACIÓN LISTA!
@@ -1532,27 +2076,34 @@ async def zoom_webhook(request: Request, background_tasks: BackgroundTasks):
         host_id = recording_data["host_id"]
         recording_files = recording_data.get("recording_files", [])
         
-        for file in recording_files:
-            if file.get("file_type") in ["MP4", "M4A"]:
-                download_url = file.get("download_url")
-                
-                logger.info(f"🎥 Grabación lista: {download_url}")
-                
-                # Guardar URL en BD
-                save_recording_url(meeting_id, download_url)
-                
-                # Procesar con MCP en background
-                background_tasks.add_task(
-                    process_meeting_with_mcp,
-                    meeting_id=meeting_id,
-                    recording_url=download_url,
-                    host_id=host_id
-                )
+        # Un solo archivo por reunión: el video si existe, si no el audio
+        files = {file.get("file_type"): file for file in recording_files}
+        file = files.get("MP4") or files.get("M4A")
+        if file:
+            download_url = file.get("download_url")
+            
+            logger.info(f"🎥 Grabación lista: {download_url}")
+            
+            # Puede llegar sin meeting.started (webhook perdido o app instalada después)
+            await ensure_meeting_saved(meeting_id, host_id, recording_data.get("topic"), "zoom")
+            
+            # Guardar URL en BD
+            await save_recording_url(meeting_id, download_url)
+            
+            # Encolar procesamiento con MCP (Zoom reintenta el webhook:
+            # la clave por reunión evita procesarla dos veces)
+            job = await enqueue_meeting_processing(
+                meeting_id=meeting_id,
+                recording_url=download_url,
+                host_id=host_id,
+                idempotency_key=f"zoom:recording.completed:{recording_data.get('uuid') or meeting_id}"
+            )
+            return {"status": "received", "job_id": job["id"]}
     
     return {"status": "received"}
 
 @app.post("/webhook/google")
-async def google_webhook(request: Request, background_tasks: BackgroundTasks):
+async def google_webhook(request: Request):
     """
     Webhook de Google Calendar - Recibe notificaciones de eventos
     
@@ -1580,22 +2131,47 @@ async def google_webhook(request: Request, background_tasks: BackgroundTasks):
 # ═══════════════════════════════════════════════════════════════════════════
 
 @app.get("/meetings/{user_id}")
-async def get_user_meetings(user_id: str):
+async def get_user_meetings(user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
     """
-    Obtener todas las reuniones procesadas de un usuario
+    Obtener las reuniones procesadas de un usuario (paginado, más recientes primero)
     
     Args:
         user_id: ID de usuario
+        limit: Reuniones por página (máx. 500)
+        cursor: `next_cursor` de la página anterior
     
     Returns:
-        Dict: Lista de reuniones
+        Dict: Página de reuniones y cursor de la siguiente (None si no hay más)
     """
-    meetings = get_meetings_from_db(user_id)
+    try:
+        meetings, next_cursor = await get_meetings_from_db(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "user_id": user_id,
         "total": len(meetings),
-        "meetings": meetings
+        "meetings": meetings,
+        "next_cursor": next_cursor
+    }
+
+@app.get("/meetings")
+async def list_meetings(status: Optional[str] = None, host_id: Optional[str] = None,
+                        limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    Listar reuniones por estado y/o host (paginado por cursor)
+    
+    Ejemplo: GET /meetings?status=processing&limit=100
+    """
+    try:
+        meetings, next_cursor = await db.list_meetings(host_id, status, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "total": len(meetings),
+        "meetings": meetings,
+        "next_cursor": next_cursor
     }
 
 @app.get("/meeting/{meeting_id}")
@@ -1609,7 +2185,7 @@ async def get_meeting_details(meeting_id: str):
     Returns:
         Dict: Detalles de la reunión
     """
-    meeting = get_meeting_from_db(meeting_id)
+    meeting = await get_meeting_from_db(meeting_id)
     
     if not meeting:
         raise HTTPException(status_code=404, detail="Reunión no encontrada")
@@ -1627,12 +2203,13 @@ async def get_recording_url(meeting_id: str):
     Returns:
         Dict: URL de grabación
     """
-    if meeting_id not in MEETINGS_DB or "recording_url" not in MEETINGS_DB[meeting_id]:
+    meeting = await db.get_meeting(meeting_id)
+    if not meeting or not meeting.get("recording_url"):
         raise HTTPException(status_code=404, detail="Grabación no encontrada")
     
     return {
         "meeting_id": meeting_id,
-        "recording_url": MEETINGS_DB[meeting_id]["recording_url"]
+        "recording_url": meeting["recording_url"]
     }
 
 @app.get("/transcript/{meeting_id}")
@@ -1647,10 +2224,11 @@ async def get_transcript(meeting_id: str):
         Dict: Transcripción
     """
     # Verificar si es una reunión procesada
-    if meeting_id in PROCESSED_MEETINGS_DB and PROCESSED_MEETINGS_DB[meeting_id].get("transcript"):
+    transcript = await db.get_transcript(meeting_id)
+    if transcript:
         return {
             "meeting_id": meeting_id,
-            "transcript": PROCESSED_MEETINGS_DB[meeting_id]["transcript"]
+            "transcript": transcript
         }
     
     # Verificar si hay un bot activo grabando
@@ -1677,72 +2255,43 @@ async def websocket_transcript(websocket: WebSocket, meeting_id: str):
     """
     WebSocket para transcripción en tiempo real
     
+    Envía primero el historial (transcript_history) y después cada segmento
+    (transcript_update) en cuanto el bot lo publica, hasta bot_stopped.
+    
     Args:
         websocket: Conexión WebSocket
         meeting_id: ID de reunión
     """
     await websocket.accept()
     
+    async def send_events(subscription):
+        async for event in subscription:
+            await websocket.send_json(event)
+    
+    async def answer_pings():
+        while True:
+            if await websocket.receive_text() == "ping":
+                await websocket.send_text("pong")
+    
     try:
-        # Verificar si hay un bot activo
-        if meeting_id in ACTIVE_BOTS and ACTIVE_BOTS[meeting_id].transcript_path:
-            # Enviar transcripción actual
-            transcript_path = ACTIVE_BOTS[meeting_id].transcript_path
-            
-            if os.path.exists(transcript_path):
-                with open(transcript_path, "r") as f:
-                    current_transcript = f.read()
-                
-                await websocket.send_json({
-                    "type": "transcript_history",
-                    "meeting_id": meeting_id,
-                    "content": current_transcript
-                })
-            
-            # Monitorear cambios en transcripción
-            last_size = os.path.getsize(transcript_path) if os.path.exists(transcript_path) else 0
-            
-            while True:
-                # Verificar si el bot sigue activo
-                if meeting_id not in ACTIVE_BOTS or not ACTIVE_BOTS[meeting_id].active:
-                    await websocket.send_json({
-                        "type": "bot_stopped",
-                        "meeting_id": meeting_id
-                    })
-                    break
-                
-                # Verificar cambios en archivo
-                if os.path.exists(transcript_path):
-                    current_size = os.path.getsize(transcript_path)
-                    
-                    if current_size > last_size:
-                        with open(transcript_path, "r") as f:
-                            f.seek(last_size)
-                            new_content = f.read()
-                        
-                        await websocket.send_json({
-                            "type": "transcript_update",
-                            "meeting_id": meeting_id,
-                            "content": new_content
-                        })
-                        
-                        last_size = current_size
-                
-                # Verificar ping del cliente
-                try:
-                    data = await asyncio.wait_for(websocket.receive_text(), timeout=0.1)
-                    if data == "ping":
-                        await websocket.send_text("pong")
-                except asyncio.TimeoutError:
-                    pass
-                
-                # Esperar antes del próximo ciclo
-                await asyncio.sleep(1)
-        else:
+        # Verificar si hay un bot activo (en este worker o, con Redis, en otro)
+        if not await transcript_broadcaster.is_live(meeting_id):
             await websocket.send_json({
                 "type": "error",
                 "message": "Bot no activo o transcripción no disponible"
             })
+            return
+        
+        async with transcript_broadcaster.subscribe(meeting_id) as subscription:
+            tasks = [
+                asyncio.create_task(send_events(subscription)),
+                asyncio.create_task(answer_pings())
+            ]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                task.result()
     
     except WebSocketDisconnect:
         logger.info(f"Cliente WebSocket desconectado: {meeting_id}")
@@ -1757,6 +2306,48 @@ async def websocket_transcript(websocket: WebSocket, meeting_id: str):
         except:
             pass
 
+# ═══════════════════════════════════════════════════════════════════════════
+# ENDPOINTS DE TRABAJOS
+# ═══════════════════════════════════════════════════════════════════════════
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50):
+    """
+    Listar trabajos de la cola (más recientes primero)
+    
+    Args:
+        status: queued, running, succeeded o failed
+        kind: Tipo de trabajo (p. ej. process_meeting)
+        limit: Máximo de trabajos (hasta 200)
+    
+    Returns:
+        Dict: Conteo por tipo y estado, y los trabajos
+    """
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Estado inválido: {status}")
+    jobs = await asyncio.to_thread(job_queue.list, status, kind, max(1, min(limit, 200)))
+    counts = await asyncio.to_thread(job_queue.counts)
+    return {
+        "counts": counts,
+        "total": len(jobs),
+        "jobs": [job.to_dict() for job in jobs]
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Estado de un trabajo: intentos, etapas completadas y último error"""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job.to_dict()
+
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """Reencolar un trabajo fallido; retoma desde la última etapa completada"""
+    if not await asyncio.to_thread(job_queue.retry, job_id):
+        raise HTTPException(status_code=409, detail="Solo se pueden reintentar trabajos fallidos")
+    return (await asyncio.to_thread(job_queue.get, job_id)).to_dict()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # INICIALIZACIÓN Y PUNTO DE ENTRADA
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1770,6 +2361,15 @@ async def startup():
     media_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "media")
     os.makedirs(media_dir, exist_ok=True)
     
+    # Crear tablas e índices si no existen
+    await db.init()
+    
+    # Modo desarrollo: procesar la cola también dentro de la API
+    global inline_worker, inline_worker_task
+    if JOB_INLINE_WORKERS > 0:
+        inline_worker = JobWorker(job_queue, JOB_HANDLERS, JOB_LIMITS, JOB_INLINE_WORKERS)
+        inline_worker_task = asyncio.create_task(inline_worker.run(), name="inline-job-worker")
+    
     print("="*80)
     print("🚀 MEETING API - Sistema de Reuniones con IA")
     print("="*80)
@@ -1790,11 +2390,17 @@ async def startup():
     print("  GET  /bot/list       - Listar bots activos")
     print()
     print("💻 Consulta de reuniones:")
-    print("  GET  /meetings/{user_id}  - Listar reuniones de usuario")
+    print("  GET  /meetings/{user_id}  - Listar reuniones de usuario (?limit=&cursor=)")
+    print("  GET  /meetings?status=    - Listar reuniones por estado")
     print("  GET  /meeting/{meeting_id} - Detalles de reunión")
     print("  GET  /recording/{meeting_id} - URL de grabación")
     print("  GET  /transcript/{meeting_id} - Transcripción")
     print()
+    print("💻 Cola de trabajos (procesados por job_worker.py):")
+    print("  GET  /jobs?status=&kind=  - Listar trabajos y conteos")
+    print("  GET  /jobs/{job_id}       - Estado de un trabajo")
+    print("  POST /jobs/{job_id}/retry - Reintentar un trabajo fallido")
+    print()
     print("💻 WebSocket:")
     print("  WS  /ws/transcript/{meeting_id} - Transcripción en tiempo real")
     print()
@@ -1802,8 +2408,22 @@ async def startup():
     print("  POST /test/mcp/summarize - Probar resumen con MCP")
     print("  POST /test/mcp/translate - Probar traducción con MCP")
     print("  POST /test/mcp/call      - Llamar cualquier herramienta MCP")
+    print("  GET  /metrics/mcp        - Latencias por herramienta MCP")
     print("="*80)
 
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Cerrar el pool de conexiones del cliente MCP, de la BD y del broadcaster
+    """
+    if inline_worker:
+        inline_worker.stop()
+        await inline_worker_task
+    await mcp_client.close()
+    await db.close()
+    await transcript_broadcaster.shutdown()
+    job_queue.close()
+
 # ═══════════════════════════════════════════════════════════════════════════
 # ENDPOINT DE PRUEBA MCP
 # ═══════════════════════════════════════════════════════════════════════════
@@ -1929,7 +2549,7 @@ async def test_mcp_call_any_tool(tool_name: str = Body(...), arguments: Dict = B
     """
     try:
         logger.info(f"🧪 Llamando herramienta MCP: {tool_name}")
-        logger.info(f"📝 Argumentos: {arguments}")
+        logger.debug(f"📝 Argumentos: {list(arguments)}")
         
         # Llamar al MCP Server con la herramienta especificada
         result = await call_mcp_tool(
@@ -1952,6 +2572,16 @@ async def test_mcp_call_any_tool(tool_name: str = Body(...), arguments: Dict = B
             detail=f"Error ejecutando '{tool_name}': {str(e)}"
         )
 
+@app.get("/metrics/mcp")
+async def get_mcp_metrics():
+    """
+    📈 Latencias por herramienta MCP (p50/p95/max de las últimas llamadas)
+    """
+    return {
+        "session_id": mcp_client.session_id,
+        "tools": mcp_client.metrics()
+    }
+
 @app.get("/")
 async def root():
     """
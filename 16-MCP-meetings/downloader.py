@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+═══════════════════════════════════════════════════════════════════════════════
+DOWNLOADER - Descargas grandes reanudables, en paralelo y con caché
+═══════════════════════════════════════════════════════════════════════════════
+
+Usado por MCP_SERVER (download_video) y MEETING_API (download_file) para
+bajar grabaciones de varios GB:
+
+- Escrituras de BUFFER_SIZE (1 MiB) en vez de chunks de 1-8 KB
+- Si el servidor acepta Range, el archivo se baja en `parts` rangos en
+  paralelo, cada uno escribiendo en su offset de un único archivo .part
+- Reanudable: el progreso de cada rango se guarda en <clave>.json; si la
+  descarga se corta, la siguiente sigue desde ahí (si ETag/tamaño no cambian)
+- sha256 del archivo final; se verifica si el llamador conoce el esperado
+- Caché por contenido: blobs/<sha256><ext>, con un índice URL → sha256, así
+  la misma grabación no se descarga dos veces (ni se guarda dos veces si
+  llega por URLs distintas)
+- GC: borra .part abandonados y expulsa blobs viejos o que excedan el
+  tamaño máximo (LRU)
+
+    downloader = Downloader("/tmp/meeting_downloads")  # o Downloader.from_env()
+    path = await downloader.fetch("https://zoom.us/rec/download/...")
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+BUFFER_SIZE = 1024 * 1024
+DEFAULT_PARTS = 4
+MIN_PART_BYTES = 16 * 1024 * 1024  # por debajo no compensa partir
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 60.0
+STALE_PART_SECONDS = 24 * 3600
+GC_INTERVAL_SECONDS = 600
+
+logger = logging.getLogger(__name__)
+
+class DownloadError(Exception):
+    """La descarga falló o el contenido no coincide con el checksum esperado"""
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(BUFFER_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_json(path: str, data: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _close_after(future: asyncio.Future, fd: int):
+    if not future.cancelled():
+        future.exception()  # ya no lo espera nadie
+    os.close(fd)
+
+class Downloader:
+    """Descargador asíncrono con rangos paralelos, reanudación y caché por contenido"""
+
+    def __init__(self, cache_dir: str, parts: int = DEFAULT_PARTS,
+                 max_cache_bytes: int = 20 * 1024 ** 3,
+                 cache_ttl_seconds: float = 7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.parts = max(1, parts)
+        self.max_cache_bytes = max_cache_bytes
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._blobs = os.path.join(cache_dir, "blobs")
+        self._urls = os.path.join(cache_dir, "urls")
+        self._tmp = os.path.join(cache_dir, "tmp")
+        for path in (self._blobs, self._urls, self._tmp):
+            os.makedirs(path, exist_ok=True)
+        self._last_gc = 0.0
+
+    @classmethod
+    def from_env(cls) -> "Downloader":
+        """
+        Configuración compartida por MCP_SERVER y MEETING_API: ambos recolectan
+        la misma carpeta, así que deben usar los mismos límites
+
+        DOWNLOAD_CACHE_DIR, DOWNLOAD_PARTS, DOWNLOAD_CACHE_MAX_GB, DOWNLOAD_CACHE_TTL_DAYS
+        """
+        return cls(
+            os.getenv("DOWNLOAD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "meeting_downloads")),
+            parts=int(os.getenv("DOWNLOAD_PARTS", str(DEFAULT_PARTS))),  # rangos HTTP en paralelo
+            max_cache_bytes=int(float(os.getenv("DOWNLOAD_CACHE_MAX_GB", "20")) * 1024 ** 3),
+            cache_ttl_seconds=float(os.getenv("DOWNLOAD_CACHE_TTL_DAYS", "7")) * 86400
+        )
+
+    # ─────────────────────────────────────
+    # API
+    # ─────────────────────────────────────
+
+    async def fetch(self, url: str, expected_sha256: Optional[str] = None) -> str:
+        """
+        Ruta local del contenido de `url`, descargándolo solo si no está en caché
+
+        Raises:
+            DownloadError: error HTTP, descarga incompleta o checksum distinto
+        """
+        await self._maybe_gc()
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        cached = self._lookup(key, expected_sha256)
+        if cached:
+            logger.info(f"♻️ Descarga en caché: {url}")
+            return cached
+
+        # Un solo descargador por URL, también entre procesos (MCP_SERVER y API)
+        lock_fd = os.open(os.path.join(self._tmp, f"{key}.lock"), os.O_RDWR | os.O_CREAT)
+        locking = asyncio.ensure_future(asyncio.to_thread(fcntl.flock, lock_fd, fcntl.LOCK_EX))
+        try:
+            await asyncio.shield(locking)
+            os.utime(lock_fd)  # que el GC no lo tome por abandonado
+            cached = self._lookup(key, expected_sha256)
+            if cached:
+                return cached
+            return await self._download(url, key, expected_sha256)
+        finally:
+            if locking.done():
+                os.close(lock_fd)
+            else:
+                # Cancelado mientras el hilo sigue en flock: cerrar cuando vuelva
+                locking.add_done_callback(lambda future: _close_after(future, lock_fd))
+
+    async def adopt(self, url: str, path: str, expected_sha256: Optional[str] = None) -> str:
+        """Guardar en la caché un archivo obtenido por otra vía (p. ej. yt-dlp)"""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return await self._store(url, key, path, {}, expected_sha256)
+
+    def temp_path(self, url: str, suffix: str = "") -> str:
+        """Ruta de trabajo dentro de la caché (la limpia el GC si se abandona)"""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self._tmp, f"{key}.external{suffix}")
+
+    # ─────────────────────────────────────
+    # DESCARGA
+    # ─────────────────────────────────────
+
+    async def _download(self, url: str, key: str, expected_sha256: Optional[str]) -> str:
+        part_path = os.path.join(self._tmp, f"{key}.part")
+        state_path = os.path.join(self._tmp, f"{key}.json")
+        started = time.perf_counter()
+        timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        limits = httpx.Limits(max_connections=self.parts)
+
+        async with httpx.AsyncClient(follow_redirects=True, timeout=timeout, limits=limits) as client:
+            info = await self._probe(client, url)
+            state = _read_json(state_path)
+            resumable = (
+                state is not None
+                and os.path.exists(part_path)
+                and info["accept_ranges"]
+                and state.get("size") == info["size"]
+                and state.get("etag") == info["etag"]
+                and state.get("last_modified") == info["last_modified"]
+            )
+            if resumable:
+                done = sum(part["done"] for part in state["parts"])
+                logger.info(f"⏯️ Reanudando descarga: {done / 1e6:.1f} MB ya descargados")
+            else:
+                state = {**info, "parts": self._plan(info)}
+                with open(part_path, "wb") as f:
+                    if info["size"]:
+                        f.truncate(info["size"])
+                _write_json(state_path, state)
+
+            fd = os.open(part_path, os.O_RDWR)
+            try:
+                await asyncio.gather(*[
+                    self._fetch_part(client, url, fd, part, state, state_path)
+                    for part in state["parts"]
+                    if part["end"] is None or part["start"] + part["done"] <= part["end"]
+                ])
+            finally:
+                os.close(fd)
+
+        size = os.path.getsize(part_path)
+        if info["size"] is not None and size != info["size"]:
+            raise DownloadError(f"Descarga incompleta: {size} de {info['size']} bytes")
+        seconds = max(time.perf_counter() - started, 1e-9)
+        logger.info(f"✅ Descargados {size / 1e6:.1f} MB en {seconds:.1f}s "
+                    f"({size / 1e6 / seconds:.1f} MB/s, {len(state['parts'])} rangos)")
+        try:
+            return await self._store(url, key, part_path, info, expected_sha256)
+        finally:
+            os.remove(state_path)
+
+    async def _probe(self, client: httpx.AsyncClient, url: str) -> Dict:
+        """Tamaño, soporte de Range y validadores, pidiendo solo el primer byte"""
+        async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as response:
+            if response.status_code >= 400:
+                raise DownloadError(f"HTTP {response.status_code} descargando {url}")
+            size = None
+            accept_ranges = response.status_code == 206
+            if accept_ranges:
+                total = response.headers.get("content-range", "").rpartition("/")[2]
+                size = int(total) if total.isdigit() else None
+            elif response.headers.get("content-length", "").isdigit():
+                size = int(response.headers["content-length"])
+            return {
+                "size": size,
+                "accept_ranges": accept_ranges and size is not None,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "content_type": response.headers.get("content-type", ""),
+            }
+
+    def _plan(self, info: Dict) -> List[Dict]:
+        size = info["size"]
+        if not info["accept_ranges"] or size < 2 * MIN_PART_BYTES:
+            return [{"start": 0, "end": size - 1 if size else None, "done": 0}]
+        count = min(self.parts, size // MIN_PART_BYTES)
+        step = -(-size // count)
+        return [
+            {"start": start, "end": min(start + step, size) - 1, "done": 0}
+            for start in range(0, size, step)
+        ]
+
+    async def _fetch_part(self, client: httpx.AsyncClient, url: str, fd: int,
+                          part: Dict, state: Dict, state_path: str):
+        offset = part["start"] + part["done"]
+        headers = {}
+        if state["accept_ranges"]:
+            headers["Range"] = f"bytes={offset}-{'' if part['end'] is None else part['end']}"
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code >= 400:
+                raise DownloadError(f"HTTP {response.status_code} descargando {url}")
+            if headers and response.status_code != 206:
+                raise DownloadError("El servidor ignoró la petición Range")
+            buffer = bytearray()
+            async for data in response.aiter_bytes(BUFFER_SIZE):
+                buffer += data
+                if len(buffer) >= BUFFER_SIZE:
+                    await self._flush(fd, buffer, part, state, state_path)
+            await self._flush(fd, buffer, part, state, state_path)
+
+    async def _flush(self, fd: int, buffer: bytearray, part: Dict, state: Dict, state_path: str):
+        if not buffer:
+            return
+        await asyncio.to_thread(os.pwrite, fd, bytes(buffer), part["start"] + part["done"])
+        part["done"] += len(buffer)
+        buffer.clear()
+        # Progreso en disco para poder reanudar
+        _write_json(state_path, state)
+
+    # ─────────────────────────────────────
+    # CACHÉ POR CONTENIDO
+    # ─────────────────────────────────────
+
+    def _lookup(self, key: str, expected_sha256: Optional[str]) -> Optional[str]:
+        entry = _read_json(os.path.join(self._urls, f"{key}.json"))
+        if not entry or not os.path.exists(entry["path"]):
+            return None
+        if expected_sha256 and entry["sha256"] != expected_sha256.lower():
+            return None
+        os.utime(entry["path"])  # LRU del GC
+        return entry["path"]
+
+    async def _store(self, url: str, key: str, path: str, info: Dict,
+                     expected_sha256: Optional[str]) -> str:
+        digest = await asyncio.to_thread(sha256_file, path)
+        if expected_sha256 and digest != expected_sha256.lower():
+            os.remove(path)
+            raise DownloadError(f"Checksum distinto: esperado {expected_sha256}, obtenido {digest}")
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        if not ext or len(ext) > 6:
+            ext = ".mp4"
+        blob_path = os.path.join(self._blobs, f"{digest}{ext}")
+        if os.path.exists(blob_path):
+            os.remove(path)
+            os.utime(blob_path)
+        else:
+            os.replace(path, blob_path)
+        _write_json(os.path.join(self._urls, f"{key}.json"), {
+            "url": url,
+            "sha256": digest,
+            "path": blob_path,
+            "size": os.path.getsize(blob_path),
+            "etag": info.get("etag"),
+            "fetched_at": time.time(),
+        })
+        return blob_path
+
+    # ─────────────────────────────────────
+    # GC
+    # ─────────────────────────────────────
+
+    async def _maybe_gc(self):
+        if time.time() - self._last_gc >= GC_INTERVAL_SECONDS:
+            self._last_gc = time.time()
+            await asyncio.to_thread(self.gc)
+
+    def gc(self) -> Dict[str, int]:
+        """Borrar descargas abandonadas y blobs caducados o que excedan el tamaño"""
+        now = time.time()
+        removed = {"partial": 0, "blobs": 0}
+        for name in os.listdir(self._tmp):
+            path = os.path.join(self._tmp, name)
+            try:
+                if now - os.path.getmtime(path) > STALE_PART_SECONDS:
+                    os.remove(path)
+                    removed["partial"] += 1
+            except OSError:
+                pass
+
+        blobs = []
+        for name in os.listdir(self._blobs):
+            path = os.path.join(self._blobs, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.cache_ttl_seconds:
+                os.remove(path)
+                removed["blobs"] += 1
+            else:
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in blobs)
+        for _, size, path in sorted(blobs):
+            if total <= self.max_cache_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed["blobs"] += 1
+
+        for name in os.listdir(self._urls):
+            entry = _read_json(os.path.join(self._urls, name))
+            if not entry or not os.path.exists(entry.get("path", "")):
+                os.remove(os.path.join(self._urls, name))
+
+        if any(removed.values()):
+            logger.info(f"🧹 GC de descargas: {removed}")
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
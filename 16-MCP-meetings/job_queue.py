@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+═══════════════════════════════════════════════════════════════════════════════
+JOB QUEUE - Cola persistente de trabajos (SQLite) y workers que la consumen
+═══════════════════════════════════════════════════════════════════════════════
+
+La API solo encola (webhooks, /bot/stop) y responde; el procesamiento pesado
+(descarga, ffmpeg, llamadas al LLM) corre en procesos aparte
+(job_worker.py), así una ráfaga de recording.completed no frena la API y
+los trabajos en curso sobreviven a un reinicio.
+
+- Idempotencia: `idempotency_key` es única; encolar dos veces el mismo
+  evento (Zoom reintenta los webhooks) devuelve el trabajo existente.
+- Lease: el worker que toma un trabajo lo renueva mientras corre; si el
+  proceso muere, al vencer el lease el trabajo vuelve a la cola.
+- Reintentos: un trabajo fallido se reprograma con backoff exponencial
+  hasta `max_attempts`; después queda en "failed" (reintento manual).
+- Checkpoints: cada etapa terminada se guarda con el trabajo; un reintento
+  retoma desde la primera etapa sin resultado.
+- Límites: como máximo `limits[kind]` trabajos de cada tipo en ejecución
+  entre todos los procesos, y `concurrency` por proceso.
+
+    queue = JobQueue("jobs.db")
+    job, created = queue.enqueue("process_meeting", {...}, idempotency_key="zoom:123")
+    await JobWorker(queue, {"process_meeting": handler}, limits={"process_meeting": 2}).run()
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30.0
+RETRY_MAX_SECONDS = 1800.0
+LEASE_SECONDS = 120.0
+POLL_SECONDS = 2.0
+SHUTDOWN_GRACE_SECONDS = 30.0
+
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    checkpoints TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS ix_jobs_kind_status ON jobs (kind, status);
+"""
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    idempotency_key: Optional[str]
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: float
+    lease_until: Optional[float]
+    worker: Optional[str]
+    checkpoints: Dict[str, Any]
+    result: Any
+    last_error: Optional[str]
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float]
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        data = dict(row)
+        data["payload"] = json.loads(data["payload"])
+        data["checkpoints"] = json.loads(data["checkpoints"])
+        data["result"] = json.loads(data["result"]) if data["result"] else None
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Para la API: las etapas completadas, sin sus resultados (pueden ser enormes)"""
+        data = asdict(self)
+        data["checkpoints"] = sorted(self.checkpoints)
+        return data
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+class JobQueue:
+    """Cola de trabajos en SQLite, segura entre hilos y entre procesos"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                     timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, sql: str, params: Tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def enqueue(self, kind: str, payload: Dict[str, Any],
+                idempotency_key: Optional[str] = None,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Tuple[Job, bool]:
+        """(trabajo, True) si se creó; (trabajo existente, False) si la clave ya estaba"""
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, kind, idempotency_key, payload, status, "
+                "max_attempts, run_after, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, idempotency_key, json.dumps(payload, ensure_ascii=False),
+                 max_attempts, now, now, now)
+            )
+            created = cursor.rowcount == 1
+            if created:
+                row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+        if created:
+            logger.info(f"📥 Trabajo encolado: {kind} {job_id} ({idempotency_key})")
+        return Job.from_row(row), created
+
+    def claim(self, worker: str, limits: Dict[str, int],
+              lease_seconds: float = LEASE_SECONDS) -> Optional[Job]:
+        """Tomar el siguiente trabajo listo de un tipo que no esté en su límite"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire_leases_locked(now)
+                running = dict(self._conn.execute(
+                    "SELECT kind, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY kind"
+                ).fetchall())
+                kinds = [kind for kind, cap in limits.items() if running.get(kind, 0) < cap]
+                row = None
+                if kinds:
+                    row = self._conn.execute(
+                        f"SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? "
+                        f"AND kind IN ({','.join('?' * len(kinds))}) "
+                        f"ORDER BY run_after LIMIT 1",
+                        (now, *kinds)
+                    ).fetchone()
+                if row:
+                    row = self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+                        "lease_until = ?, updated_at = ? WHERE id = ? RETURNING *",
+                        (worker, now + lease_seconds, now, row["id"])
+                    ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job.from_row(row) if row else None
+
+    def _expire_leases_locked(self, now: float):
+        """Trabajos de workers muertos: reintentar, o fallar si ya agotaron intentos"""
+        expired = self._conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END, "
+            "finished_at = CASE WHEN attempts >= max_attempts THEN ? END, "
+            "last_error = 'lease vencido (el worker murió o se colgó)', "
+            "worker = NULL, lease_until = NULL, run_after = ?, updated_at = ? "
+            "WHERE status = 'running' AND lease_until < ?",
+            (now, now, now, now)
+        ).rowcount
+        if expired:
+            logger.warning(f"⚠️ {expired} trabajos con lease vencido devueltos a la cola")
+
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Renovar el lease; False si el trabajo ya no es de este worker"""
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (now + lease_seconds, now, job_id, worker)
+        ) == 1
+
+    def checkpoint(self, job_id: str, stage: str, value: Any):
+        """Guardar el resultado de una etapa para no repetirla en un reintento"""
+        self._write(
+            "UPDATE jobs SET checkpoints = json_set(checkpoints, ?, json(?)), updated_at = ? "
+            "WHERE id = ?",
+            (f'$."{stage}"', json.dumps(value, ensure_ascii=False), time.time(), job_id)
+        )
+
+    def complete(self, job_id: str, worker: str, result: Any = None):
+        now = time.time()
+        self._write(
+            "UPDATE jobs SET status = 'succeeded', result = ?, last_error = NULL, worker = NULL, "
+            "lease_until = NULL, updated_at = ?, finished_at = ? WHERE id = ? AND worker = ?",
+            (json.dumps(result, ensure_ascii=False, default=str), now, now, job_id, worker)
+        )
+
+    def fail(self, job_id: str, worker: str, error: str) -> str:
+        """Reprogramar con backoff, o "failed" si no quedan intentos. Devuelve el estado"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ?", (job_id, worker)
+            ).fetchone()
+            if row is None:
+                return "lost"
+            if row["attempts"] >= row["max_attempts"]:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', last_error = ?, worker = NULL, "
+                    "lease_until = NULL, updated_at = ?, finished_at = ? WHERE id = ?",
+                    (error, now, now, job_id)
+                )
+                return "failed"
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', last_error = ?, worker = NULL, lease_until = NULL, "
+                "run_after = ?, updated_at = ? WHERE id = ?",
+                (error, now + retry_delay(row["attempts"]), now, job_id)
+            )
+            return "queued"
+
+    def release(self, job_id: str, worker: str):
+        """Devolver a la cola sin gastar un intento (el worker se está apagando)"""
+        now = time.time()
+        self._write(
+            "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, "
+            "lease_until = NULL, run_after = ?, updated_at = ? WHERE id = ? AND worker = ?",
+            (now, now, job_id, worker)
+        )
+
+    def retry(self, job_id: str) -> bool:
+        """Reencolar un trabajo fallido con todos sus intentos (conserva los checkpoints)"""
+        now = time.time()
+        return self._write(
+            "UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, updated_at = ?, "
+            "finished_at = NULL WHERE id = ? AND status = 'failed'",
+            (now, now, job_id)
+        ) == 1
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None,
+             limit: int = 50) -> List[Job]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """{kind: {status: n}}"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, status, COUNT(*) FROM jobs GROUP BY kind, status"
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Borrar trabajos terminados con éxito hace más de `older_than_seconds`"""
+        return self._write(
+            "DELETE FROM jobs WHERE status = 'succeeded' AND finished_at < ?",
+            (time.time() - older_than_seconds,)
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WORKER
+# ═══════════════════════════════════════════════════════════════════════════
+
+JobHandler = Callable[["JobContext"], Awaitable[Any]]
+
+class JobContext:
+    """Lo que recibe un handler: el trabajo y cómo guardar checkpoints"""
+
+    def __init__(self, queue: JobQueue, job: Job):
+        self.queue = queue
+        self.job = job
+        self.payload = job.payload
+        self.checkpoints = dict(job.checkpoints)
+
+    async def checkpoint(self, stage: str, value: Any):
+        self.checkpoints[stage] = value
+        await asyncio.to_thread(self.queue.checkpoint, self.job.id, stage, value)
+
+class JobWorker:
+    """
+    Consume la cola en un proceso: hasta `concurrency` trabajos a la vez
+
+    stop() deja de tomar trabajos, espera SHUTDOWN_GRACE_SECONDS a los que
+    están en curso y devuelve a la cola los que no terminaron.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, JobHandler],
+                 limits: Dict[str, int], concurrency: int = 2,
+                 name: Optional[str] = None):
+        unknown = set(limits) - set(handlers)
+        if unknown:
+            raise ValueError(f"Límites para tipos sin handler: {sorted(unknown)}")
+        self.queue = queue
+        self.handlers = handlers
+        self.limits = {kind: limits.get(kind, concurrency) for kind in handlers}
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        logger.info(f"👷 Worker {self.name}: {self.concurrency} slots, límites {self.limits}")
+        slots = asyncio.Semaphore(self.concurrency)
+        while not self._stopping.is_set():
+            await slots.acquire()
+            if self._stopping.is_set():
+                slots.release()
+                break
+            try:
+                job = await asyncio.to_thread(self.queue.claim, self.name, self.limits)
+            except sqlite3.Error as e:
+                logger.error(f"❌ Error leyendo la cola: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.create_task(self._run(job), name=f"job:{job.id}")
+            self._tasks[job.id] = task
+            task.add_done_callback(lambda _, job_id=job.id: (self._tasks.pop(job_id, None), slots.release()))
+        await self._drain()
+
+    async def _drain(self):
+        if not self._tasks:
+            return
+        logger.info(f"⏳ Esperando {len(self._tasks)} trabajos en curso")
+        _, pending = await asyncio.wait(list(self._tasks.values()), timeout=SHUTDOWN_GRACE_SECONDS)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self, job: Job):
+        logger.info(f"▶️ Trabajo {job.kind} {job.id} (intento {job.attempts}/{job.max_attempts})")
+        started = time.perf_counter()
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, asyncio.current_task(), lease_lost))
+        try:
+            result = await self.handlers[job.kind](JobContext(self.queue, job))
+        except asyncio.CancelledError:
+            if lease_lost.is_set():
+                # Ya lo tiene otro worker (o volvió a la cola): no hay nada que devolver
+                logger.warning(f"🛑 Trabajo {job.id} cancelado: perdió el lease")
+                return
+            await asyncio.to_thread(self.queue.release, job.id, self.name)
+            logger.warning(f"↩️ Trabajo {job.id} devuelto a la cola")
+            raise
+        except Exception as e:
+            status = await asyncio.to_thread(self.queue.fail, job.id, self.name, str(e))
+            logger.error(f"❌ Trabajo {job.id} falló ({status}): {e}")
+        else:
+            await asyncio.to_thread(self.queue.complete, job.id, self.name, result)
+            logger.info(f"✅ Trabajo {job.id} terminado en {time.perf_counter() - started:.1f}s")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job: Job, task: asyncio.Task, lease_lost: asyncio.Event):
+        """Renueva el lease; si se perdió, cancela `task` para no procesar el trabajo dos veces"""
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            try:
+                if not await asyncio.to_thread(self.queue.heartbeat, job.id, self.name):
+                    logger.warning(f"⚠️ Trabajo {job.id} ya no pertenece a este worker")
+                    lease_lost.set()
+                    task.cancel()
+                    return
+            except sqlite3.Error as e:
+                logger.error(f"❌ No se pudo renovar el lease de {job.id}: {e}")
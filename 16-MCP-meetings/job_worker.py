@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+═══════════════════════════════════════════════════════════════════════════════
+JOB WORKER - Pool de procesos que procesa la cola de MEETING_API
+═══════════════════════════════════════════════════════════════════════════════
+
+Cada proceso toma trabajos de la cola (job_queue.py) y ejecuta su handler
+de MEETING_API.JOB_HANDLERS, con hasta `--concurrency` trabajos a la vez.
+El supervisor reinicia los procesos que mueren; si uno muere con un
+trabajo en curso, el trabajo vuelve a la cola al vencer su lease.
+
+SIGTERM / Ctrl+C: los procesos dejan de tomar trabajos, terminan los que
+tienen en curso (o los devuelven a la cola) y salen.
+
+    uv run job_worker.py                                # JOB_WORKER_PROCESSES procesos
+    uv run job_worker.py --processes 4 --concurrency 1
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from dotenv import load_dotenv
+
+from job_queue import SHUTDOWN_GRACE_SECONDS, JobWorker
+
+load_dotenv()
+
+JOB_WORKER_PROCESSES = int(os.getenv("JOB_WORKER_PROCESSES", "2"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))  # trabajos por proceso
+RESTART_DELAY_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+async def serve(concurrency: int):
+    """Un proceso del pool: consumir la cola hasta recibir SIGTERM/SIGINT"""
+    import MEETING_API as api  # aquí y no arriba: solo en los procesos hijos
+
+    worker = JobWorker(api.job_queue, api.JOB_HANDLERS, api.JOB_LIMITS, concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await api.mcp_client.close()
+        await api.db.close()
+        api.job_queue.close()
+
+def _run_process(concurrency: int):
+    asyncio.run(serve(concurrency))
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa la cola de trabajos de MEETING_API")
+    parser.add_argument("--processes", type=int, default=JOB_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    context = multiprocessing.get_context("spawn")
+    processes: list = [None] * max(1, args.processes)
+    stopping = False
+
+    def handle_signal(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info(f"🚀 Pool de workers: {len(processes)} procesos × {args.concurrency} trabajos")
+    while not stopping:
+        for index, process in enumerate(processes):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.warning(f"⚠️ Worker {index} (pid {process.pid}) salió con código "
+                               f"{process.exitcode}; reiniciando en {RESTART_DELAY_SECONDS:.0f}s")
+                time.sleep(RESTART_DELAY_SECONDS)
+                if stopping:
+                    break
+            processes[index] = context.Process(
+                target=_run_process, args=(args.concurrency,), name=f"job-worker-{index}"
+            )
+            processes[index].start()
+        time.sleep(1)
+
+    logger.info("🛑 Deteniendo workers...")
+    for process in processes:
+        if process is not None and process.is_alive():
+            process.terminate()  # SIGTERM: parada ordenada
+    for process in processes:
+        if process is not None:
+            process.join(SHUTDOWN_GRACE_SECONDS + 10)
+            if process.is_alive():
+                process.kill()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+═══════════════════════════════════════════════════════════════════════════════
+MEETINGS DB - Repositorio SQL asíncrono para MEETING_API
+═══════════════════════════════════════════════════════════════════════════════
+
+Reemplaza los diccionarios en memoria (USERS_DB, MEETINGS_DB,
+PROCESSED_MEETINGS_DB) por SQLAlchemy async sobre DATABASE_URL:
+- sqlite:///meetings.db      → sqlite+aiosqlite (desarrollo, modo WAL)
+- postgresql://user@host/db  → postgresql+asyncpg (producción)
+
+Tablas:
+- users                 Credenciales OAuth
+- meetings              Metadatos y estado (índices por host_id y status)
+- meeting_steps         Estado/duración de cada paso del pipeline
+- meeting_results       Resumen, acciones, sentimiento (índice host_id + fecha)
+- meeting_transcripts   Transcripción, traducción y minutas (blobs grandes)
+
+Las transcripciones viven en su propia tabla, así que los listados nunca
+las leen. Los listados se paginan por cursor (keyset), no por OFFSET: el
+coste por página no crece con el número de reuniones.
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    JSON, DateTime, Float, ForeignKey, Index, String, Text, event, select, tuple_, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MODELOS
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Base(DeclarativeBase):
+    pass
+
+class User(Base):
+    __tablename__ = "users"
+
+    id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    email: Mapped[Optional[str]] = mapped_column(String(320))
+    platform: Mapped[Optional[str]] = mapped_column(String(32))
+    access_token: Mapped[Optional[str]] = mapped_column(Text)
+    refresh_token: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+class Meeting(Base):
+    __tablename__ = "meetings"
+    __table_args__ = (
+        Index("ix_meetings_host_updated", "host_id", "updated_at"),
+        Index("ix_meetings_status_updated", "status", "updated_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    host_id: Mapped[Optional[str]] = mapped_column(String(128))
+    topic: Mapped[Optional[str]] = mapped_column(String(512))
+    platform: Mapped[Optional[str]] = mapped_column(String(32))
+    meeting_url: Mapped[Optional[str]] = mapped_column(Text)
+    recording_url: Mapped[Optional[str]] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(String(32), default="pending")
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    start_time: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+class MeetingStep(Base):
+    __tablename__ = "meeting_steps"
+
+    meeting_id: Mapped[str] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
+    step: Mapped[str] = mapped_column(String(64), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16))
+    seconds: Mapped[float] = mapped_column(Float)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+class MeetingResult(Base):
+    __tablename__ = "meeting_results"
+    __table_args__ = (Index("ix_results_host_processed", "host_id", "processed_at"),)
+
+    meeting_id: Mapped[str] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
+    host_id: Mapped[Optional[str]] = mapped_column(String(128))
+    platform: Mapped[Optional[str]] = mapped_column(String(32))
+    recording_url: Mapped[Optional[str]] = mapped_column(Text)
+    summary: Mapped[Optional[str]] = mapped_column(Text)
+    actions: Mapped[Optional[str]] = mapped_column(Text)
+    sentiment: Mapped[Optional[str]] = mapped_column(Text)
+    timings: Mapped[Optional[Dict]] = mapped_column(JSON)
+    processed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+class MeetingTranscript(Base):
+    __tablename__ = "meeting_transcripts"
+
+    meeting_id: Mapped[str] = mapped_column(ForeignKey("meetings.id"), primary_key=True)
+    transcript: Mapped[Optional[str]] = mapped_column(Text)
+    translated: Mapped[Optional[str]] = mapped_column(Text)
+    minutes: Mapped[Optional[str]] = mapped_column(Text)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# UTILIDADES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL síncrona → URL con driver async"""
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+def encode_cursor(when: datetime, key: str) -> str:
+    return base64.urlsafe_b64encode(f"{when.isoformat()}|{key}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        when, key = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(when), key
+    except Exception as e:
+        raise ValueError(f"Cursor no válido: {cursor}") from e
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REPOSITORIO
+# ═══════════════════════════════════════════════════════════════════════════
+
+class MeetingRepository:
+    """
+    Acceso a usuarios, reuniones y resultados
+
+    Todos los métodos devuelven diccionarios con el mismo formato que
+    usaban los diccionarios en memoria (fechas en ISO 8601).
+    """
+
+    def __init__(self, database_url: str, echo: bool = False):
+        self.url = async_database_url(database_url)
+        self.engine = create_async_engine(self.url, echo=echo, pool_pre_ping=True)
+        if self.url.startswith("sqlite"):
+            event.listen(self.engine.sync_engine, "connect", self._sqlite_pragmas)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    def _insert(self, model):
+        """INSERT con ON CONFLICT del dialecto en uso (SQLite o PostgreSQL)"""
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        return dialect.insert(model)
+
+    @staticmethod
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL: lectores no bloquean al escritor (varios workers de uvicorn)
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+    async def init(self):
+        """Crear tablas e índices si no existen"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def close(self):
+        await self.engine.dispose()
+
+    # ── Usuarios ───────────────────────────────────────────────────────────
+
+    async def save_user(self, user_id: str, email: str, platform: str,
+                        access_token: str, refresh_token: Optional[str]):
+        async with self.sessions.begin() as session:
+            await session.merge(User(
+                id=str(user_id), email=email, platform=platform,
+                access_token=access_token, refresh_token=refresh_token,
+                created_at=datetime.now()
+            ))
+
+    async def get_user(self, user_id: str) -> Optional[Dict]:
+        async with self.sessions() as session:
+            user = await session.get(User, str(user_id))
+            if not user:
+                return None
+            return {
+                "email": user.email,
+                "platform": user.platform,
+                "access_token": user.access_token,
+                "refresh_token": user.refresh_token,
+                "created_at": _iso(user.created_at)
+            }
+
+    # ── Reuniones ──────────────────────────────────────────────────────────
+
+    async def save_meeting(self, meeting_id: str, host_id: str, topic: Optional[str],
+                           platform: Optional[str], status: str,
+                           meeting_url: Optional[str] = None):
+        """
+        Crear o actualizar una reunión
+
+        start_time solo se fija al crearla, y un campo opcional en None no
+        borra el valor guardado (p. ej. meeting_url)
+        """
+        fields = {
+            "host_id": str(host_id), "topic": topic, "platform": platform,
+            "meeting_url": meeting_url, "status": status, "updated_at": datetime.now()
+        }
+        statement = self._insert(Meeting).values(
+            id=str(meeting_id), start_time=fields["updated_at"], **fields
+        )
+        changes = {name: value for name, value in fields.items() if value is not None}
+        async with self.sessions.begin() as session:
+            await session.execute(statement.on_conflict_do_update(index_elements=[Meeting.id], set_=changes))
+
+    async def ensure_meeting(self, meeting_id: str, host_id: str, topic: Optional[str],
+                             platform: Optional[str], status: str) -> bool:
+        """Crear la reunión si no existe (no toca una existente); True si se creó"""
+        now = datetime.now()
+        statement = self._insert(Meeting).values(
+            id=str(meeting_id), host_id=str(host_id), topic=topic, platform=platform,
+            status=status, start_time=now, updated_at=now
+        )
+        async with self.sessions.begin() as session:
+            result = await session.execute(statement.on_conflict_do_nothing(index_elements=[Meeting.id]))
+            return result.rowcount > 0
+
+    async def update_meeting(self, meeting_id: str, **fields) -> bool:
+        """Actualizar columnas de una reunión; False si no existe"""
+        async with self.sessions.begin() as session:
+            result = await session.execute(
+                update(Meeting)
+                .where(Meeting.id == str(meeting_id))
+                .values(**fields, updated_at=datetime.now())
+            )
+            return result.rowcount > 0
+
+    async def get_meeting(self, meeting_id: str) -> Optional[Dict]:
+        async with self.sessions() as session:
+            meeting = await session.get(Meeting, str(meeting_id))
+            if not meeting:
+                return None
+            steps = (await session.scalars(
+                select(MeetingStep).where(MeetingStep.meeting_id == meeting.id)
+            )).all()
+            return {
+                **self._meeting_row(meeting),
+                "steps": {
+                    s.step: {"status": s.status, "seconds": s.seconds, "finished_at": _iso(s.finished_at)}
+                    for s in steps
+                }
+            }
+
+    async def list_meetings(self, host_id: Optional[str] = None, status: Optional[str] = None,
+                            limit: int = DEFAULT_PAGE_SIZE,
+                            cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Reuniones por fecha de actualización (más recientes primero)"""
+        limit = _page_size(limit)
+        query = select(Meeting)
+        if host_id:
+            query = query.where(Meeting.host_id == str(host_id))
+        if status:
+            query = query.where(Meeting.status == status)
+        if cursor:
+            when, key = decode_cursor(cursor)
+            query = query.where(tuple_(Meeting.updated_at, Meeting.id) < tuple_(when, key))
+        query = query.order_by(Meeting.updated_at.desc(), Meeting.id.desc()).limit(limit + 1)
+        async with self.sessions() as session:
+            rows = (await session.scalars(query)).all()
+        next_cursor = encode_cursor(rows[limit - 1].updated_at, rows[limit - 1].id) if len(rows) > limit else None
+        return [self._meeting_row(m) for m in rows[:limit]], next_cursor
+
+    async def save_step(self, meeting_id: str, step: str, status: str, seconds: float):
+        async with self.sessions.begin() as session:
+            await session.merge(MeetingStep(
+                meeting_id=str(meeting_id), step=step, status=status,
+                seconds=round(seconds, 2), finished_at=datetime.now()
+            ))
+
+    @staticmethod
+    def _meeting_row(meeting: Meeting) -> Dict:
+        return {
+            "meeting_id": meeting.id,
+            "host_id": meeting.host_id,
+            "topic": meeting.topic,
+            "platform": meeting.platform,
+            "meeting_url": meeting.meeting_url,
+            "recording_url": meeting.recording_url,
+            "status": meeting.status,
+            "error": meeting.error,
+            "start_time": _iso(meeting.start_time),
+            "updated_at": _iso(meeting.updated_at)
+        }
+
+    # ── Resultados ─────────────────────────────────────────────────────────
+
+    async def save_result(self, meeting_id: str, host_id: str, platform: str,
+                          recording_url: str, transcript: str, translated: str,
+                          summary: str, actions: str, sentiment: str,
+                          minutes: str = "", timings: Optional[Dict] = None):
+        meeting_id = str(meeting_id)
+        async with self.sessions.begin() as session:
+            await session.merge(MeetingResult(
+                meeting_id=meeting_id, host_id=str(host_id), platform=platform,
+                recording_url=recording_url, summary=summary, actions=actions,
+                sentiment=sentiment, timings=timings or {}, processed_at=datetime.now()
+            ))
+            await session.merge(MeetingTranscript(
+                meeting_id=meeting_id, transcript=transcript,
+                translated=translated, minutes=minutes
+            ))
+
+    async def list_results(self, host_id: str, limit: int = DEFAULT_PAGE_SIZE,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Reuniones procesadas de un usuario, sin leer las transcripciones"""
+        limit = _page_size(limit)
+        query = (
+            select(MeetingResult.meeting_id, MeetingResult.summary,
+                   MeetingResult.processed_at, Meeting.topic)
+            .outerjoin(Meeting, Meeting.id == MeetingResult.meeting_id)
+            .where(MeetingResult.host_id == str(host_id))
+        )
+        if cursor:
+            when, key = decode_cursor(cursor)
+            query = query.where(
+                tuple_(MeetingResult.processed_at, MeetingResult.meeting_id) < tuple_(when, key)
+            )
+        query = query.order_by(
+            MeetingResult.processed_at.desc(), MeetingResult.meeting_id.desc()
+        ).limit(limit + 1)
+        async with self.sessions() as session:
+            rows = (await session.execute(query)).all()
+        next_cursor = encode_cursor(rows[limit - 1].processed_at, rows[limit - 1].meeting_id) if len(rows) > limit else None
+        return [
+            {
+                "meeting_id": r.meeting_id,
+                "topic": r.topic,
+                "summary": r.summary,
+                "processed_at": _iso(r.processed_at)
+            }
+            for r in rows[:limit]
+        ], next_cursor
+
+    async def get_result(self, meeting_id: str, include_transcript: bool = True) -> Optional[Dict]:
+        async with self.sessions() as session:
+            result = await session.get(MeetingResult, str(meeting_id))
+            if not result:
+                return None
+            row = {
+                "meeting_id": result.meeting_id,
+                "host_id": result.host_id,
+                "platform": result.platform,
+                "recording_url": result.recording_url,
+                "summary": result.summary,
+                "actions": result.actions,
+                "sentiment": result.sentiment,
+                "timings": result.timings or {},
+                "processed_at": _iso(result.processed_at)
+            }
+            if include_transcript:
+                blobs = await session.get(MeetingTranscript, result.meeting_id)
+                row.update(
+                    transcript=blobs.transcript if blobs else "",
+                    translated=blobs.translated if blobs else "",
+                    minutes=blobs.minutes if blobs else ""
+                )
+            return row
+
+    async def get_transcript(self, meeting_id: str) -> Optional[str]:
+        async with self.sessions() as session:
+            return await session.scalar(
+                select(MeetingTranscript.transcript)
+                .where(MeetingTranscript.meeting_id == str(meeting_id))
+            )
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+═══════════════════════════════════════════════════════════════════════════════
+RESULT CACHE - Caché en disco de resultados de herramientas MCP
+═══════════════════════════════════════════════════════════════════════════════
+
+Clave: (herramienta, modelo, versión del prompt, sha256 de los argumentos).
+El mismo input devuelve el mismo resultado sin llamar al LLM, así que
+reprocesar una reunión (webhooks reintentados, endpoints /test/mcp/*) no
+cuesta nada. Cambiar de modelo o subir la versión de un prompt invalida
+solo las entradas de esa herramienta.
+
+Se guarda en SQLite (un archivo, seguro entre hilos) con:
+- TTL: las entradas caducan a los `ttl_seconds`
+- Tamaño máximo: al superar `max_bytes` se expulsan las menos usadas (LRU)
+Las excepciones no se guardan.
+
+    cache = ResultCache("mcp_cache.db", ttl_seconds=30 * 86400, max_bytes=512 * 2**20)
+
+    @cache.cached("summarize_meeting", model="gpt-4", prompt_version=1)
+    def summarize(transcript: str) -> str:
+        ...
+
+    cache.stats()  # {"entries": 12, "hits": {...}, "hit_rate": 0.4, ...}
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    compute_seconds REAL NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_results_accessed ON results (accessed_at);
+CREATE INDEX IF NOT EXISTS ix_results_created ON results (created_at);
+"""
+
+class ResultCache:
+    """Caché persistente de resultados JSON-serializables por contenido"""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._hits: Counter = Counter()
+        self._misses: Counter = Counter()
+        self._saved_seconds = 0.0
+        self._conn: Optional[sqlite3.Connection] = None
+        if enabled:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self.purge_expired()
+
+    @staticmethod
+    def make_key(tool: str, model: str, prompt_version: int, arguments: Dict[str, Any]) -> str:
+        payload = json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{tool}:{model}:v{prompt_version}:{digest}"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """(True, valor) si hay una entrada vigente; (False, None) si no"""
+        if not self.enabled:
+            return False, None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, compute_seconds, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            value, compute_seconds, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return False, None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._saved_seconds += compute_seconds
+        return True, json.loads(value)
+
+    def set(self, key: str, tool: str, value: Any, compute_seconds: float = 0.0):
+        if not self.enabled:
+            return
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, tool, data, size, compute_seconds, now, now)
+            )
+            self._evict_locked()
+
+    def _evict_locked(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess, doomed = total - self.max_bytes, []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY accessed_at"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        logger.info(f"🧹 Caché: {len(doomed)} entradas expulsadas por tamaño")
+
+    def purge_expired(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        return cursor.rowcount
+
+    def cached(self, tool: str, model: str, prompt_version: int) -> Callable:
+        """Decorador: cachear una función pura de sus argumentos"""
+        def decorator(fn: Callable) -> Callable:
+            signature = inspect.signature(fn)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = self.make_key(tool, model, prompt_version, dict(bound.arguments))
+                hit, value = self.get(key)
+                if hit:
+                    self._hits[tool] += 1
+                    logger.info(f"♻️ Caché: {tool} reutilizado")
+                    return value
+                self._misses[tool] += 1
+                started = time.perf_counter()
+                value = fn(*args, **kwargs)
+                self.set(key, tool, value, time.perf_counter() - started)
+                return value
+
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        hits, misses = sum(self._hits.values()), sum(self._misses.values())
+        stats = {
+            "enabled": self.enabled,
+            "path": self.path,
+            "hits": dict(self._hits),
+            "misses": dict(self._misses),
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "saved_seconds": round(self._saved_seconds, 1),
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes": self.max_bytes,
+        }
+        if self.enabled:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT tool, COUNT(*), SUM(size) FROM results GROUP BY tool"
+                ).fetchall()
+            stats["entries"] = {tool: count for tool, count, _ in rows}
+            stats["bytes"] = sum(size for _, _, size in rows)
+        return stats
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+            self.enabled = False
@@ -0,0 +1 @@
+# Tests package for MEETING_API
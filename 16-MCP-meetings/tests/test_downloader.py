@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import os
+import re
+import sys
+import time
+
+import httpx
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downloader
+from downloader import Downloader, DownloadError
+
+BODY = bytes(range(256)) * 40  # 10 KiB
+URL = "https://zoom.example/rec/download/meeting.mp4"
+
+
+class FailingStream(httpx.AsyncByteStream):
+    """Sends `limit` bytes of `data`, then drops the connection"""
+
+    def __init__(self, data, limit):
+        self.data, self.limit = data, limit
+
+    async def __aiter__(self):
+        yield self.data[:self.limit]
+        raise httpx.ReadError("connection reset")
+
+
+class Server:
+    """Serves BODY with (or without) Range support and records the requests"""
+
+    def __init__(self, body=BODY, ranges=True, status=200):
+        self.body, self.ranges, self.status = body, ranges, status
+        self.etag = '"v1"'
+        self.requests = []
+        self.fail_after = None  # bytes a ranged response sends before failing
+
+    def __call__(self, request):
+        self.requests.append(request.headers.get("range"))
+        if self.status >= 400:
+            return httpx.Response(self.status)
+        headers = {"etag": self.etag, "content-type": "video/mp4"}
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", request.headers.get("range", ""))
+        if not (self.ranges and match):
+            return httpx.Response(200, headers=headers, content=self.body)
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(self.body) - 1
+        chunk = self.body[start:end + 1]
+        headers["content-range"] = f"bytes {start}-{end}/{len(self.body)}"
+        if self.fail_after is not None and len(chunk) > self.fail_after:
+            return httpx.Response(206, headers=headers, stream=FailingStream(chunk, self.fail_after))
+        return httpx.Response(206, headers=headers, content=chunk)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = Server()
+    client_class = httpx.AsyncClient
+    monkeypatch.setattr(downloader.httpx, "AsyncClient",
+                        lambda **kwargs: client_class(transport=httpx.MockTransport(server), **kwargs))
+    # Small sizes so a 10 KiB body is split in 4 ranges and flushed several times
+    monkeypatch.setattr(downloader, "MIN_PART_BYTES", 1024)
+    monkeypatch.setattr(downloader, "BUFFER_SIZE", 512)
+    return server
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_ranged_download_is_split_into_parts(tmp_path, server):
+    path = asyncio.run(Downloader(str(tmp_path), parts=4).fetch(URL))
+
+    assert _read(path) == BODY
+    assert os.path.basename(path) == hashlib.sha256(BODY).hexdigest() + ".mp4"
+    assert server.requests[0] == "bytes=0-0"  # probe
+    assert sorted(server.requests[1:]) == ["bytes=0-2559", "bytes=2560-5119", "bytes=5120-7679", "bytes=7680-10239"]
+    assert os.listdir(tmp_path / "tmp") == [f"{hashlib.sha256(URL.encode()).hexdigest()}.lock"]
+
+
+def test_server_without_ranges_gets_a_single_request(tmp_path, server):
+    server.ranges = False
+    path = asyncio.run(Downloader(str(tmp_path), parts=4).fetch(URL))
+
+    assert _read(path) == BODY
+    assert server.requests == ["bytes=0-0", None]
+
+
+def test_cached_content_is_not_downloaded_again(tmp_path, server):
+    cache = Downloader(str(tmp_path), parts=4)
+    first = asyncio.run(cache.fetch(URL))
+    requests = len(server.requests)
+
+    assert asyncio.run(cache.fetch(URL)) == first
+    assert len(server.requests) == requests
+    # Same bytes behind another URL: downloaded, but stored once
+    assert asyncio.run(cache.fetch(URL + "?token=2")) == first
+    assert os.listdir(tmp_path / "blobs") == [os.path.basename(first)]
+
+
+def test_checksum_is_verified(tmp_path, server):
+    cache = Downloader(str(tmp_path), parts=4)
+    with pytest.raises(DownloadError):
+        asyncio.run(cache.fetch(URL, expected_sha256="0" * 64))
+    assert os.listdir(tmp_path / "blobs") == []
+
+    path = asyncio.run(cache.fetch(URL, expected_sha256=hashlib.sha256(BODY).hexdigest().upper()))
+    assert _read(path) == BODY
+
+
+def test_interrupted_download_resumes_where_it_stopped(tmp_path, server):
+    cache = Downloader(str(tmp_path), parts=4)
+    server.fail_after = 1024  # every range drops after two 512-byte flushes
+    with pytest.raises(httpx.ReadError):
+        asyncio.run(cache.fetch(URL))
+
+    server.fail_after = None
+    server.requests.clear()
+    path = asyncio.run(cache.fetch(URL))
+
+    assert _read(path) == BODY
+    assert sorted(server.requests[1:]) == ["bytes=1024-2559", "bytes=3584-5119", "bytes=6144-7679", "bytes=8704-10239"]
+
+
+def test_changed_file_restarts_the_download(tmp_path, server):
+    cache = Downloader(str(tmp_path), parts=4)
+    server.fail_after = 1024
+    with pytest.raises(httpx.ReadError):
+        asyncio.run(cache.fetch(URL))
+
+    # Same size, new content and ETag: the saved progress no longer applies
+    server.body, server.etag, server.fail_after = BODY[::-1], '"v2"', None
+    server.requests.clear()
+    path = asyncio.run(cache.fetch(URL))
+
+    assert _read(path) == BODY[::-1]
+    assert "bytes=0-2559" in server.requests
+
+
+def test_http_errors_raise_download_error(tmp_path, server):
+    server.status = 404
+    with pytest.raises(DownloadError):
+        asyncio.run(Downloader(str(tmp_path)).fetch(URL))
+
+
+def test_gc_removes_stale_parts_and_least_recently_used_blobs(tmp_path):
+    cache = Downloader(str(tmp_path), max_cache_bytes=150)
+    old = time.time() - 3600
+    for name, age in (("a.mp4", 10), ("b.mp4", 20), ("c.mp4", 30)):
+        path = tmp_path / "blobs" / name
+        path.write_bytes(b"x" * 60)
+        os.utime(path, (old + age, old + age))
+    stale = tmp_path / "tmp" / "abandoned.part"
+    stale.write_bytes(b"x")
+    os.utime(stale, (0, 0))
+
+    assert cache.gc() == {"partial": 1, "blobs": 1}
+    assert sorted(os.listdir(tmp_path / "blobs")) == ["b.mp4", "c.mp4"]
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to count open descriptors")
+def test_lock_fd_outlives_a_cancelled_wait(tmp_path, server):
+    store = Downloader(str(tmp_path))
+    key = hashlib.sha256(URL.encode("utf-8")).hexdigest()
+    holder = os.open(os.path.join(store._tmp, f"{key}.lock"), os.O_RDWR | os.O_CREAT)
+    downloader.fcntl.flock(holder, downloader.fcntl.LOCK_EX)  # another process is downloading
+    open_fds = lambda: len(os.listdir("/proc/self/fd"))
+
+    async def run():
+        baseline = open_fds()
+        task = asyncio.create_task(store.fetch(URL))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        try:
+            # The thread is still blocked in flock on that descriptor: it must stay open
+            assert open_fds() == baseline + 1
+        finally:
+            os.close(holder)
+        for _ in range(100):
+            if open_fds() == baseline - 1:
+                break
+            await asyncio.sleep(0.01)
+        assert open_fds() == baseline - 1
+
+    asyncio.run(run())
+    assert server.requests == []
+
+
+def test_from_env_reads_the_shared_cache_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("DOWNLOAD_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("DOWNLOAD_PARTS", "8")
+    monkeypatch.setenv("DOWNLOAD_CACHE_MAX_GB", "0.5")
+    monkeypatch.setenv("DOWNLOAD_CACHE_TTL_DAYS", "2")
+
+    store = Downloader.from_env()
+
+    assert (store.cache_dir, store.parts) == (str(tmp_path), 8)
+    assert (store.max_cache_bytes, store.cache_ttl_seconds) == (512 * 1024 ** 2, 2 * 86400)
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import job_queue
+from job_queue import JobQueue, JobWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    yield queue
+    queue.close()
+
+
+def test_duplicate_idempotency_key_returns_existing_job(queue):
+    job, created = queue.enqueue("process_meeting", {"meeting_id": "1"}, idempotency_key="zoom:1")
+    again, created_again = queue.enqueue("process_meeting", {"meeting_id": "other"}, idempotency_key="zoom:1")
+
+    assert created and not created_again
+    assert again.id == job.id and again.payload == {"meeting_id": "1"}
+    assert queue.counts() == {"process_meeting": {"queued": 1}}
+
+
+def test_claim_respects_the_kind_limit(queue):
+    for i in range(3):
+        queue.enqueue("process_meeting", {"n": i})
+    queue.enqueue("cleanup", {})
+    limits = {"process_meeting": 2, "cleanup": 1}
+
+    first = queue.claim("w1", limits)
+    second = queue.claim("w2", limits)
+    third = queue.claim("w1", limits)
+    assert {first.kind, second.kind, third.kind} == {"process_meeting", "cleanup"}
+    assert queue.claim("w2", limits) is None  # two meetings running: the third waits
+
+    meeting = next(job for job in (first, second, third) if job.kind == "process_meeting")
+    queue.complete(meeting.id, meeting.worker)
+    assert queue.claim("w2", limits).kind == "process_meeting"
+
+
+def test_expired_lease_requeues_the_job(queue):
+    job, _ = queue.enqueue("process_meeting", {})
+    queue.claim("dead-worker", {"process_meeting": 1}, lease_seconds=-1)
+
+    retaken = queue.claim("w2", {"process_meeting": 1})
+
+    assert retaken.id == job.id
+    assert retaken.worker == "w2" and retaken.attempts == 2
+    assert "lease" in retaken.last_error
+    assert not queue.heartbeat(job.id, "dead-worker")
+
+
+def test_expired_lease_fails_the_job_without_attempts_left(queue):
+    job, _ = queue.enqueue("process_meeting", {}, max_attempts=1)
+    queue.claim("dead-worker", {"process_meeting": 1}, lease_seconds=-1)
+
+    assert queue.claim("w2", {"process_meeting": 1}) is None
+    assert queue.get(job.id).status == "failed"
+
+
+def test_fail_marks_the_job_failed_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "RETRY_BASE_SECONDS", 0)
+    job, _ = queue.enqueue("process_meeting", {}, max_attempts=2)
+    limits = {"process_meeting": 1}
+
+    queue.claim("w1", limits)
+    assert queue.fail(job.id, "w1", "timeout") == "queued"
+    queue.claim("w1", limits)
+    assert queue.fail(job.id, "w1", "timeout again") == "failed"
+
+    failed = queue.get(job.id)
+    assert (failed.status, failed.attempts, failed.last_error) == ("failed", 2, "timeout again")
+    assert failed.finished_at is not None and failed.worker is None
+    assert queue.claim("w1", limits) is None
+    assert queue.retry(job.id) and queue.claim("w1", limits).id == job.id
+
+
+def test_fail_backs_off_before_the_next_attempt(queue):
+    job, _ = queue.enqueue("process_meeting", {})
+    queue.claim("w1", {"process_meeting": 1})
+
+    assert queue.fail(job.id, "w1", "boom") == "queued"
+    assert queue.get(job.id).run_after >= time.time() + job_queue.RETRY_BASE_SECONDS - 1
+    assert queue.claim("w1", {"process_meeting": 1}) is None
+
+
+def test_checkpoints_survive_a_retry(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "RETRY_BASE_SECONDS", 0)
+    job, _ = queue.enqueue("process_meeting", {})
+    queue.claim("w1", {"process_meeting": 1})
+    queue.checkpoint(job.id, "transcribe", "hola")
+    queue.fail(job.id, "w1", "summarize failed")
+
+    assert queue.claim("w1", {"process_meeting": 1}).checkpoints == {"transcribe": "hola"}
+
+
+def test_cancelled_job_is_released_without_spending_an_attempt(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "SHUTDOWN_GRACE_SECONDS", 0.1)
+    job, _ = queue.enqueue("process_meeting", {})
+    started = asyncio.Event()
+
+    async def handler(ctx):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def run():
+        worker = JobWorker(queue, {"process_meeting": handler}, {"process_meeting": 1}, name="w1")
+        task = asyncio.create_task(worker.run())
+        await asyncio.wait_for(started.wait(), 5)
+        assert queue.get(job.id).status == "running"
+        worker.stop()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(run())
+
+    released = queue.get(job.id)
+    assert (released.status, released.attempts, released.worker, released.lease_until) == ("queued", 0, None, None)
+
+
+def test_job_is_cancelled_when_its_lease_is_lost(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "LEASE_SECONDS", 0.3)
+    job, _ = queue.enqueue("process_meeting", {})
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def handler(ctx):
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        worker = JobWorker(queue, {"process_meeting": handler}, {"process_meeting": 1}, name="w1")
+        task = asyncio.create_task(worker.run())
+        await asyncio.wait_for(started.wait(), 5)
+        # The lease expired (w1 looked dead) and another worker took the job
+        queue._write("UPDATE jobs SET lease_until = 0 WHERE id = ?", (job.id,))
+        assert queue.claim("w2", {"process_meeting": 1}).id == job.id
+        await asyncio.wait_for(cancelled.wait(), 5)
+        worker.stop()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(run())
+
+    taken = queue.get(job.id)
+    assert (taken.status, taken.worker, taken.attempts) == ("running", "w2", 2)
+
+
+def test_worker_completes_jobs_and_records_failures(queue):
+    ok, _ = queue.enqueue("process_meeting", {"meeting_id": "ok"})
+    bad, _ = queue.enqueue("process_meeting", {"meeting_id": "bad"})
+
+    async def handler(ctx):
+        if ctx.payload["meeting_id"] == "bad":
+            raise RuntimeError("sin grabación")
+        await ctx.checkpoint("transcribe", "texto")
+        return {"status": "completed"}
+
+    async def run():
+        worker = JobWorker(queue, {"process_meeting": handler}, {"process_meeting": 2}, name="w1")
+        task = asyncio.create_task(worker.run())
+        while queue.get(ok.id).status != "succeeded" or queue.get(bad.id).last_error is None:
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(run())
+
+    done = queue.get(ok.id)
+    assert done.result == {"status": "completed"} and done.checkpoints == {"transcribe": "texto"}
+    assert queue.get(bad.id).last_error == "sin grabación"
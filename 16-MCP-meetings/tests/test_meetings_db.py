@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meetings_db import MeetingRepository
+
+
+@pytest.fixture
+def run(tmp_path):
+    """Runs a coroutine against a fresh SQLite repository"""
+    def run(scenario):
+        async def main():
+            db = MeetingRepository(f"sqlite:///{tmp_path / 'meetings.db'}")
+            await db.init()
+            try:
+                return await scenario(db)
+            finally:
+                await db.close()
+        return asyncio.run(main())
+    return run
+
+
+def test_save_meeting_keeps_start_time_and_unset_fields(run):
+    async def scenario(db):
+        await db.save_meeting("m1", "u1", "Kickoff", "zoom", "scheduled", meeting_url="https://zoom.us/j/1")
+        created = await db.get_meeting("m1")
+        await db.save_meeting("m1", "u1", None, None, "ended")
+        return created, await db.get_meeting("m1")
+
+    created, updated = run(scenario)
+
+    assert updated["status"] == "ended"
+    assert (updated["topic"], updated["platform"]) == ("Kickoff", "zoom")
+    assert updated["meeting_url"] == "https://zoom.us/j/1"
+    assert updated["start_time"] == created["start_time"]
+
+
+def test_ensure_meeting_never_overwrites_an_existing_row(run):
+    async def scenario(db):
+        created = await db.ensure_meeting("m1", "u1", "Kickoff", "zoom", "recording")
+        again = await db.ensure_meeting("m1", "u2", "Other", "meet", "ended")
+        return created, again, await db.get_meeting("m1")
+
+    created, again, meeting = run(scenario)
+
+    assert (created, again) == (True, False)
+    assert (meeting["host_id"], meeting["topic"], meeting["status"]) == ("u1", "Kickoff", "recording")
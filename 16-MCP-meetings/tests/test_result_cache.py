@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import ResultCache
+
+
+def _cache(tmp_path, **options):
+    options = {"ttl_seconds": 3600, "max_bytes": 1024 * 1024, **options}
+    return ResultCache(str(tmp_path / "cache.db"), **options)
+
+
+def _counting(cache, calls, model="gpt-4", prompt_version=1):
+    @cache.cached("summarize_meeting", model=model, prompt_version=prompt_version)
+    def summarize(transcript, language="es"):
+        calls.append(transcript)
+        return {"summary": transcript.upper(), "language": language}
+    return summarize
+
+
+def test_same_arguments_reuse_the_result(tmp_path):
+    cache, calls = _cache(tmp_path), []
+    summarize = _counting(cache, calls)
+
+    first = summarize("hola")
+    assert summarize("hola") == first
+    assert summarize(transcript="hola", language="es") == first  # defaults are part of the key
+    assert summarize("adiós") != first
+    assert calls == ["hola", "adiós"]
+
+    stats = cache.stats()
+    assert stats["hits"] == {"summarize_meeting": 2} and stats["misses"] == {"summarize_meeting": 2}
+    assert stats["entries"] == {"summarize_meeting": 2}
+
+
+def test_model_or_prompt_version_change_misses(tmp_path):
+    cache, calls = _cache(tmp_path), []
+    _counting(cache, calls)("hola")
+    _counting(cache, calls, model="gpt-4o")("hola")
+    _counting(cache, calls, prompt_version=2)("hola")
+
+    assert calls == ["hola"] * 3
+
+
+def test_results_persist_across_instances(tmp_path):
+    calls = []
+    cache = _cache(tmp_path)
+    _counting(cache, calls)("hola")
+    cache.close()
+
+    _counting(_cache(tmp_path), calls)("hola")
+    assert calls == ["hola"]
+
+
+def test_exceptions_are_not_cached(tmp_path):
+    cache, calls = _cache(tmp_path), []
+
+    @cache.cached("analyze_sentiment", model="gpt-4", prompt_version=1)
+    def analyze(transcript):
+        calls.append(transcript)
+        raise RuntimeError("rate limit")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            analyze("hola")
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == {}
+
+
+def test_expired_entries_are_recomputed(tmp_path):
+    cache, calls = _cache(tmp_path, ttl_seconds=0.05), []
+    summarize = _counting(cache, calls)
+
+    summarize("hola")
+    time.sleep(0.1)
+    summarize("hola")
+    assert calls == ["hola", "hola"]
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_limit(tmp_path):
+    cache = _cache(tmp_path, max_bytes=250)
+    value = "x" * 100  # ~102 bytes serialized: two entries fit
+    cache.set("a", "tool", value)
+    time.sleep(0.01)
+    cache.set("b", "tool", value)
+    time.sleep(0.01)
+    assert cache.get("a")[0]  # "a" is now more recent than "b"
+    time.sleep(0.01)
+    cache.set("c", "tool", value)
+
+    assert [cache.get(key)[0] for key in "abc"] == [True, False, True]
+
+
+def test_values_larger_than_the_cache_are_not_stored(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10)
+    cache.set("big", "tool", "x" * 100)
+
+    assert cache.get("big") == (False, None)
+
+
+def test_disabled_cache_always_calls_through(tmp_path):
+    cache, calls = _cache(tmp_path, enabled=False), []
+    summarize = _counting(cache, calls)
+    summarize("hola")
+    summarize("hola")
+
+    assert calls == ["hola", "hola"]
+    assert not os.path.exists(tmp_path / "cache.db")
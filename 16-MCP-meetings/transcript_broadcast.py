@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+═══════════════════════════════════════════════════════════════════════════════
+TRANSCRIPT BROADCAST - Pub/sub de la transcripción en tiempo real
+═══════════════════════════════════════════════════════════════════════════════
+
+BotRecorder publica cada segmento de transcripción una sola vez y cada
+WebSocket de /ws/transcript/{meeting_id} lo recibe desde su propia cola, sin
+tocar el archivo de transcripción.
+
+- Replay: cada reunión guarda sus últimos `replay_size` segmentos; quien se
+  conecta tarde recibe primero el historial (transcript_history).
+- Backpressure: publicar nunca espera a los clientes. Si la cola de un
+  cliente lento se llena, se descarta y ese cliente recibe de nuevo el
+  historial completo (transcript_history con resync=True) antes de seguir.
+- Backends:
+    TranscriptBroadcaster       En memoria (un solo worker de uvicorn)
+    RedisTranscriptBroadcaster  Redis Streams (varios workers): un stream por
+                                reunión, y en cada worker una única lectura
+                                (XREAD) que reparte a sus WebSockets locales
+
+    broadcaster = create_broadcaster(os.getenv("REDIS_URL"))
+    await broadcaster.open(meeting_id)
+    await broadcaster.publish(meeting_id, "[00:00:30] Hola a todos\\n\\n")
+    async with broadcaster.subscribe(meeting_id) as subscription:
+        async for event in subscription:
+            await websocket.send_json(event)
+    await broadcaster.close(meeting_id)
+"""
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+REPLAY_SIZE = 2000  # segmentos por reunión (~16 h con segmentos de 30 s)
+SUBSCRIBER_QUEUE_SIZE = 64  # eventos pendientes por cliente antes de resincronizar
+STREAM_PREFIX = "transcript:"
+STREAM_RETENTION_SECONDS = 3600  # el stream de una reunión terminada caduca
+READ_BLOCK_MS = 5000
+READ_RETRY_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+_RESYNC = object()  # marca en la cola: el cliente se quedó atrás
+
+class _Channel:
+    """Estado local de una reunión: historial y suscriptores de este worker"""
+
+    def __init__(self, meeting_id: str, replay_size: int):
+        self.meeting_id = meeting_id
+        self.replay: deque = deque(maxlen=replay_size)
+        self.subscribers: Set["Subscription"] = set()
+        self.closed = False
+        self.seq = 0
+
+class Subscription:
+    """
+    Eventos de una reunión para un cliente, empezando por el historial
+
+    Se itera con `async for`; termina después de entregar bot_stopped.
+    """
+
+    def __init__(self, channel: _Channel, queue_size: int):
+        self.meeting_id = channel.meeting_id
+        self.dropped = 0  # eventos descartados por ir lento
+        self._channel = channel
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size + 2)
+        self._queue_size = queue_size
+        self._resyncing = False
+        self._finished = False
+        self._queue.put_nowait(self._history(resync=False))
+        if channel.closed:
+            self._queue.put_nowait(self._stopped())
+
+    def _history(self, resync: bool) -> Dict:
+        replay = list(self._channel.replay)
+        return {
+            "type": "transcript_history",
+            "meeting_id": self.meeting_id,
+            "content": "".join(event["content"] for event in replay),
+            "seq": replay[-1]["seq"] if replay else None,
+            "resync": resync
+        }
+
+    def _stopped(self) -> Dict:
+        return {"type": "bot_stopped", "meeting_id": self.meeting_id}
+
+    def offer(self, event: Dict):
+        """Encolar sin esperar nunca; si el cliente va lento, resincronizar"""
+        if self._resyncing:
+            # El historial que recibirá ya incluye este segmento
+            return
+        if self._queue.qsize() < self._queue_size:
+            self._queue.put_nowait(event)
+            return
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._resyncing = True
+        self._queue.put_nowait(_RESYNC)
+        logger.warning(f"⚠️ Cliente lento en {self.meeting_id}: "
+                       f"{self.dropped} eventos descartados, reenviando historial")
+
+    def __aiter__(self) -> AsyncIterator[Dict]:
+        return self
+
+    async def __anext__(self) -> Dict:
+        if self._finished:
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if event is _RESYNC:
+            self._resyncing = False
+            event = self._history(resync=True)
+            if self._channel.closed:
+                self._queue.put_nowait(self._stopped())
+        elif event["type"] == "bot_stopped":
+            self._finished = True
+        return event
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BACKEND EN MEMORIA
+# ═══════════════════════════════════════════════════════════════════════════
+
+class TranscriptBroadcaster:
+    """
+    Pub/sub en memoria: válido con un solo proceso de la API
+
+    El canal de una reunión existe desde open() hasta close(); close()
+    entrega bot_stopped a los suscriptores y libera el historial.
+    """
+
+    def __init__(self, replay_size: int = REPLAY_SIZE,
+                 queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self._channels: Dict[str, _Channel] = {}
+
+    async def open(self, meeting_id: str):
+        if meeting_id not in self._channels:
+            self._channels[meeting_id] = _Channel(meeting_id, self.replay_size)
+
+    async def is_live(self, meeting_id: str) -> bool:
+        channel = self._channels.get(meeting_id)
+        return channel is not None and not channel.closed
+
+    async def publish(self, meeting_id: str, content: str):
+        await self.open(meeting_id)
+        channel = self._channels[meeting_id]
+        channel.seq += 1
+        self._deliver(channel, {
+            "type": "transcript_update",
+            "meeting_id": meeting_id,
+            "seq": channel.seq,
+            "content": content
+        })
+
+    async def close(self, meeting_id: str):
+        channel = self._channels.pop(meeting_id, None)
+        if channel and not channel.closed:
+            self._deliver(channel, {"type": "bot_stopped", "meeting_id": meeting_id})
+
+    @asynccontextmanager
+    async def subscribe(self, meeting_id: str) -> AsyncIterator[Subscription]:
+        channel = await self._attach(meeting_id)
+        subscription = Subscription(channel, self.queue_size)
+        channel.subscribers.add(subscription)
+        try:
+            yield subscription
+        finally:
+            channel.subscribers.discard(subscription)
+            await self._detach(channel)
+
+    def subscriber_count(self, meeting_id: str) -> int:
+        channel = self._channels.get(meeting_id)
+        return len(channel.subscribers) if channel else 0
+
+    async def shutdown(self):
+        for meeting_id in list(self._channels):
+            await self.close(meeting_id)
+
+    def _deliver(self, channel: _Channel, event: Dict):
+        if event["type"] == "transcript_update":
+            channel.replay.append(event)
+        elif event["type"] == "bot_stopped":
+            channel.closed = True
+        else:
+            return
+        for subscription in list(channel.subscribers):
+            subscription.offer(event)
+
+    async def _attach(self, meeting_id: str) -> _Channel:
+        channel = self._channels.get(meeting_id)
+        if channel is None:
+            raise LookupError(f"Reunión sin transcripción en vivo: {meeting_id}")
+        return channel
+
+    async def _detach(self, channel: _Channel):
+        pass
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BACKEND REDIS (VARIOS WORKERS)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class RedisTranscriptBroadcaster(TranscriptBroadcaster):
+    """
+    Pub/sub sobre Redis Streams para desplegar la API con varios workers
+
+    publish() hace XADD (acotado a `replay_size`) desde el worker que tiene
+    el bot. En cada worker, la primera suscripción a una reunión carga el
+    historial (XRANGE) y arranca una única tarea XREAD que reparte a todos
+    los WebSockets locales; se cancela cuando se va el último.
+    """
+
+    def __init__(self, url: str, replay_size: int = REPLAY_SIZE,
+                 queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(replay_size, queue_size)
+        import redis.asyncio as redis  # dependencia opcional: solo con REDIS_URL
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._readers: Dict[str, asyncio.Task] = {}
+        self._attach_lock = asyncio.Lock()
+
+    def _key(self, meeting_id: str) -> str:
+        return f"{STREAM_PREFIX}{meeting_id}"
+
+    async def open(self, meeting_id: str):
+        key = self._key(meeting_id)
+        await self._redis.xadd(key, {"type": "bot_started"}, maxlen=self.replay_size, approximate=True)
+        await self._redis.persist(key)
+
+    async def is_live(self, meeting_id: str) -> bool:
+        last = await self._redis.xrevrange(self._key(meeting_id), count=1)
+        return bool(last) and last[0][1].get("type") != "bot_stopped"
+
+    async def publish(self, meeting_id: str, content: str):
+        await self._redis.xadd(
+            self._key(meeting_id),
+            {"type": "transcript_update", "content": content},
+            maxlen=self.replay_size, approximate=True
+        )
+
+    async def close(self, meeting_id: str):
+        key = self._key(meeting_id)
+        await self._redis.xadd(key, {"type": "bot_stopped"}, maxlen=self.replay_size, approximate=True)
+        await self._redis.expire(key, STREAM_RETENTION_SECONDS)
+
+    async def shutdown(self):
+        for task in self._readers.values():
+            task.cancel()
+        await asyncio.gather(*self._readers.values(), return_exceptions=True)
+        self._readers.clear()
+        self._channels.clear()
+        await self._redis.aclose()
+
+    def _event(self, meeting_id: str, entry_id: str, fields: Dict) -> Dict:
+        event = {"type": fields.get("type"), "meeting_id": meeting_id}
+        if event["type"] == "transcript_update":
+            event["seq"] = entry_id
+            event["content"] = fields.get("content", "")
+        return event
+
+    async def _attach(self, meeting_id: str) -> _Channel:
+        async with self._attach_lock:
+            channel = self._channels.get(meeting_id)
+            if channel is not None:
+                return channel
+            channel = _Channel(meeting_id, self.replay_size)
+            last_id = "0-0"
+            for entry_id, fields in await self._redis.xrange(self._key(meeting_id)):
+                self._deliver(channel, self._event(meeting_id, entry_id, fields))
+                last_id = entry_id
+            self._channels[meeting_id] = channel
+            if not channel.closed:
+                self._readers[meeting_id] = asyncio.create_task(
+                    self._read(channel, last_id), name=f"transcript:{meeting_id}"
+                )
+            return channel
+
+    async def _detach(self, channel: _Channel):
+        if channel.subscribers or self._channels.get(channel.meeting_id) is not channel:
+            return
+        del self._channels[channel.meeting_id]
+        reader = self._readers.pop(channel.meeting_id, None)
+        if reader:
+            reader.cancel()
+
+    async def _read(self, channel: _Channel, last_id: str):
+        """Única lectura del stream por worker y reunión"""
+        key = self._key(channel.meeting_id)
+        while not channel.closed:
+            try:
+                response = await self._redis.xread({key: last_id}, block=READ_BLOCK_MS, count=100)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Error leyendo {key} de Redis: {str(e)}")
+                await asyncio.sleep(READ_RETRY_SECONDS)
+                continue
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    self._deliver(channel, self._event(channel.meeting_id, entry_id, fields))
+                    last_id = entry_id
+
+def create_broadcaster(redis_url: Optional[str] = None) -> TranscriptBroadcaster:
+    """Backend Redis si hay URL configurada, en memoria si no"""
+    if redis_url:
+        logger.info("📡 Transcripción en vivo distribuida vía Redis Streams")
+        return RedisTranscriptBroadcaster(redis_url)
+    return TranscriptBroadcaster()
@@ -1,9 +1,16 @@
+import asyncio
+import random
+from collections.abc import AsyncIterator
+
 from google import genai
+from google.genai import errors as genai_errors
 from llama_index.readers.file import PDFReader
 from llama_index.core.node_parser import SentenceSplitter
 from dotenv import load_dotenv
 import os
 
+from embedding_cache import get_default_cache
+
 load_dotenv()
 
 # Initialize Google GenAI client for embeddings
@@ -12,6 +19,11 @@ client = genai.Client()
 EMBED_MODEL = "text-embedding-004"
 EMBED_DIM = 768  # Gemini text-embedding-004 dimension
 
+# Async ingest pipeline tuning
+EMBED_BATCH_SIZE = 100  # texts per embed_content request (API maximum)
+EMBED_CONCURRENCY = 4  # batch requests in flight at once
+EMBED_MAX_RETRIES = 6
+
 splitter = SentenceSplitter(chunk_size=1000, chunk_overlap=200)
 
 def load_and_chunk_pdf(path: str):
@@ -23,8 +35,7 @@ def load_and_chunk_pdf(path: str):
     return chunks
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings using Google Gemini text-embedding-004"""
+def _fetch_embeddings(texts: list[str]) -> list[list[float]]:
     embeddings = []
     for text in texts:
         response = client.models.embed_content(
@@ -33,3 +44,102 @@ def embed_texts(texts: list[str]) -> list[list[float]]:
         )
         embeddings.append(response.embeddings[0].values)
     return embeddings
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Generate embeddings using Google Gemini text-embedding-004.
+    Only texts missing from the on-disk embedding cache are sent to the API."""
+    return get_default_cache().embed(EMBED_MODEL, texts, _fetch_embeddings)
+
+
+class _AdaptiveBackoff:
+    """Delay shared by all in-flight batches: doubles on every 429 and
+    decays on success, so the whole window slows down together instead of
+    each request hammering the quota independently."""
+
+    def __init__(self, base: float = 1.0, cap: float = 60.0):
+        self.base = base
+        self.cap = cap
+        self.delay = 0.0
+
+    def on_rate_limited(self) -> float:
+        self.delay = min(self.cap, max(self.base, self.delay * 2))
+        return self.delay * (0.5 + random.random() / 2)  # jitter
+
+    def on_success(self) -> None:
+        self.delay = self.delay / 2 if self.delay > self.base else 0.0
+
+
+async def _embed_batch(
+    batch: list[str], sem: asyncio.Semaphore, backoff: _AdaptiveBackoff
+) -> list[list[float]]:
+    cache = get_default_cache()
+    vecs = cache.get_many(EMBED_MODEL, batch)
+    missing = list(dict.fromkeys(t for t, v in zip(batch, vecs) if v is None))
+    if not missing:
+        return vecs
+
+    for attempt in range(EMBED_MAX_RETRIES):
+        async with sem:
+            if backoff.delay:
+                await asyncio.sleep(backoff.delay)
+            try:
+                response = await client.aio.models.embed_content(
+                    model=EMBED_MODEL, contents=missing
+                )
+            except genai_errors.APIError as e:
+                if e.code != 429 or attempt == EMBED_MAX_RETRIES - 1:
+                    raise
+                wait = backoff.on_rate_limited()
+            else:
+                backoff.on_success()
+                break
+        await asyncio.sleep(wait)  # outside the semaphore: let others proceed
+
+    fetched = [e.values for e in response.embeddings]
+    cache.put_many(EMBED_MODEL, missing, fetched)
+    by_text = dict(zip(missing, fetched))
+    return [v if v is not None else by_text[t] for t, v in zip(batch, vecs)]
+
+
+async def iter_embedded_batches(
+    texts: list[str],
+    batch_size: int = EMBED_BATCH_SIZE,
+    concurrency: int = EMBED_CONCURRENCY,
+) -> AsyncIterator[tuple[int, list[list[float]]]]:
+    """Embed `texts` in batched requests with up to `concurrency` batches in
+    flight, yielding `(start_index, vectors)` strictly in input order.
+
+    Batches are scheduled ahead of the consumer, so whatever the caller does
+    with a yielded batch (e.g. upserting it) overlaps with embedding the next.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    backoff = _AdaptiveBackoff()
+    starts = list(range(0, len(texts), batch_size))
+    pending: dict[int, asyncio.Task] = {}
+    next_to_schedule = 0
+    try:
+        for start in starts:
+            # keep a window of scheduled batches ahead of the one we yield
+            while next_to_schedule < len(starts) and len(pending) < concurrency * 2:
+                s = starts[next_to_schedule]
+                pending[s] = asyncio.create_task(
+                    _embed_batch(texts[s : s + batch_size], sem, backoff)
+                )
+                next_to_schedule += 1
+            yield start, await pending.pop(start)
+    finally:
+        # consumer stopped early or a batch failed: stop the rest and wait for
+        # them, so no request is left running behind a destroyed task
+        for task in pending.values():
+            task.cancel()
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+
+
+async def embed_texts_async(texts: list[str]) -> list[list[float]]:
+    """Async, batched counterpart of `embed_texts` (same order, same cache)."""
+    out: list[list[float]] = []
+    async for _, vecs in iter_embedded_batches(texts):
+        out.extend(vecs)
+    return out
+
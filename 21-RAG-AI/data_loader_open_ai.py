@@ -3,6 +3,8 @@ from llama_index.readers.file import PDFReader
 from llama_index.core.node_parser import SentenceSplitter
 from dotenv import load_dotenv
 
+from embedding_cache import get_default_cache
+
 load_dotenv()
 
 client = OpenAI()
@@ -20,9 +22,14 @@ def load_and_chunk_pdf(path: str):
     return chunks
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
+def _fetch_embeddings(texts: list[str]) -> list[list[float]]:
     response = client.embeddings.create(
         model=EMBED_MODEL,
         input=texts,
     )
-    return [item.embedding for item in response.data]
\ No newline at end of file
+    return [item.embedding for item in response.data]
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    # only cache misses reach the API (see embedding_cache.py)
+    return get_default_cache().embed(EMBED_MODEL, texts, _fetch_embeddings)
\ No newline at end of file
@@ -6,9 +6,10 @@ from inngest.experimental import ai
 from dotenv import load_dotenv
 import uuid
 import os
+import asyncio
 import datetime
-from data_loader import load_and_chunk_pdf, embed_texts
-from vector_db import QdrantStorage
+from data_loader import load_and_chunk_pdf, embed_texts, iter_embedded_batches
+from vector_db import get_storage, UPSERT_BATCH_SIZE, UPSERT_PARALLELISM
 from custom_types import RAQQueryResult, RAGSearchResult, RAGUpsertResult, RAGChunkAndSrc
 from google import genai
 # from llama_index.core import VectorStoreIndex, SimpleDirectoryReader
@@ -16,6 +17,9 @@ from google import genai
 
 load_dotenv()
 
+# Points handed to the storage per flush; it fans them out as parallel batches
+UPSERT_FLUSH_SIZE = UPSERT_BATCH_SIZE * UPSERT_PARALLELISM
+
 # Initialize Google GenAI client (same as in data_loader.py)
 # Automatically reads GOOGLE_API_KEY from environment
 genai_client = genai.Client()
@@ -30,7 +34,6 @@ inngest_client = inngest.Inngest(
 @inngest_client.create_function(
     fn_id="RAG: Ingest PDF",
     trigger=inngest.TriggerEvent(event="rag/ingest_pdf"),
-    trigger=inngest.TriggerEvent(event="rag/ingest_pdf"),
     throttle=inngest.Throttle(
         count=2, period=datetime.timedelta(minutes=1)
     ),
@@ -47,17 +50,31 @@ async def rag_ingest_pdf(ctx: inngest.Context):
         chuncks = load_and_chunk_pdf(pdf_path)
         return RAGChunkAndSrc(chunks=chuncks, source_id=source_id)
 
-    def _upsert(chuncks_and_src: RAGChunkAndSrc) -> RAGUpsertResult:
+    async def _upsert(chuncks_and_src: RAGChunkAndSrc) -> RAGUpsertResult:
         chunks = chuncks_and_src.chunks
         source_id = chuncks_and_src.source_id
-        vecs = embed_texts(chunks)
-        ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source_id}:{i}")) for i in range(len(chunks))]
-        payloads = [{"source": source_id, "text": chunks[i]} for i in range(len(chunks))]
-        QdrantStorage().upsert(ids, vecs, payloads)
+        store = get_storage()
+
+        def _flush(start: int, vecs: list[list[float]]) -> None:
+            ids = [str(uuid.uuid5(uuid.NAMESPACE_URL, f"{source_id}:{i}")) for i in range(start, start + len(vecs))]
+            payloads = [{"source": source_id, "text": chunks[i]} for i in range(start, start + len(vecs))]
+            store.upsert(ids, vecs, payloads)
+
+        # Embedding batches arrive in order while later ones are still in flight;
+        # each full buffer is upserted in a worker thread so both overlap.
+        buffer_start, buffer = 0, []
+        async for _, vecs in iter_embedded_batches(chunks):
+            buffer.extend(vecs)
+            while len(buffer) >= UPSERT_FLUSH_SIZE:
+                await asyncio.to_thread(_flush, buffer_start, buffer[:UPSERT_FLUSH_SIZE])
+                buffer_start += UPSERT_FLUSH_SIZE
+                buffer = buffer[UPSERT_FLUSH_SIZE:]
+        if buffer:
+            await asyncio.to_thread(_flush, buffer_start, buffer)
         return RAGUpsertResult(ingested=len(chunks))
 
     chuncks_and_src = await ctx.step.run("load-and-chunck", lambda: _load(ctx), output_type=RAGChunkAndSrc)
-    ingested = await ctx.step.run("embed-and-upsert", lambda: _upsert(chuncks_and_src), output_type=RAGUpsertResult)
+    ingested = await ctx.step.run("embed-and-upsert", _upsert, chuncks_and_src, output_type=RAGUpsertResult)
     return ingested.model_dump()
 
 
@@ -68,8 +85,7 @@ async def rag_ingest_pdf(ctx: inngest.Context):
 async def rag_query_pdf_ai(ctx: inngest.Context):
     def _search(question: str, top_k: int =5) -> RAGSearchResult:
         query_vec = embed_texts([question])[0]
-        store = QdrantStorage()
-        found = store.search(query_vec, top_k)
+        found = get_storage().search(query_vec, top_k)
         return RAGSearchResult(contexts=found["contexts"], sources=found["sources"])
 
     question = ctx.event.data["question"]
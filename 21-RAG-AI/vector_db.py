@@ -1,36 +1,102 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
 from qdrant_client import QdrantClient
 from qdrant_client.models import VectorParams, Distance, PointStruct
 
+load_dotenv()
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() in ("1", "true", "yes")
+UPSERT_BATCH_SIZE = 256  # points per request
+UPSERT_PARALLELISM = 4  # concurrent upsert requests
+
+# Process-wide pools: one client per (url, grpc) pair, one storage per collection
+_lock = threading.RLock()
+_clients: dict[tuple[str, bool], QdrantClient] = {}
+_storages: dict[tuple[str, str, bool], "QdrantStorage"] = {}
+_ready_collections: set[tuple[str, str]] = set()
+_upsert_pool = ThreadPoolExecutor(max_workers=UPSERT_PARALLELISM, thread_name_prefix="qdrant-upsert")
+
+
+def get_client(url: str = QDRANT_URL, prefer_grpc: bool = QDRANT_PREFER_GRPC) -> QdrantClient:
+    """Shared QdrantClient; its HTTP/gRPC connections are reused across calls."""
+    key = (url, prefer_grpc)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = QdrantClient(url=url, prefer_grpc=prefer_grpc, timeout=30)
+        return _clients[key]
+
+
+def get_storage(collection="docs", dim=768, url=QDRANT_URL, prefer_grpc=QDRANT_PREFER_GRPC) -> "QdrantStorage":
+    key = (url, collection, prefer_grpc)
+    with _lock:
+        if key not in _storages:
+            _storages[key] = QdrantStorage(url=url, collection=collection, dim=dim, prefer_grpc=prefer_grpc)
+        return _storages[key]
+
+
 class QdrantStorage:
-    def __init__(self, url="http://localhost:6333", collection="docs", dim=768):
-        self.client = QdrantClient(url=url, timeout=30)
-        self.collection= collection
-        if not self.client.collection_exists(self.collection):
-            self.client.create_collection(
-                collection_name=self.collection,
-                vectors_config=VectorParams(size=dim, distance=Distance.COSINE)
-            )
-
-    def upsert(self, ids, vectors, payloads):
+    def __init__(self, url=QDRANT_URL, collection="docs", dim=768, prefer_grpc=QDRANT_PREFER_GRPC):
+        self.client = get_client(url, prefer_grpc)
+        self.url = url
+        self.collection = collection
+        self.dim = dim
+
+    def _ensure_collection(self):
+        # Checked once per process and collection, on first use
+        key = (self.url, self.collection)
+        if key in _ready_collections:
+            return
+        with _lock:
+            if key in _ready_collections:
+                return
+            if not self.client.collection_exists(self.collection):
+                self.client.create_collection(
+                    collection_name=self.collection,
+                    vectors_config=VectorParams(size=self.dim, distance=Distance.COSINE)
+                )
+            _ready_collections.add(key)
+
+    def upsert(self, ids, vectors, payloads, batch_size: int = UPSERT_BATCH_SIZE):
+        """Upsert in fixed-size batches sent in parallel with wait=False; the
+        last batch goes out with wait=True once the others are acknowledged,
+        acting as a barrier so the data is searchable when this returns."""
+        self._ensure_collection()
         points = [PointStruct(id=ids[i], vector=vectors[i], payload=payloads[i]) for i in range(len(ids))]
-        self.client.upsert(self.collection, points=points)
+        if not points:
+            return
+        batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
+        futures = [
+            _upsert_pool.submit(self.client.upsert, self.collection, points=batch, wait=False)
+            for batch in batches[:-1]
+        ]
+        for f in futures:
+            f.result()
+        self.client.upsert(self.collection, points=batches[-1], wait=True)
 
     def search(self, query_vector, top_k: int = 5):
+        self._ensure_collection()
         results = self.client.query_points(
             collection_name=self.collection,
             query=query_vector,
             limit=top_k,
-            with_payload=True
+            with_payload=True,
+            with_vectors=False,
         )
         contexts = []
         sources = set()
+        hits = []
 
         for r in results.points:
-            payload = getattr(r, "payload", None) or {}
+            payload = dict(r.payload or {})
             text = payload.get("text", "")
             source = payload.get("source", "")
             if text:
                 contexts.append(text)
                 sources.add(source)
+            hits.append({"id": r.id, "score": r.score, "payload": payload})
 
-        return {"contexts": contexts, "sources": list(sources)}
+        return {"contexts": contexts, "sources": list(sources), "hits": hits}
@@ -1,15 +1,18 @@
 from dotenv import load_dotenv
-from openai import OpenAI
 import json
 import os
-import requests
-from pypdf import PdfReader
 import gradio as gr
 from datetime import datetime
 import time
+import threading
 import uuid
+import asyncio
+import atexit
 from tenant_manager import TenantManager
-from tenant_tools import get_tenant_tools
+from tenant_context import TenantContextRegistry, get_async_client, get_client
+from quota_ledger import QuotaLedger, key_id
+from notifier import NotificationDispatcher
+from chat_stream import LatencyStats, StreamedReply, StreamStart, open_stream
 
 
 load_dotenv(override=True)
@@ -17,9 +20,27 @@ load_dotenv(override=True)
 # Initialize tenant manager
 tenant_manager = TenantManager()
 
+# Per-tenant context (documents, knowledge base, tools) built once and shared by all sessions
+tenant_contexts = TenantContextRegistry(tenant_manager)
+
 # Constants
 PUSHOVER_API_URL = "https://api.pushover.net/1/messages.json"
 
+# Undelivered push notifications (SQLite) and how long a burst is coalesced
+NOTIFY_OUTBOX_PATH = os.getenv("NOTIFY_OUTBOX_PATH", "notifications.db")
+NOTIFY_COALESCE_SECONDS = float(os.getenv("NOTIFY_COALESCE_SECONDS", "5"))
+
+# SQLite ledger of Gemini usage per key + model, shared by all workers
+QUOTA_LEDGER_PATH = os.getenv("QUOTA_LEDGER_PATH", "quota_ledger.db")
+
+# Chat latency budgets (seconds)
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "45"))  # give up and answer degraded
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "8"))  # then race an alternate key/model (0 = off)
+BACKOFF_BUDGET_SECONDS = float(os.getenv("BACKOFF_BUDGET_SECONDS", "10"))  # longest backoff worth waiting for
+
+# Stream answers token by token to the UI (false = wait for the full response)
+CHAT_STREAMING = os.getenv("CHAT_STREAMING", "true").lower() == "true"
+
 # Emergency numbers by country (ISO 3166-1 alpha-2 codes)
 EMERGENCY_NUMBERS = {
     "VE": {  # Venezuela
@@ -84,34 +105,27 @@ FREE_MODELS = [
 
 # Model + API Key rotation system for Gemini
 class APIKeyModelManager:
-    """Manages API key and model rotation with exponential backoff."""
+    """Manages API key and model rotation with exponential backoff.
     
-    DAILY_LIMIT_PER_KEY = 20  # RPD (Requests Per Day)
+    Usage, exhausted combinations and backoff state live in a SQLite
+    QuotaLedger shared by every thread and worker process, and survive
+    restarts. The current key/model is only a cursor for display; each bot
+    session records usage against the combination it actually used.
+    """
+    
+    DAILY_LIMIT_PER_KEY = 20  # RPD (Requests Per Day) per key + model
     RESET_INTERVAL_SECONDS = 86400  # 24 hours
     INITIAL_BACKOFF_SECONDS = 60  # 1 minute
     MAX_BACKOFF_SECONDS = 1800  # 30 minutes
     
-    def __init__(self):
+    def __init__(self, ledger_path: str = QUOTA_LEDGER_PATH):
         self.keys = self._load_api_keys()
+        self.key_ids = [key_id(key) for key in self.keys]
         self.models = FREE_MODELS
         self.current_key_index = 0
         self.current_model_index = 0
-        
-        # Track exhausted combinations: {(key_index, model_index): timestamp}
-        self.exhausted_combinations = {}
-        
-        # Track usage per model+key combination: {(key_index, model_index): count}
-        self.usage_per_combination = {}
-        
-        # Track usage per key (aggregate across all models)
-        self.request_counts = dict.fromkeys(self.keys, 0)
-        self.daily_limits = dict.fromkeys(self.keys, self.DAILY_LIMIT_PER_KEY)
-        self.last_reset = dict.fromkeys(self.keys, time.time())
-        
-        # Exponential backoff state
-        self.consecutive_failures = 0
-        self.last_failure_time = None
-        self.exhausted_notified = False
+        self._lock = threading.RLock()
+        self.ledger = QuotaLedger(ledger_path, self.RESET_INTERVAL_SECONDS, self.DAILY_LIMIT_PER_KEY)
     
     def _load_api_keys(self) -> list:
         """Load API keys from environment variables."""
@@ -136,106 +150,94 @@ class APIKeyModelManager:
         """Get current API key"""
         return self.keys[self.current_key_index]
     
-    def _check_and_reset_quotas(self):
-        """Check if 24 hours have passed and reset quotas"""
-        current_time = time.time()
-        reset_occurred = False
-        
-        for key in self.keys:
-            if current_time - self.last_reset[key] >= 86400:  # 24 hours
-                self.request_counts[key] = 0
-                self.last_reset[key] = current_time
-                reset_occurred = True
-        
-        # Clear exhausted combinations older than 24 hours
-        expired = [combo for combo, ts in self.exhausted_combinations.items() 
-                   if current_time - ts >= 86400]
-        for combo in expired:
-            del self.exhausted_combinations[combo]
-        
-        if reset_occurred or expired:
-            self.exhausted_notified = False
-            print("🔄 24 hours passed - API quotas have been reset!", flush=True)
-            
-        return reset_occurred
+    def _combinations(self) -> list:
+        """All (key_idx, model_idx) pairs in rotation order (models by quality)"""
+        return [(k, m) for m in range(len(self.models)) for k in range(len(self.keys))]
+    
+    def _usage(self) -> dict:
+        """Ledger usage of every combination: {(key_idx, model_idx): Usage}"""
+        usage = self.ledger.usage([(self.key_ids[k], self.models[m]) for k, m in self._combinations()])
+        return {(k, m): usage[(self.key_ids[k], self.models[m])] for k, m in self._combinations()}
     
     def is_combination_exhausted(self, key_idx, model_idx):
-        """Check if a key+model combination is exhausted"""
-        return (key_idx, model_idx) in self.exhausted_combinations
+        """Check if a key+model combination is exhausted (marked or over its daily limit)"""
+        usage = self.ledger.usage([(self.key_ids[key_idx], self.models[model_idx])])
+        return next(iter(usage.values())).is_exhausted(self.DAILY_LIMIT_PER_KEY)
     
     def mark_combination_exhausted(self, key_idx, model_idx):
-        """Mark a key+model combination as exhausted"""
-        self.exhausted_combinations[(key_idx, model_idx)] = time.time()
+        """Mark a key+model combination as exhausted until its quota resets"""
+        self.ledger.mark_exhausted(self.key_ids[key_idx], self.models[model_idx], self.RESET_INTERVAL_SECONDS)
         print(f"⚠️ Marked Key {key_idx + 1} + {self.models[model_idx]} as exhausted", flush=True)
     
-    def find_working_combination(self):
-        """Find a working key+model combination, rotating through all options.
+    def select_combination(self, exclude=()):
+        """Pick the healthiest key+model combination and move the cursor to it.
         
-        Rotation order: keys first, then models
-        Example: model1+key1 → model1+key2 → model1+key3 → model1+key4 → model2+key1 → ...
-        """
-        self._check_and_reset_quotas()
+        Best model first; among its keys, the one with fewest recent failures,
+        most remaining quota and least recent use (see QuotaLedger.pick).
         
-        total_combinations = len(self.keys) * len(self.models)
-        attempts = 0
+        Args:
+            exclude: (key_idx, model_idx) pairs to skip, e.g. one already in flight
         
-        while attempts < total_combinations:
-            if not self.is_combination_exhausted(self.current_key_index, self.current_model_index):
-                return True  # Found a working combination
-            
-            # Try next KEY first (rotate through all keys with same model)
-            self.current_key_index = (self.current_key_index + 1) % len(self.keys)
-            
-            # If we've cycled through all keys, try next model
-            if self.current_key_index == 0:
-                self.current_model_index = (self.current_model_index + 1) % len(self.models)
+        Returns:
+            tuple: (key_idx, model_idx), or None if all combinations are exhausted
+        """
+        candidates = [(m, self.key_ids[k], self.models[m]) for k, m in self._combinations()
+                      if (k, m) not in exclude]
+        with self._lock:
+            choice = self.ledger.pick(candidates)
+            if choice is None:
+                if exclude:
+                    return None  # no alternative, but not necessarily all exhausted
+                # Only one worker sends the alert per exhaustion episode
+                if self.ledger.compare_and_set("exhausted_notified", 0, 1):
+                    self._notify_all_exhausted()
+                return None
             
-            attempts += 1
-        
-        # All combinations exhausted
-        if not self.exhausted_notified:
-            self._notify_all_exhausted()
-            self.exhausted_notified = True
-        
-        return False
+            if self.ledger.compare_and_set("exhausted_notified", 1, 0):
+                print("🔄 API quotas available again!", flush=True)
+            self.current_key_index = self.key_ids.index(choice[0])
+            self.current_model_index = self.models.index(choice[1])
+            return self.current_key_index, self.current_model_index
+    
+    def find_working_combination(self):
+        """Find a working key+model combination. Returns True if one is available."""
+        return self.select_combination() is not None
     
     def rotate_to_next(self) -> None:
-        """Rotate to next key first, then model if all keys exhausted."""
+        """Move to the next healthiest combination, starting backoff if none is left."""
         old_model = self.get_current_model()
         old_key_idx = self.current_key_index
         
-        # First try next KEY with same model
-        self.current_key_index = (self.current_key_index + 1) % len(self.keys)
-        
-        # If we've cycled through all keys, move to next model and reset to first key
-        if self.current_key_index == 0:
-            self.current_model_index = (self.current_model_index + 1) % len(self.models)
-            
-            # If we've cycled back to first model, we've tried all combinations
-            if self.current_model_index == 0:
-                self.consecutive_failures += 1
-                self.last_failure_time = time.time()
-                print(f"⚠️ All {len(self.keys) * len(self.models)} combinations exhausted. Failure #{self.consecutive_failures}", flush=True)
-            else:
-                print(f"🔑 All keys exhausted for {old_model}, rotating to {self.get_current_model()}", flush=True)
+        if self.select_combination() is None:
+            failures = int(self.ledger.increment_state("consecutive_failures"))
+            self.ledger.set_state("last_failure_time", time.time())
+            print(f"⚠️ All {len(self.keys) * len(self.models)} combinations exhausted. Failure #{failures}", flush=True)
+            return
         
         if old_model == self.get_current_model():
             print(f"🔄 Rotating: Key {old_key_idx + 1} → Key {self.current_key_index + 1} (keeping {old_model})", flush=True)
         else:
-            print(f"🔄 Rotating: {old_model} → {self.get_current_model()} (back to Key 1)", flush=True)
+            print(f"🔄 Rotating: {old_model} → {self.get_current_model()} + Key {self.current_key_index + 1}", flush=True)
     
     def reset_to_first_combination(self) -> None:
         """Reset to the first model and key combination."""
-        self.current_key_index = 0
-        self.current_model_index = 0
+        with self._lock:
+            self.current_key_index = 0
+            self.current_model_index = 0
         print(f"🔄 Reset to first combination: {self.get_current_model()} + Key 1", flush=True)
     
+    @property
+    def consecutive_failures(self) -> int:
+        """Consecutive all-exhausted rounds, shared by all workers"""
+        return int(self.ledger.get_state("consecutive_failures"))
+    
     def get_backoff_time(self) -> int:
         """Calculate exponential backoff time in seconds."""
-        if self.consecutive_failures == 0:
+        failures = self.consecutive_failures
+        if failures == 0:
             return 0
         
-        backoff = self.INITIAL_BACKOFF_SECONDS * (2 ** (self.consecutive_failures - 1))
+        backoff = self.INITIAL_BACKOFF_SECONDS * (2 ** (failures - 1))
         return min(backoff, self.MAX_BACKOFF_SECONDS)
     
     def should_wait_before_retry(self) -> tuple[bool, int]:
@@ -244,11 +246,12 @@ class APIKeyModelManager:
         Returns:
             tuple: (should_wait, seconds_to_wait)
         """
-        if self.last_failure_time is None:
+        last_failure_time = self.ledger.get_state("last_failure_time")
+        if not last_failure_time:
             return False, 0
         
         backoff_time = self.get_backoff_time()
-        elapsed = time.time() - self.last_failure_time
+        elapsed = time.time() - last_failure_time
         remaining = backoff_time - elapsed
         
         if remaining > 0:
@@ -258,22 +261,54 @@ class APIKeyModelManager:
     
     def reset_backoff(self) -> None:
         """Reset the exponential backoff counter after success."""
-        if self.consecutive_failures > 0:
-            print(f"✅ Request successful! Resetting backoff (was at {self.consecutive_failures} failures)", flush=True)
-        self.consecutive_failures = 0
-        self.last_failure_time = None
-    
-    def increment_usage(self):
-        """Increment usage counter for current key and model combination"""
-        key = self.get_current_key()
-        if key in self.request_counts:
-            self.request_counts[key] += 1
-        
-        # Track per-combination usage
-        combo = (self.current_key_index, self.current_model_index)
-        if combo not in self.usage_per_combination:
-            self.usage_per_combination[combo] = 0
-        self.usage_per_combination[combo] += 1
+        failures = self.consecutive_failures
+        if failures > 0:
+            print(f"✅ Request successful! Resetting backoff (was at {failures} failures)", flush=True)
+            self.ledger.set_state("consecutive_failures", 0)
+            self.ledger.set_state("last_failure_time", 0)
+    
+    def increment_usage(self, key_idx=None, model_idx=None):
+        """Count one request for a key+model combination (default: the current one)"""
+        key_idx = self.current_key_index if key_idx is None else key_idx
+        model_idx = self.current_model_index if model_idx is None else model_idx
+        self.ledger.record_request(self.key_ids[key_idx], self.models[model_idx])
+    
+    @property
+    def exhausted_combinations(self) -> dict:
+        """{(key_idx, model_idx): exhausted_until} of combinations out of rotation"""
+        now = time.time()
+        return {
+            combo: usage.available_at(self.DAILY_LIMIT_PER_KEY, self.RESET_INTERVAL_SECONDS, now)
+            for combo, usage in self._usage().items()
+            if usage.is_exhausted(self.DAILY_LIMIT_PER_KEY, now)
+        }
+    
+    def metrics(self) -> dict:
+        """Snapshot of remaining quota per key+model, shared backoff state and cursor"""
+        now = time.time()
+        combinations = []
+        for (k, m), usage in self._usage().items():
+            exhausted = usage.is_exhausted(self.DAILY_LIMIT_PER_KEY, now)
+            combinations.append({
+                "key": k + 1,
+                "model": self.models[m],
+                "requests": usage.requests,
+                "limit": self.DAILY_LIMIT_PER_KEY,
+                "remaining": 0 if exhausted else usage.remaining(self.DAILY_LIMIT_PER_KEY),
+                "failures": usage.failures,
+                "exhausted": exhausted,
+                "exhausted_until": usage.exhausted_until if usage.exhausted_until > now else None,
+                "window_resets_in": max(0, int(usage.window_start + self.RESET_INTERVAL_SECONDS - now)),
+                "last_used": usage.last_used or None
+            })
+        _, wait_time = self.should_wait_before_retry()
+        return {
+            "current": {"key": self.current_key_index + 1, "model": self.get_current_model()},
+            "combinations": combinations,
+            "available": sum(1 for c in combinations if not c["exhausted"]),
+            "remaining": sum(c["remaining"] for c in combinations),
+            "backoff": {"consecutive_failures": self.consecutive_failures, "wait_seconds": wait_time}
+        }
     
     def get_usage_stats(self):
         """Get current usage statistics showing per-model usage"""
@@ -282,31 +317,30 @@ class APIKeyModelManager:
         
         current_time = time.time()
         current_model_idx = self.current_model_index
+        usage = self._usage()
         
-        for i, key in enumerate(self.keys):
-            time_until_reset = 86400 - (current_time - self.last_reset[key])
-            hours = int(time_until_reset // 3600)
-            minutes = int((time_until_reset % 3600) // 60)
-            
-            # Check if current model is exhausted for this key
-            is_current_model_exhausted = self.is_combination_exhausted(i, current_model_idx)
+        for i in range(len(self.keys)):
+            key_usage = [usage[(i, m_idx)] for m_idx in range(len(self.models))]
+            exhausted = [u for u in key_usage if u.is_exhausted(self.DAILY_LIMIT_PER_KEY, current_time)]
+            current = usage[(i, current_model_idx)]
             
-            # Count total exhausted models for this key
-            exhausted_models = sum(1 for m_idx in range(len(self.models)) 
-                                   if self.is_combination_exhausted(i, m_idx))
-            
-            # Get actual usage for current model+key combination
-            combo = (i, current_model_idx)
-            if is_current_model_exhausted:
-                # If exhausted, show 20/20
-                display_count = self.daily_limits[key]
+            # If exhausted, show 20/20; otherwise actual usage for this model+key combo
+            if current.is_exhausted(self.DAILY_LIMIT_PER_KEY, current_time):
+                display_count = self.DAILY_LIMIT_PER_KEY
             else:
-                # Show actual usage for this model+key combo
-                display_count = self.usage_per_combination.get(combo, 0)
+                display_count = current.requests
+            
+            reset_info = ""
+            if exhausted:
+                reset_at = min(u.available_at(self.DAILY_LIMIT_PER_KEY, self.RESET_INTERVAL_SECONDS, current_time)
+                               for u in exhausted)
+                time_until_reset = max(0, reset_at - current_time)
+                hours = int(time_until_reset // 3600)
+                minutes = int((time_until_reset % 3600) // 60)
+                reset_info = f" (resets in {hours}h {minutes}m)"
             
-            status = "✅" if exhausted_models == 0 else f"⚠️ ({exhausted_models}/{len(self.models)} models exhausted)"
-            reset_info = f" (resets in {hours}h {minutes}m)" if exhausted_models > 0 else ""
-            stats.append(f"Key {i+1}: {display_count}/{self.daily_limits[key]} used {status}{reset_info}")
+            status = "✅" if not exhausted else f"⚠️ ({len(exhausted)}/{len(self.models)} models exhausted)"
+            stats.append(f"Key {i+1}: {display_count}/{self.DAILY_LIMIT_PER_KEY} used {status}{reset_info}")
         
         return "\n".join(stats)
     
@@ -314,8 +348,8 @@ class APIKeyModelManager:
         """Send push notification when ALL keys + ALL models are exhausted"""
         try:
             current_time = time.time()
-            earliest_reset = min(self.last_reset.values()) + 86400
-            time_until_reset = earliest_reset - current_time
+            earliest_reset = min(self.exhausted_combinations.values(), default=current_time)
+            time_until_reset = max(0, earliest_reset - current_time)
             hours = int(time_until_reset // 3600)
             minutes = int((time_until_reset % 3600) // 60)
             
@@ -325,23 +359,18 @@ class APIKeyModelManager:
             message += f"Next reset in: {hours}h {minutes}m\n\n"
             message += "The chatbot will retry automatically when quotas reset."
             
-            requests.post(
-                PUSHOVER_API_URL,
-                data={
-                    "token": os.getenv("PUSHOVER_TOKEN"),
-                    "user": os.getenv("PUSHOVER_USER"),
-                    "message": message,
-                    "title": "🚨 Daniel Bot - All Quotas Exhausted",
-                    "priority": 1
-                }
-            )
-            print("\n🚨 ALERT: All API keys + models exhausted! Push notification sent.", flush=True)
+            # High priority: sent on its own, without coalescing or pacing
+            notifier.send("🚨 Daniel Bot - All Quotas Exhausted", message, priority=1)
+            print("\n🚨 ALERT: All API keys + models exhausted! Push notification queued.", flush=True)
             print(f"   Next reset in: {hours}h {minutes}m\n", flush=True)
         except Exception as e:
             print(f"❌ Failed to send exhaustion notification: {e}", flush=True)
 
 api_manager = APIKeyModelManager()
 
+# TTFT and tokens/sec per tenant and model (streamed replies)
+latency_stats = LatencyStats()
+
 def format_timestamp(unix_timestamp):
     """Convert Unix timestamp to human-readable format"""
     try:
@@ -350,8 +379,29 @@ def format_timestamp(unix_timestamp):
     except (ValueError, TypeError):
         return "Unknown"
 
+def notification_footer() -> str:
+    """API usage and push quota appended to delivered notifications (once per message)"""
+    footer = f"\n\n🔑 Gemini API Usage:\n{api_manager.get_usage_stats()}"
+    if notifier.remaining is not None:
+        footer += "\n\n📊 Push Service:"
+        footer += f"\n• Remaining: {notifier.remaining}/10,000"
+        footer += f"\n• Resets: {format_timestamp(notifier.reset_at)}"
+    return footer
+
+# Background Pushover delivery: tool calls only enqueue
+notifier = NotificationDispatcher(
+    os.getenv("PUSHOVER_TOKEN"),
+    os.getenv("PUSHOVER_USER"),
+    NOTIFY_OUTBOX_PATH,
+    footer=notification_footer,
+    api_url=PUSHOVER_API_URL,
+    coalesce_seconds=NOTIFY_COALESCE_SECONDS
+)
+notifier.start()
+atexit.register(notifier.stop)
+
 def push(text, session_id=None, user_context=None):
-    """Send push notification with API stats and session tracking.
+    """Queue push notification with session tracking (API stats are added on delivery).
     
     Args:
         text: Main notification message
@@ -361,10 +411,7 @@ def push(text, session_id=None, user_context=None):
     Returns:
         dict: Status, remaining notifications, and reset time
     """
-    # Get API usage stats first
-    api_stats = api_manager.get_usage_stats()
-    
-    # Build complete message with stats and tracking info
+    # Build complete message with tracking info
     full_message = text
     full_message += "\n\n" + "="*40
     full_message += "\n📍 Session Tracking:"
@@ -376,33 +423,21 @@ def push(text, session_id=None, user_context=None):
         for key, value in user_context.items():
             full_message += f"\n  - {key}: {value}"
     
-    full_message += f"\n\n🔑 Gemini API Usage:\n{api_stats}"
+    # Queue notification; delivery happens in the background
+    notifier.send(f"🤖 Daniel Bot [{session_id[:8] if session_id else 'N/A'}]", full_message)
     
-    # Send notification with stats
-    response = requests.post(
-        PUSHOVER_API_URL,
-        data={
-            "token": os.getenv("PUSHOVER_TOKEN"),
-            "user": os.getenv("PUSHOVER_USER"),
-            "message": full_message,
-            "title": f"🤖 Daniel Bot [{session_id[:8] if session_id else 'N/A'}]"
-        }
-    )
-    
-    # Extract values from response headers
-    remaining = response.headers.get('X-Limit-App-Remaining', 'Unknown')
-    reset_time = response.headers.get('X-Limit-App-Reset', 'Unknown')
-    reset_time_formatted = format_timestamp(reset_time)
+    # Push quota as of the last delivery
+    remaining = notifier.remaining if notifier.remaining is not None else 'Unknown'
+    reset_time_formatted = format_timestamp(notifier.reset_at) if notifier.reset_at else 'Unknown'
     
     # Console output
-    print("📱 Push notification sent!", flush=True)
+    print("📱 Push notification queued!", flush=True)
     print(f"   Message: {text}", flush=True)
     print(f"   Remaining notifications: {remaining}", flush=True)
-    print(f"   Limit resets at: {reset_time_formatted}", flush=True)
-    print("   API Stats included: Yes", flush=True)
+    print(f"   Pending in outbox: {notifier.pending()}", flush=True)
     
     return {
-        "status": "sent",
+        "status": "queued",
         "remaining": remaining,
         "reset_time": reset_time_formatted
     }
@@ -557,59 +592,37 @@ class DanielBot:
         self.tenant_id = tenant_id
         
         # Using Google Gemini via OpenAI-compatible API with key + model rotation
-        if not api_manager.find_working_combination():
-            raise RuntimeError("All API keys and models have reached their daily limits. Please try again later.")
-        
-        self.gemini = OpenAI(
-            api_key=api_manager.get_current_key(), 
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-        )
-        self.current_model = api_manager.get_current_model()
+        self.refresh_client()
         
         # Generate unique session ID for this chat session
         self.session_id = str(uuid.uuid4())
         
-        # Load tenant configuration
-        self.config = tenant_manager.get_tenant_config(tenant_id)
-        self.ui_config = tenant_manager.get_ui_config(tenant_id)
-        self.knowledge_base = tenant_manager.get_knowledge_base(tenant_id)
-        
-        # Load tenant-specific tools
-        self.tools_functions, self.tools_schemas = get_tenant_tools(tenant_id)
-        
-        # For backward compatibility with daniel tenant
-        if tenant_id == "daniel":
-            self.name = "Daniel Ángel Barreto"
-            try:
-                reader = PdfReader("me/linkedin.pdf")
-                self.linkedin = ""
-                for page in reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        self.linkedin += text
-                with open("me/summary.txt", "r", encoding="utf-8") as f:
-                    self.summary = f.read()
-            except:
-                self.linkedin = ""
-                self.summary = ""
-        else:
-            self.name = self.config.get('company_name', 'Assistant')
-            self.linkedin = self.knowledge_base
-            self.summary = self.knowledge_base
-        
-        print(f"🚀 Bot initialized for tenant '{tenant_id}' with {self.current_model} + Key {api_manager.current_key_index + 1}", flush=True)
+        # Shared tenant context: configuration, documents and tools are
+        # extracted once per tenant, not per session
+        context = tenant_contexts.get(tenant_id)
+        self.config = context.config
+        self.ui_config = context.ui_config
+        self.knowledge_base = context.knowledge_base
+        self.tools_functions, self.tools_schemas = context.tools_functions, context.tools_param()
+        self.name = context.name
+        self.linkedin = context.linkedin
+        self.summary = context.summary
+        
+        print(f"🚀 Bot initialized for tenant '{tenant_id}' with {self.current_model} + Key {self.key_index + 1}", flush=True)
         print(f"   Tools loaded: {list(self.tools_functions.keys())}", flush=True)
     
     def refresh_client(self):
         """Refresh the Gemini client with new API key and/or model"""
-        if not api_manager.find_working_combination():
+        combination = api_manager.select_combination()
+        if combination is None:
             raise RuntimeError("All API keys and models have reached their daily limits. Please try again later.")
         
-        self.gemini = OpenAI(
-            api_key=api_manager.get_current_key(),
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-        )
-        self.current_model = api_manager.get_current_model()
+        # This session's own combination: usage and errors are recorded
+        # against it even if other sessions move the shared cursor meanwhile
+        self.key_index, self.model_index = combination
+        # Shared client per API key (no new connection pool per session)
+        self.gemini = get_client(api_manager.keys[self.key_index])
+        self.current_model = api_manager.models[self.model_index]
 
 
     def handle_tool_call(self, tool_calls):
@@ -821,102 +834,13 @@ class DanielBot:
             message += "📍 Session Tracking:\n"
             message += f"• Session ID: {self.session_id[:12]}...\n"
             message += f"• Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            message += f"• Model: {self.current_model} + Key {self.key_index + 1}\n"
             
-            # Add API usage stats
-            message += "\n🔑 Gemini API Usage:\n"
-            message += f"🤖 Current Model: {self.current_model}\n"
-            message += f"🔑 Current Key: {api_manager.current_key_index + 1}\n\n"
-            
-            # Add stats for each key
-            for i, key in enumerate(api_manager.keys, 1):
-                used = api_manager.request_counts.get(key, 0)
-                limit = api_manager.daily_limits.get(key, 20)
-                
-                # Count exhausted models for this key
-                exhausted_count = sum(1 for (key_idx, model_idx) in api_manager.exhausted_combinations.keys() 
-                                     if key_idx == i - 1)
-                total_models = len(api_manager.models)
-                
-                # Determine status emoji
-                if used >= limit:
-                    status = "⚠️"
-                elif used >= limit * 0.8:
-                    status = "⚠️"
-                else:
-                    status = "✅"
-                
-                message += f"Key {i}: {used}/{limit} used {status}"
-                if exhausted_count > 0:
-                    message += f" ({exhausted_count}/{total_models} models exhausted)"
-                
-                # Add reset time
-                last_reset = api_manager.last_reset.get(key)
-                if last_reset:
-                    now = datetime.now()
-                    reset_time = datetime.fromtimestamp(last_reset + 86400)
-                    time_diff = reset_time - now
-                    hours = int(time_diff.total_seconds() // 3600)
-                    minutes = int((time_diff.total_seconds() % 3600) // 60)
-                    if hours >= 0 and minutes >= 0:
-                        message += f" (resets in {hours}h {minutes}m)"
-                
-                message += "\n"
-            
-            # Add placeholder for push stats (will be filled after first request)
-            message += "\n📊 Push Service:\n"
-            message += "• Calculating...\n"
-            
-            # Send notification
-            response = requests.post(
-                PUSHOVER_API_URL,
-                data={
-                    "token": os.getenv("PUSHOVER_TOKEN"),
-                    "user": os.getenv("PUSHOVER_USER"),
-                    "message": message,
-                    "title": title,
-                    "priority": 0
-                },
-                timeout=5
-            )
-            
-            # Extract push service stats from response headers
-            remaining = response.headers.get('X-Limit-App-Remaining', 'Unknown')
-            reset_time = response.headers.get('X-Limit-App-Reset', 'Unknown')
-            
-            # Format reset time
-            if reset_time != 'Unknown':
-                try:
-                    reset_dt = datetime.fromtimestamp(int(reset_time))
-                    reset_time_formatted = reset_dt.strftime("%B %d, %Y at %I:%M %p")
-                except:
-                    reset_time_formatted = reset_time
-            else:
-                reset_time_formatted = reset_time
-            
-            # Update message with actual push stats
-            message = message.replace(
-                "📊 Push Service:\n• Calculating...\n",
-                f"📊 Push Service:\n• Remaining: {remaining}/10,000\n• Resets: {reset_time_formatted}\n"
-            )
-            
-            # Send updated notification with real push stats
-            requests.post(
-                PUSHOVER_API_URL,
-                data={
-                    "token": os.getenv("PUSHOVER_TOKEN"),
-                    "user": os.getenv("PUSHOVER_USER"),
-                    "message": message,
-                    "title": f"{title} [Updated]",
-                    "priority": 0
-                },
-                timeout=5
-            )
-            
-            # Console output with push stats
-            print(f"\n📱 Push notification sent for {tool_name}", flush=True)
-            print(f"📊 Push Service Status:", flush=True)
-            print(f"   • Remaining: {remaining}", flush=True)
-            print(f"   • Resets: {reset_time_formatted}\n", flush=True)
+            # Queued: delivered in the background, coalesced with other
+            # notifications of the burst; API usage and push quota are
+            # appended once per delivered message
+            notifier.send(title, message)
+            print(f"\n📱 Push notification queued for {tool_name}", flush=True)
             
         except Exception as e:
             print(f"\n❌ Failed to send tool notification: {e}", flush=True)
@@ -955,60 +879,22 @@ class DanielBot:
             message += f"Retrying in: {self._format_wait_time(wait_time)}\n\n"
             message += f"Failure #{api_manager.consecutive_failures} - Exponential backoff active."
             
-            requests.post(
-                PUSHOVER_API_URL,
-                data={
-                    "token": os.getenv("PUSHOVER_TOKEN"),
-                    "user": os.getenv("PUSHOVER_USER"),
-                    "message": message,
-                    "title": "⏳ Daniel Bot - Waiting for Retry",
-                    "priority": 0  # Normal priority
-                }
-            )
+            notifier.send("⏳ Daniel Bot - Waiting for Retry", message, priority=0)  # Normal priority
         except Exception as e:
             print(f"❌ Failed to send wait notification: {e}", flush=True)
     
-    def _handle_backoff_wait(self, wait_time: int) -> None:
-        """Handle exponential backoff waiting period."""
-        wait_msg = f"⏳ Technical difficulties. Please wait {self._format_wait_time(wait_time)} while we retry..."
-        print(f"\n{wait_msg}\n", flush=True)
-        self._notify_waiting(wait_time)
-        time.sleep(wait_time)
-        api_manager.reset_to_first_combination()
-        self.refresh_client()
-    
-    def _make_api_request(self, messages: list):
-        """Make API request and return response."""
-        print(f"\n📊 API Usage Stats (before request):\n{api_manager.get_usage_stats()}\n", flush=True)
-        response = self.gemini.chat.completions.create(
-            model=self.current_model,
-            messages=messages,
-            tools=self.tools_schemas  # Use tenant-specific tools
-        )
-        api_manager.reset_backoff()
-        api_manager.increment_usage()
-        print(f"✅ Request successful with {self.current_model} + Key {api_manager.current_key_index + 1}", flush=True)
-        print(f"\n📊 API Usage Stats (after request):\n{api_manager.get_usage_stats()}\n", flush=True)
-        return response
-    
     def _handle_quota_error(self) -> None:
         """Handle quota exhaustion error."""
-        api_manager.mark_combination_exhausted(
-            api_manager.current_key_index,
-            api_manager.current_model_index
-        )
+        api_manager.mark_combination_exhausted(self.key_index, self.model_index)
         print(f"\n📊 Updated API Usage Stats:\n{api_manager.get_usage_stats()}\n", flush=True)
         api_manager.rotate_to_next()
         self.refresh_client()
-        print(f"✅ Switched to {self.current_model} + Key {api_manager.current_key_index + 1}", flush=True)
+        print(f"✅ Switched to {self.current_model} + Key {self.key_index + 1}", flush=True)
     
     def _handle_general_error(self, error_str: str, retry_count: int) -> bool:
         """Handle general API errors. Returns True if should give up."""
         print(f"❌ Error with {self.current_model}: {error_str[:100]}", flush=True)
-        api_manager.mark_combination_exhausted(
-            api_manager.current_key_index,
-            api_manager.current_model_index
-        )
+        api_manager.mark_combination_exhausted(self.key_index, self.model_index)
         api_manager.rotate_to_next()
         self.refresh_client()
         
@@ -1016,7 +902,7 @@ class DanielBot:
         if retry_count > max_retries:
             return True
         
-        print(f"🔄 Trying {self.current_model} + Key {api_manager.current_key_index + 1}", flush=True)
+        print(f"🔄 Trying {self.current_model} + Key {self.key_index + 1}", flush=True)
         return False
     
     def _is_quota_error(self, error_str: str) -> bool:
@@ -1050,30 +936,242 @@ class DanielBot:
         
         return ""
     
-    def chat(self, message, history):
-        """Process user message with infinite retry and exponential backoff."""
+    def _degraded_answer(self, wait_time: int = None) -> str:
+        """Fast fallback answer when no model can reply within the time budget.
+        
+        Args:
+            wait_time: Seconds until quotas are retried, if known
+        """
+        spanish = tenant_manager.get_language_config(self.tenant_id).get('default_language') == 'es'
+        if spanish:
+            when = f"en {max(1, round(wait_time / 60))} min" if wait_time else "en unos minutos"
+            return (f"Lo siento, en este momento estoy recibiendo muchas consultas y no puedo responder. "
+                    f"Por favor, inténtalo de nuevo {when}.")
+        when = f"in {self._format_wait_time(wait_time)}" if wait_time else "in a few minutes"
+        answer = f"Sorry, I'm receiving a lot of questions right now and can't answer properly. Please try again {when}."
+        if self.tenant_id == "daniel":
+            answer += " You can also leave your email and Daniel will get back to you."
+        return answer
+    
+    def _use_combination(self, key_idx: int, model_idx: int) -> None:
+        """Switch this session to a key+model combination (e.g. a hedge that won)"""
+        self.key_index, self.model_index = key_idx, model_idx
+        self.gemini = get_client(api_manager.keys[key_idx])
+        self.current_model = api_manager.models[model_idx]
+    
+    async def _request_async(self, key_idx: int, model_idx: int, messages: list):
+        """Single async chat completion on a given key+model combination."""
+        client = get_async_client(api_manager.keys[key_idx])
+        return await client.chat.completions.create(
+            model=api_manager.models[model_idx],
+            messages=messages,
+            tools=self.tools_schemas  # Use tenant-specific tools
+        )
+    
+    async def _open_stream(self, key_idx: int, model_idx: int, messages: list) -> StreamStart:
+        """Streamed chat completion on a given key+model, once its first chunk arrives."""
+        return await open_stream(
+            get_async_client(api_manager.keys[key_idx]),
+            model=api_manager.models[model_idx],
+            messages=messages,
+            tools=self.tools_schemas  # Use tenant-specific tools
+        )
+    
+    async def _hedged_request(self, messages: list, deadline: float, request=None):
+        """Request on this session's combination, hedged on the next healthiest one.
+        
+        If the first request has not answered after HEDGE_DELAY_SECONDS, the
+        same request is sent on an alternate key+model; the first success wins
+        and the other is cancelled (its usage is still counted, the API may
+        have billed it). Failed combinations are marked exhausted.
+        
+        Args:
+            messages: Conversation so far
+            deadline: Event loop time after which the request is abandoned
+            request: Coroutine function (key_idx, model_idx, messages); default
+                a full completion, _open_stream races to the first chunk
+            
+        Returns:
+            API response (or StreamStart)
+            
+        Raises:
+            asyncio.TimeoutError: Deadline reached with no answer
+            Exception: Last API error if every attempt failed
+        """
+        loop = asyncio.get_running_loop()
+        request = request or self._request_async
+        primary = (self.key_index, self.model_index)
+        in_flight = {asyncio.create_task(request(*primary, messages)): primary}
+        hedge_at = loop.time() + HEDGE_DELAY_SECONDS if HEDGE_DELAY_SECONDS > 0 else None
+        error = None
+        
+        try:
+            while in_flight:
+                wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=max(0, wake_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                for task in done:
+                    combo = in_flight.pop(task)
+                    if task.exception() is None:
+                        api_manager.increment_usage(*combo)
+                        if combo != primary:
+                            print(f"🏁 Hedge won: {api_manager.models[combo[1]]} + Key {combo[0] + 1}", flush=True)
+                            self._use_combination(*combo)
+                        return task.result()
+                    error = task.exception()
+                    print(f"❌ Error with {api_manager.models[combo[1]]} + Key {combo[0] + 1}: {str(error)[:100]}", flush=True)
+                    if in_flight:
+                        # The other request may still answer; this one is out of rotation
+                        api_manager.mark_combination_exhausted(*combo)
+                
+                if done:
+                    continue
+                if loop.time() >= deadline:
+                    raise asyncio.TimeoutError
+                
+                hedge_at = None
+                alternate = api_manager.select_combination(exclude=set(in_flight.values()))
+                if alternate is not None:
+                    print(f"🪁 No answer after {HEDGE_DELAY_SECONDS:g}s, hedging on "
+                          f"{api_manager.models[alternate[1]]} + Key {alternate[0] + 1}", flush=True)
+                    in_flight[asyncio.create_task(request(*alternate, messages))] = alternate
+            
+            # Every attempt failed: the last one is handled like any API error
+            if combo != primary:
+                self._use_combination(*combo)
+            raise error
+        finally:
+            for task, combo in in_flight.items():
+                api_manager.increment_usage(*combo)
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None and isinstance(task.result(), StreamStart):
+                    await task.result().close()  # finished together with the winner
+    
+    async def _stream_reply(self, start: StreamStart, reply: StreamedReply):
+        """Reads a streamed completion into `reply`, yielding its text so far.
+        
+        Records TTFT and tokens/sec for the tenant and model when the stream ends.
+        """
+        try:
+            chunk = start.first
+            while chunk is not None:
+                if reply.add(chunk):
+                    yield reply.content
+                chunk = await anext(start.chunks, None)
+        finally:
+            await start.close()
+        
+        seconds = time.perf_counter() - start.first_at
+        tokens, estimated = reply.tokens
+        latency_stats.record(self.tenant_id, start.model, start.ttft, tokens, seconds)
+        print(f"⏱️ {start.model}: TTFT {start.ttft:.2f}s, {tokens}{'~' if estimated else ''} tokens "
+              f"in {seconds:.2f}s ({tokens / seconds if seconds > 0 else 0:.1f} tok/s)", flush=True)
+    
+    def _recover(self, error_str: str, retry_count: int) -> str:
+        """Rotate after an API error. Returns the answer to give up with, or ''."""
+        try:
+            return self._handle_error(error_str, retry_count)
+        except RuntimeError:
+            # Every combination is exhausted: answer now, backoff starts
+            _, wait_time = api_manager.should_wait_before_retry()
+            return self._degraded_answer(wait_time)
+    
+    async def stream_chat(self, message, history):
+        """Async chat that never blocks the server while quotas recover.
+        
+        Waits out short backoffs with asyncio.sleep (yielding a progress note
+        meanwhile), answers with a degraded message right away when the backoff
+        exceeds BACKOFF_BUDGET_SECONDS, and gives up at CHAT_DEADLINE_SECONDS
+        (with CHAT_STREAMING, the deadline applies to the first token).
+        
+        With CHAT_STREAMING, the answer is yielded as it is generated; tool
+        calls in the stream are executed and the conversation continues.
+        
+        Yields:
+            Text to display so far; the last item is the answer
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CHAT_DEADLINE_SECONDS
         messages = [{"role": "system", "content": self.system_prompt()}] + history + [{"role": "user", "content": message}]
         retry_count = 0
+        shown = ""  # text of earlier rounds (before tool calls), kept on screen
         
         while True:
             should_wait, wait_time = api_manager.should_wait_before_retry()
             if should_wait:
-                self._handle_backoff_wait(wait_time)
+                if wait_time > BACKOFF_BUDGET_SECONDS or loop.time() + wait_time >= deadline:
+                    print(f"⚡ Backoff of {self._format_wait_time(wait_time)} exceeds budget, degraded answer", flush=True)
+                    yield self._degraded_answer(wait_time)
+                    return
+                wait_msg = f"⏳ Technical difficulties. Please wait {self._format_wait_time(wait_time)} while we retry..."
+                print(f"\n{wait_msg}\n", flush=True)
+                yield wait_msg
+                self._notify_waiting(wait_time)
+                await asyncio.sleep(wait_time)
+                try:
+                    self.refresh_client()
+                except RuntimeError:
+                    yield self._degraded_answer()
+                    return
             
             try:
-                response = self._make_api_request(messages)
-                if self._process_response(response, messages):
-                    break
+                if CHAT_STREAMING:
+                    start = await self._hedged_request(messages, deadline, self._open_stream)
+                    api_manager.reset_backoff()
+                    print(f"✅ Streaming from {self.current_model} + Key {self.key_index + 1}", flush=True)
+                    reply = StreamedReply()
+                    async for text in self._stream_reply(start, reply):
+                        yield shown + text
+                    
+                    if not reply.tool_calls:
+                        content, finish_reason = reply.content or None, reply.finish_reason
+                        break
                     
+                    # Tool calls mid-stream: run them and let the model continue
+                    print(f"🔧 Processing {len(reply.tool_calls)} streamed tool call(s)", flush=True)
+                    messages.append(reply.assistant_message())
+                    messages.extend(await asyncio.to_thread(self.handle_tool_call, reply.tool_call_objects()))
+                    if reply.content:
+                        shown += reply.content + "\n\n"
+                    continue
+                
+                response = await self._hedged_request(messages, deadline)
+                api_manager.reset_backoff()
+                print(f"✅ Request successful with {self.current_model} + Key {self.key_index + 1}", flush=True)
+                if await asyncio.to_thread(self._process_response, response, messages):
+                    content, finish_reason = response.choices[0].message.content, response.choices[0].finish_reason
+                    break
+            except asyncio.TimeoutError:
+                print(f"⌛ No answer within {CHAT_DEADLINE_SECONDS:.0f}s, degraded answer", flush=True)
+                yield self._degraded_answer()
+                return
             except Exception as e:
                 retry_count += 1
-                error_msg = self._handle_error(str(e), retry_count)
+                error_msg = self._recover(str(e), retry_count)
                 if error_msg:
-                    return error_msg
+                    yield error_msg
+                    return
         
-        content = response.choices[0].message.content
+        yield shown + self._final_content(content, finish_reason, messages)
+    
+    async def achat(self, message, history) -> str:
+        """Async chat returning only the final answer."""
+        answer = ""
+        async for answer in self.stream_chat(message, history):
+            pass
+        return answer
+    
+    def chat(self, message, history):
+        """Process user message (sync wrapper around the async chat path)."""
+        return asyncio.run(self.achat(message, history))
+    
+    def _final_content(self, content, finish_reason, messages: list) -> str:
+        """Answer text of the final response, with a fallback if it is empty."""
         if content is None:
-            print(f"⚠️ Response content is None. Finish reason: {response.choices[0].finish_reason}", flush=True)
+            print(f"⚠️ Response content is None. Finish reason: {finish_reason}", flush=True)
             # Check if we just executed a tool successfully
             if len(messages) > 1 and messages[-1].get("role") == "tool":
                 tool_result = json.loads(messages[-1].get("content", "{}"))
@@ -1089,7 +1187,7 @@ class DanielBot:
             print("⚠️ This usually means the model called a tool but didn't provide a text response after.", flush=True)
             return "I apologize, but I couldn't generate a response. Please try again."
         return content
-    
+
 
 def create_dynamic_interface(tenant_id: str = "daniel"):
     """Creates a dynamic interface based on tenant configuration"""
@@ -1246,17 +1344,17 @@ def create_dynamic_interface(tenant_id: str = "daniel"):
             )
             
             # Set up the chat interface logic
-            def respond(message, chat_history):
+            async def respond(message, chat_history):
+                history = list(chat_history)
+                
                 # Add user message immediately
                 chat_history.append({"role": "user", "content": message})
+                chat_history.append({"role": "assistant", "content": ""})
                 
-                # Get bot response
-                bot_message = bot.chat(message, chat_history)
-                
-                # Add bot response
-                chat_history.append({"role": "assistant", "content": bot_message})
-                
-                return "", chat_history
+                # Stream bot response (progress notes, then the answer)
+                async for bot_message in bot.stream_chat(message, history):
+                    chat_history[-1] = {"role": "assistant", "content": bot_message}
+                    yield "", chat_history
             
             msg.submit(respond, [msg, chatbot], [msg, chatbot])
             submit.click(respond, [msg, chatbot], [msg, chatbot])
@@ -1369,21 +1467,25 @@ def create_multi_tenant_app():
         )
         
         # Chat logic
-        def respond(message, chat_history, bot_instance):
+        async def respond(message, chat_history, bot_instance):
             if not bot_instance:
-                return "", chat_history + [{"role": "assistant", "content": "Error: Bot not initialized. Please refresh the page."}]
+                yield "", chat_history + [{"role": "assistant", "content": "Error: Bot not initialized. Please refresh the page."}]
+                return
+            
+            history = list(chat_history)
             
             # Add user message
             chat_history.append({"role": "user", "content": message})
+            chat_history.append({"role": "assistant", "content": ""})
             
-            # Get bot response
+            # Stream bot response (progress notes, then the answer)
             try:
-                bot_message = bot_instance.chat(message, chat_history)
-                chat_history.append({"role": "assistant", "content": bot_message})
+                async for bot_message in bot_instance.stream_chat(message, history):
+                    chat_history[-1] = {"role": "assistant", "content": bot_message}
+                    yield "", chat_history
             except Exception as e:
-                chat_history.append({"role": "assistant", "content": f"Error: {str(e)}"})
-            
-            return "", chat_history
+                chat_history[-1] = {"role": "assistant", "content": f"Error: {str(e)}"}
+                yield "", chat_history
         
         # Initialize bot on load
         def init_bot(request: gr.Request):
@@ -1436,6 +1538,13 @@ if __name__ == "__main__":
     print("   Example: http://127.0.0.1:7860/?tenant=clinica1", flush=True)
     print("   Example: http://127.0.0.1:7860/?tenant=abogado1", flush=True)
     
+    # Build every tenant's context now so no chat session pays for it
+    for tenant_id, seconds in tenant_contexts.warm(tenant_manager.list_available_tenants()).items():
+        print(f"📚 Tenant '{tenant_id}' context ready in {seconds * 1000:.0f} ms", flush=True)
+    
+    # Perceived latency per tenant and model, printed on shutdown
+    atexit.register(lambda: print(f"\n⏱️ Streaming latency:\n{latency_stats.summary() or 'no replies'}", flush=True))
+    
     # Original CSS from working version - Professional blue/teal theme
     custom_css = """
     .gradio-container {
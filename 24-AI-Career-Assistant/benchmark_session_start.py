@@ -0,0 +1,103 @@
+"""
+Session start benchmark: per-session document loading vs shared tenant context.
+
+Builds what DanielBot.__init__ needs for N sessions of every tenant, the old
+way (re-read the LinkedIn PDF and summary, re-format the knowledge base and
+create a new OpenAI client per session) and through TenantContextRegistry +
+the shared client pool, and reports
+  - ms per session: mean and p95 construction time
+  - KB per session: memory still held after N live sessions, divided by N
+
+No API calls are made (client construction does not touch the network).
+
+Usage:
+    python benchmark_session_start.py          # 50 sessions per tenant
+    python benchmark_session_start.py 200
+"""
+
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from openai import OpenAI
+from pypdf import PdfReader
+
+from tenant_context import GEMINI_BASE_URL, TenantContextRegistry, get_client
+from tenant_manager import TenantManager
+from tenant_tools import get_tenant_tools
+
+DEFAULT_SESSIONS = 50
+API_KEY = "benchmark-key"
+
+
+def legacy_session(tenant_manager: TenantManager, tenant_id: str) -> Dict:
+    """What DanielBot.__init__ did for every new chat session."""
+    session = {
+        "client": OpenAI(api_key=API_KEY, base_url=GEMINI_BASE_URL),
+        "config": tenant_manager.get_tenant_config(tenant_id),
+        "ui_config": tenant_manager.get_ui_config(tenant_id),
+        "knowledge_base": tenant_manager.get_knowledge_base(tenant_id),
+        "tools": get_tenant_tools(tenant_id),
+    }
+    if tenant_id == "daniel":
+        try:
+            reader = PdfReader("me/linkedin.pdf")
+            session["linkedin"] = "".join(page.extract_text() or "" for page in reader.pages)
+            with open("me/summary.txt", "r", encoding="utf-8") as f:
+                session["summary"] = f.read()
+        except Exception:
+            session["linkedin"] = session["summary"] = ""
+    return session
+
+
+def shared_session(registry: TenantContextRegistry, tenant_id: str) -> Dict:
+    """What DanielBot.__init__ does now."""
+    return {"client": get_client(API_KEY), "context": registry.get(tenant_id)}
+
+
+def measure(build: Callable[[], Dict], sessions: int) -> Dict[str, float]:
+    build()  # warm-up: imports, first read of each file, first context build
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    live: List[Dict] = []
+    times = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        live.append(build())
+        times.append((time.perf_counter() - start) * 1000)
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    times.sort()
+    return {
+        "mean_ms": statistics.fmean(times),
+        "p95_ms": times[int(0.95 * (len(times) - 1))],
+        "kb_per_session": held / 1024 / sessions,
+    }
+
+
+def run(sessions: int) -> None:
+    tenant_manager = TenantManager()
+    registry = TenantContextRegistry(tenant_manager)
+    tenants = tenant_manager.list_available_tenants()
+    pdf = "me/linkedin.pdf"
+    pdf_note = f"{os.path.getsize(pdf) / 1024:.0f} KB" if os.path.exists(pdf) else "missing"
+    print(f"{len(tenants)} tenants, {sessions} sessions each, LinkedIn PDF {pdf_note}\n")
+    print(f"{'tenant':>10} {'mode':>7} | {'ms avg':>8} {'ms p95':>8} | {'KB/session':>10}")
+
+    for tenant_id in tenants:
+        for mode, build in (
+            ("legacy", lambda: legacy_session(tenant_manager, tenant_id)),
+            ("shared", lambda: shared_session(registry, tenant_id)),
+        ):
+            result = measure(build, sessions)
+            print(f"{tenant_id:>10} {mode:>7} | {result['mean_ms']:>8.3f} {result['p95_ms']:>8.3f} | "
+                  f"{result['kb_per_session']:>10.1f}")
+
+    print(f"\nContext builds: {registry.builds} (one per tenant)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SESSIONS)
@@ -0,0 +1,176 @@
+"""
+Chat Stream - Streamed chat completions and their latency stats
+Opens streamed completions, assembles text and tool-call deltas into a reply,
+and records time to first token and tokens/sec per tenant and model
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+CHARS_PER_TOKEN = 4  # estimate when the stream ends without a usage chunk
+
+
+@dataclass
+class StreamStart:
+    """A streamed completion whose first chunk has arrived"""
+    model: str
+    stream: Any
+    chunks: AsyncIterator
+    first: Any  # None if the stream was empty
+    started: float
+    first_at: float
+
+    @property
+    def ttft(self) -> float:
+        return self.first_at - self.started
+
+    async def close(self) -> None:
+        await self.stream.close()
+
+
+async def open_stream(client, **request) -> StreamStart:
+    """
+    Starts a streamed chat completion and waits for its first chunk
+
+    Args:
+        client: AsyncOpenAI client
+        **request: chat.completions.create arguments (model, messages, tools...)
+
+    Returns:
+        StreamStart (the caller must consume or close it)
+    """
+    started = time.perf_counter()
+    # include_usage: a final chunk (empty choices) reports the real completion tokens
+    stream = await client.chat.completions.create(
+        stream=True, stream_options={"include_usage": True}, **request
+    )
+    chunks = stream.__aiter__()
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException:
+        await stream.close()
+        raise
+    return StreamStart(request["model"], stream, chunks, first, started, time.perf_counter())
+
+
+@dataclass
+class StreamedReply:
+    """Assistant reply assembled from streamed deltas"""
+    content: str = ""
+    finish_reason: Optional[str] = None
+    tool_calls: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    completion_tokens: Optional[int] = None
+
+    def add(self, chunk) -> str:
+        """Adds a chunk; returns its text delta"""
+        usage = getattr(chunk, "usage", None)
+        if usage is not None and usage.completion_tokens:
+            self.completion_tokens = usage.completion_tokens
+        if not chunk.choices:
+            return ""
+
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        delta = choice.delta
+        if delta is None:
+            return ""
+
+        # Tool calls arrive in pieces: id and name first, arguments in fragments
+        for call in delta.tool_calls or []:
+            index = call.index if call.index is not None else len(self.tool_calls)
+            entry = self.tool_calls.setdefault(index, {"id": f"call_{index}", "name": "", "arguments": ""})
+            if call.id:
+                entry["id"] = call.id
+            if call.function is not None:
+                entry["name"] += call.function.name or ""
+                entry["arguments"] += call.function.arguments or ""
+
+        text = delta.content or ""
+        self.content += text
+        return text
+
+    @property
+    def tokens(self) -> Tuple[int, bool]:
+        """(completion tokens, estimated?)"""
+        if self.completion_tokens:
+            return self.completion_tokens, False
+        return max(1, len(self.content) // CHARS_PER_TOKEN), True
+
+    def tool_call_objects(self) -> List[SimpleNamespace]:
+        """Tool calls shaped like the non-streamed API objects (id, function.name/arguments)"""
+        return [
+            SimpleNamespace(id=call["id"], function=SimpleNamespace(name=call["name"], arguments=call["arguments"] or "{}"))
+            for _, call in sorted(self.tool_calls.items())
+        ]
+
+    def assistant_message(self) -> Dict[str, Any]:
+        """The reply as a conversation message (with its tool calls)"""
+        message: Dict[str, Any] = {"role": "assistant", "content": self.content or None}
+        if self.tool_calls:
+            message["tool_calls"] = [
+                {"id": call.id, "type": "function",
+                 "function": {"name": call.function.name, "arguments": call.function.arguments}}
+                for call in self.tool_call_objects()
+            ]
+        return message
+
+
+class LatencyStats:
+    """Rolling TTFT and tokens/sec per (tenant, model), for comparing rotated models"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tenant_id: str, model: str, ttft: float, tokens: int, seconds: float) -> None:
+        """
+        Records one streamed reply
+
+        Args:
+            tenant_id: Tenant ID
+            model: Model that produced the reply
+            ttft: Seconds from request to first chunk
+            tokens: Completion tokens
+            seconds: Seconds from first to last chunk
+        """
+        tokens_per_sec = tokens / seconds if seconds > 0 else 0.0
+        with self._lock:
+            samples = self._samples.setdefault((tenant_id, model), deque(maxlen=self.window))
+            samples.append((ttft, tokens_per_sec))
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Returns:
+            {tenant_id: {model: {requests, ttft_p50, ttft_p95, tokens_per_sec}}}
+        """
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (tenant_id, model), values in samples.items():
+            ttfts = sorted(ttft for ttft, _ in values)
+            result.setdefault(tenant_id, {})[model] = {
+                "requests": len(values),
+                "ttft_p50": statistics.median(ttfts),
+                "ttft_p95": ttfts[int(0.95 * (len(ttfts) - 1))],
+                "tokens_per_sec": statistics.fmean(rate for _, rate in values)
+            }
+        return result
+
+    def summary(self) -> str:
+        """Human-readable table of snapshot()"""
+        lines = []
+        for tenant_id, models in sorted(self.snapshot().items()):
+            for model, stats in sorted(models.items()):
+                lines.append(
+                    f"{tenant_id} · {model}: {stats['requests']} replies, TTFT p50 {stats['ttft_p50']:.2f}s "
+                    f"p95 {stats['ttft_p95']:.2f}s, {stats['tokens_per_sec']:.1f} tok/s"
+                )
+        return "\n".join(lines)
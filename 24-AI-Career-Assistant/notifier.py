@@ -0,0 +1,350 @@
+"""
+Notifier - Background, batched Pushover delivery
+Callers enqueue notifications and return at once; a worker thread coalesces
+bursts into digest messages, paces sends with a token bucket sized from
+Pushover's X-Limit-App-* headers and keeps undelivered items in SQLite.
+Workers sharing the outbox claim rows under a lease, so each item is sent once
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import requests
+
+PUSHOVER_API_URL = "https://api.pushover.net/1/messages.json"
+MESSAGE_LIMIT = 1024  # Pushover max message length (characters)
+TITLE_LIMIT = 250
+MONTHLY_LIMIT = 10000  # Pushover free app limit, used until the first response
+DIGEST_SEPARATOR = "\n\n— — —\n\n"
+LEASE_SECONDS = 120  # a claim held longer than this (crashed worker) is up for grabs
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    message TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    lease_until REAL NOT NULL DEFAULT 0
+);
+"""
+# Columns added after the first release, for outboxes created before them
+_MIGRATIONS = {
+    "claimed_by": "ALTER TABLE outbox ADD COLUMN claimed_by TEXT",
+    "lease_until": "ALTER TABLE outbox ADD COLUMN lease_until REAL NOT NULL DEFAULT 0",
+}
+
+
+@dataclass(frozen=True)
+class Notification:
+    """One queued notification"""
+    id: int
+    title: str
+    message: str
+    priority: int
+    created: float
+    attempts: int
+
+
+class TokenBucket:
+    """Send pacing: `capacity` messages at once, then `rate` messages per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 = now)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def set_rate(self, rate: float) -> None:
+        self._refill()
+        self.rate = rate
+
+
+class NotificationDispatcher:
+    """Queues Pushover notifications and delivers them from a background thread"""
+
+    def __init__(
+        self,
+        token: Optional[str],
+        user: Optional[str],
+        path: str,
+        footer: Optional[Callable[[], str]] = None,
+        api_url: str = PUSHOVER_API_URL,
+        coalesce_seconds: float = 5.0,
+        burst: int = 5,
+        timeout: float = 10.0
+    ):
+        """
+        Args:
+            token: Pushover app token (None disables delivery)
+            user: Pushover user key
+            path: SQLite file holding undelivered notifications
+            footer: Builds text appended to delivered messages (API usage, etc.), once per round
+            api_url: Pushover messages endpoint
+            coalesce_seconds: How long a notification waits for others to join its digest
+            burst: Messages that may be sent back to back before pacing applies
+            timeout: HTTP timeout in seconds
+        """
+        self.token = token
+        self.user = user
+        self.footer = footer
+        self.api_url = api_url
+        self.coalesce_seconds = coalesce_seconds
+        self.timeout = timeout
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[int] = None
+        self.sent = 0
+        self.worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._bucket = TokenBucket(burst, MONTHLY_LIMIT / (30 * 86400))
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for column, ddl in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(ddl)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token and self.user)
+
+    def send(self, title: str, message: str, priority: int = 0) -> Optional[int]:
+        """
+        Queues a notification and returns immediately
+
+        Args:
+            title: Notification title
+            message: Notification body
+            priority: Pushover priority; >= 1 is sent on its own, without waiting to coalesce
+
+        Returns:
+            Outbox ID, or None if Pushover is not configured
+        """
+        if not self.enabled:
+            print(f"⚠️ Pushover not configured, notification dropped: {title}", flush=True)
+            return None
+        with self._lock:
+            notification_id = self._conn.execute(
+                "INSERT INTO outbox (title, message, priority, created) VALUES (?, ?, ?, ?)",
+                (title, message, priority, time.time())
+            ).lastrowid
+        self._wake.set()
+        return notification_id
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def start(self) -> None:
+        """Starts the delivery thread (also delivers items left by a previous run)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="pushover-dispatcher", daemon=True)
+            self._thread.start()
+            self._wake.set()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stops the delivery thread; undelivered items stay in the outbox"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ── Worker ──────────────────────────────────────────────────────────
+
+    def _due(self, now: float) -> Tuple[List[Notification], Optional[float]]:
+        """Claims the notifications ready to send; returns them and when to look again"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, title, message, priority, created, attempts, next_attempt, claimed_by, lease_until "
+                    "FROM outbox ORDER BY id"
+                ).fetchall()
+                due, next_check = self._select_due(rows, now)
+                if due:
+                    # The WHERE re-checks the lease: a row claimed by another worker is skipped
+                    placeholders = ", ".join("?" * len(due))
+                    claimed = {row[0] for row in self._conn.execute(
+                        f"UPDATE outbox SET claimed_by = ?, lease_until = ? WHERE id IN ({placeholders}) "
+                        "AND (claimed_by IS NULL OR claimed_by = ? OR lease_until < ?) RETURNING id",
+                        (self.worker, now + LEASE_SECONDS, *[item.id for item in due], self.worker, now)
+                    )}
+                    due = [item for item in due if item.id in claimed]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return due, next_check
+
+    def _select_due(self, rows: List[Tuple], now: float) -> Tuple[List[Notification], Optional[float]]:
+        due, available, next_check = [], [], None
+        for *fields, next_attempt, claimed_by, lease_until in rows:
+            item = Notification(*fields)
+            if claimed_by not in (None, self.worker) and lease_until >= now:
+                # Another worker is sending it; look again if its lease runs out
+                next_check = lease_until if next_check is None else min(next_check, lease_until)
+                continue
+            if next_attempt <= now:
+                available.append(item)
+            ready_at = max(next_attempt, item.created + (0 if item.priority >= 1 else self.coalesce_seconds))
+            if ready_at <= now:
+                due.append(item)
+            else:
+                next_check = ready_at if next_check is None else min(next_check, ready_at)
+        # A digest takes everything pending, so waiting items join ready ones
+        if any(item.priority < 1 for item in due):
+            due = available
+        return due, next_check
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            due, next_check = self._due(time.time())
+            if due and all(item.priority < 1 for item in due):
+                # Out of tokens: keep coalescing until one is available
+                token_wait = self._bucket.wait_time()
+                if token_wait > 0:
+                    next_check, due = time.time() + min(token_wait, 60), []
+                    self._release()
+            if not due:
+                self._wake.wait(None if next_check is None else max(0.05, next_check - time.time()))
+                self._wake.clear()
+                continue
+
+            for title, message, priority, ids in self._batch(due):
+                # Alerts skip pacing; digests wait for the next round if out of tokens
+                if priority < 1 and self._bucket.wait_time() > 0:
+                    break
+                self._bucket.take()
+                self._deliver(title, message, priority, ids)
+            self._release()
+
+    def _batch(self, items: List[Notification]) -> List[Tuple[str, str, int, List[int]]]:
+        """Alerts alone, the rest packed into digests that fit MESSAGE_LIMIT"""
+        footer = self._footer()  # once per delivery round, not per notification
+        room = MESSAGE_LIMIT - len(footer)
+        batches = [(item.title, item.message, item.priority, [item.id]) for item in items if item.priority >= 1]
+
+        normal = [item for item in items if item.priority < 1]
+        digests, chunk, group = [], "", []
+        for item in normal:
+            entry = self._fit(f"{item.title}\n{item.message.rstrip()}", room)
+            if chunk and len(chunk) + len(DIGEST_SEPARATOR) + len(entry) > room:
+                digests.append((chunk, group))
+                chunk, group = "", []
+            chunk = f"{chunk}{DIGEST_SEPARATOR}{entry}" if chunk else entry
+            group.append(item)
+        if chunk:
+            digests.append((chunk, group))
+        for chunk, group in digests:
+            if len(group) == 1:
+                item = group[0]
+                batches.append((item.title, self._fit(item.message.rstrip(), room) + footer, item.priority, [item.id]))
+            else:
+                batches.append((f"📬 {len(group)} notifications", chunk + footer, 0, [item.id for item in group]))
+        return batches
+
+    def _footer(self) -> str:
+        if self.footer is None:
+            return ""
+        try:
+            return self._fit(self.footer(), MESSAGE_LIMIT // 2)
+        except Exception as e:
+            print(f"⚠️ Could not build notification footer: {e}", flush=True)
+            return ""
+
+    @staticmethod
+    def _fit(text: str, limit: int) -> str:
+        return text if len(text) <= limit else text[:max(limit - 1, 0)] + "…"
+
+    def _deliver(self, title: str, message: str, priority: int, ids: List[int]) -> None:
+        try:
+            response = requests.post(
+                self.api_url,
+                data={
+                    "token": self.token,
+                    "user": self.user,
+                    "message": self._fit(message, MESSAGE_LIMIT),
+                    "title": self._fit(title, TITLE_LIMIT),
+                    "priority": priority
+                },
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            self._retry(ids, f"network error: {e}")
+            return
+
+        self._update_limits(response)
+        if response.status_code == 429 or response.status_code >= 500:
+            self._retry(ids, f"HTTP {response.status_code}", self.reset_at if response.status_code == 429 else None)
+            return
+
+        self._delete(ids)
+        if response.status_code >= 400:
+            # Rejected (bad token, user, payload): retrying would not help
+            print(f"❌ Pushover rejected {len(ids)} notification(s): HTTP {response.status_code} {response.text[:200]}", flush=True)
+            return
+        self.sent += 1
+        print(f"📱 Push notification sent: {title} ({len(ids)} item(s), remaining: {self.remaining})", flush=True)
+
+    def _update_limits(self, response) -> None:
+        """Re-sizes the token bucket so the remaining quota lasts until it resets"""
+        try:
+            remaining = int(response.headers["X-Limit-App-Remaining"])
+            reset_at = int(response.headers["X-Limit-App-Reset"])
+        except (KeyError, ValueError):
+            return
+        self.remaining, self.reset_at = remaining, reset_at
+        self._bucket.set_rate(self.remaining / max(self.reset_at - time.time(), 1))
+
+    def _retry(self, ids: List[int], reason: str, not_before: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            for notification_id in ids:
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = attempts + 1, claimed_by = NULL, lease_until = 0, "
+                    "next_attempt = MAX(?, ? + MIN(30 * (1 << attempts), 3600)) WHERE id = ?",
+                    (not_before or 0, now, notification_id)
+                )
+        print(f"⚠️ Push notification delivery failed ({reason}), will retry", flush=True)
+
+    def _delete(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+
+    def _release(self) -> None:
+        """Hands back claimed items this round did not send (out of tokens)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET claimed_by = NULL, lease_until = 0 WHERE claimed_by = ?", (self.worker,)
+            )
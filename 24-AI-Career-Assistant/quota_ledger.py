@@ -0,0 +1,205 @@
+"""
+Quota Ledger - Shared, persistent usage ledger for API key + model combinations
+Counts requests per (key, model) inside its reset window with atomic SQLite
+updates, so every thread and every worker process sees the same remaining quota
+"""
+import hashlib
+import heapq
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    key_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    window_start REAL NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    exhausted_until REAL NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (key_id, model)
+);
+CREATE TABLE IF NOT EXISTS state (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+# Rolls a row into a new window when the current one has expired
+_ROLL_WINDOW = """
+UPDATE usage SET window_start = :now, requests = 0, failures = 0
+WHERE key_id = :key_id AND model = :model AND :now - window_start >= :window
+"""
+
+
+def key_id(api_key: str) -> str:
+    """Stable identifier for an API key (the key itself is never stored)"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class Usage:
+    """Usage of one (key, model) combination in its current window"""
+    key_id: str
+    model: str
+    window_start: float
+    requests: int
+    failures: int
+    exhausted_until: float
+    last_used: float
+
+    def remaining(self, limit: int) -> int:
+        return max(limit - self.requests, 0)
+
+    def is_exhausted(self, limit: int, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.exhausted_until > now or self.requests >= limit
+
+    def available_at(self, limit: int, window_seconds: float, now: Optional[float] = None) -> float:
+        """Timestamp when an exhausted combination can be used again"""
+        now = time.time() if now is None else now
+        ends = [now]
+        if self.exhausted_until > now:
+            ends.append(self.exhausted_until)
+        if self.requests >= limit:
+            ends.append(self.window_start + window_seconds)
+        return max(ends)
+
+
+class QuotaLedger:
+    """SQLite ledger of per-(key, model) usage, exhaustion and shared backoff state"""
+
+    def __init__(self, path: str, window_seconds: float, limit: int):
+        self.path = path
+        self.window_seconds = window_seconds
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _ensure_row(self, key: str, model: str, now: float) -> None:
+        self._conn.execute(
+            "INSERT OR IGNORE INTO usage (key_id, model, window_start) VALUES (?, ?, ?)",
+            (key, model, now)
+        )
+        self._conn.execute(
+            _ROLL_WINDOW, {"now": now, "key_id": key, "model": model, "window": self.window_seconds}
+        )
+
+    def _update(self, key: str, model: str, sql: str, params: Tuple) -> Usage:
+        """Roll the window and apply `sql` in one write transaction"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._ensure_row(key, model, now)
+                row = self._conn.execute(
+                    f"{sql} WHERE key_id = ? AND model = ? RETURNING *", (*params, key, model)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Usage(*row)
+
+    def record_request(self, key: str, model: str) -> Usage:
+        """Count one successful request"""
+        return self._update(
+            key, model,
+            "UPDATE usage SET requests = requests + 1, last_used = ?",
+            (time.time(),)
+        )
+
+    def mark_exhausted(self, key: str, model: str, seconds: float) -> Usage:
+        """Take a combination out of rotation for `seconds` (quota or repeated errors)"""
+        now = time.time()
+        return self._update(
+            key, model,
+            "UPDATE usage SET failures = failures + 1, exhausted_until = ?, last_used = ?",
+            (now + seconds, now)
+        )
+
+    def usage(self, combinations: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], Usage]:
+        """Current-window usage of each combination (never used = empty window)"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM usage").fetchall()
+        stored = {(row[0], row[1]): Usage(*row) for row in rows}
+        result = {}
+        for key, model in combinations:
+            current = stored.get((key, model))
+            if current is None or now - current.window_start >= self.window_seconds:
+                current = Usage(key, model, now, 0, 0,
+                                current.exhausted_until if current else 0.0,
+                                current.last_used if current else 0.0)
+            result[(key, model)] = current
+        return result
+
+    def pick(self, candidates: Sequence[Tuple[int, str, str]]) -> Optional[Tuple[str, str]]:
+        """
+        Healthiest available combination, via a priority heap
+
+        Args:
+            candidates: (model_rank, key_id, model); lower rank = better model
+
+        Returns:
+            (key_id, model), or None if every combination is exhausted
+        """
+        now = time.time()
+        usage = self.usage([(key, model) for _, key, model in candidates])
+        heap = []
+        for position, (model_rank, key, model) in enumerate(candidates):
+            current = usage[(key, model)]
+            if current.is_exhausted(self.limit, now):
+                continue
+            # Best model first; then fewest recent failures, most quota left,
+            # least recently used (spreads load across keys)
+            heapq.heappush(heap, (
+                model_rank, current.failures, -current.remaining(self.limit),
+                current.last_used, position, key, model
+            ))
+        if not heap:
+            return None
+        *_, key, model = heap[0]
+        return key, model
+
+    # ── Shared state (backoff, notifications) ───────────────────────────
+
+    def get_state(self, name: str, default: float = 0.0) -> float:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, name: str, value: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO state (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                (name, value)
+            )
+
+    def increment_state(self, name: str) -> float:
+        """Atomic +1; returns the new value"""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO state (name, value) VALUES (?, 1) "
+                "ON CONFLICT (name) DO UPDATE SET value = value + 1 RETURNING value",
+                (name,)
+            ).fetchone()[0]
+
+    def compare_and_set(self, name: str, expected: float, value: float) -> bool:
+        """Set `name` only if it still equals `expected` (one winner across workers)"""
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO state (name, value) VALUES (?, 0)", (name,))
+            return self._conn.execute(
+                "UPDATE state SET value = ? WHERE name = ? AND value = ?", (value, name, expected)
+            ).rowcount == 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
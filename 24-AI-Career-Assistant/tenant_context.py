@@ -0,0 +1,240 @@
+"""
+Tenant Context - Precomputed per-tenant bot context shared by all chat sessions
+Extracts and formats each tenant's documents once (LinkedIn PDF, summary,
+knowledge base) and rebuilds them only when a source file's mtime changes
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from openai import AsyncOpenAI, OpenAI
+from pypdf import PdfReader
+
+from tenant_manager import TenantManager
+from tenant_tools import get_tenant_tools
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+PROFILE_DIR = "me"
+DANIEL_NAME = "Daniel Ángel Barreto"
+
+# (path, mtime_ns, size) of every file a context was built from; None if missing
+SourceStamp = Tuple[str, Optional[int], Optional[int]]
+
+
+def _freeze(value: Any) -> Any:
+    """Read-only view of a JSON-like value (dicts → MappingProxyType, lists → tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Plain, independent copy of a _freeze()d value (what API clients can serialize)"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _stamp(path: str) -> SourceStamp:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass(frozen=True)
+class TenantContext:
+    """Everything a chat session needs from its tenant; shared, never mutated"""
+    tenant_id: str
+    name: str
+    config: Mapping[str, Any]
+    ui_config: Mapping[str, Any]
+    knowledge_base: str
+    summary: str
+    linkedin: str
+    tools_functions: Mapping[str, Callable]
+    tools_schemas: Tuple[Mapping[str, Any], ...]
+    sources: Tuple[SourceStamp, ...]
+    build_seconds: float
+
+    def tools_param(self) -> List[Dict[str, Any]]:
+        """The tool schemas as plain lists/dicts for a chat completion `tools=`
+        argument; a fresh copy, so changing it never affects other sessions"""
+        return _thaw(self.tools_schemas)
+
+
+class TenantContextRegistry:
+    """Builds each tenant's TenantContext once and serves it to every session"""
+
+    def __init__(self, tenant_manager: TenantManager, profile_dir: str = PROFILE_DIR):
+        self.tenant_manager = tenant_manager
+        self.profile_dir = profile_dir
+        self._contexts: Dict[str, TenantContext] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.builds = 0
+
+    def _source_paths(self, tenant_id: str) -> List[str]:
+        paths = [self.tenant_manager.get_config_path(tenant_id)]
+        if tenant_id == "daniel":
+            paths += [
+                os.path.join(self.profile_dir, "linkedin.pdf"),
+                os.path.join(self.profile_dir, "summary.txt")
+            ]
+        return paths
+
+    def _tenant_lock(self, tenant_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(tenant_id, threading.Lock())
+
+    def get(self, tenant_id: str) -> TenantContext:
+        """
+        Returns the tenant's shared context, rebuilding it if a source file changed
+
+        Args:
+            tenant_id: Tenant ID
+
+        Returns:
+            TenantContext shared by all sessions of the tenant
+        """
+        sources = tuple(_stamp(path) for path in self._source_paths(tenant_id))
+        context = self._contexts.get(tenant_id)
+        if context is not None and context.sources == sources:
+            return context
+
+        # One build per tenant even if many sessions start at once
+        with self._tenant_lock(tenant_id):
+            sources = tuple(_stamp(path) for path in self._source_paths(tenant_id))
+            context = self._contexts.get(tenant_id)
+            if context is not None and context.sources == sources:
+                return context
+            if context is not None:
+                print(f"🔄 Files changed for tenant '{tenant_id}', rebuilding context", flush=True)
+                self.tenant_manager.invalidate(tenant_id)
+            context = self._build(tenant_id, sources)
+            self._contexts[tenant_id] = context
+            return context
+
+    def _build(self, tenant_id: str, sources: Tuple[SourceStamp, ...]) -> TenantContext:
+        started = time.perf_counter()
+        config = self.tenant_manager.get_tenant_config(tenant_id)
+        knowledge_base = self.tenant_manager.get_knowledge_base(tenant_id)
+        tools_functions, tools_schemas = get_tenant_tools(tenant_id)
+
+        # For backward compatibility with daniel tenant
+        if tenant_id == "daniel":
+            name = DANIEL_NAME
+            linkedin = self._read_linkedin()
+            summary = self._read_summary()
+        else:
+            name = config.get('company_name', 'Assistant')
+            linkedin = knowledge_base
+            summary = knowledge_base
+
+        self.builds += 1
+        return TenantContext(
+            tenant_id=tenant_id,
+            name=name,
+            config=_freeze(config),
+            ui_config=_freeze(self.tenant_manager.get_ui_config(tenant_id)),
+            knowledge_base=knowledge_base,
+            summary=summary,
+            linkedin=linkedin,
+            tools_functions=MappingProxyType(dict(tools_functions)),
+            tools_schemas=_freeze(list(tools_schemas)),
+            sources=sources,
+            build_seconds=time.perf_counter() - started
+        )
+
+    def _read_linkedin(self) -> str:
+        try:
+            reader = PdfReader(os.path.join(self.profile_dir, "linkedin.pdf"))
+            return "".join(page.extract_text() or "" for page in reader.pages)
+        except Exception as e:
+            print(f"⚠️ Could not read LinkedIn PDF: {e}", flush=True)
+            return ""
+
+    def _read_summary(self) -> str:
+        try:
+            with open(os.path.join(self.profile_dir, "summary.txt"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError as e:
+            print(f"⚠️ Could not read summary: {e}", flush=True)
+            return ""
+
+    def warm(self, tenant_ids: Iterable[str]) -> Dict[str, float]:
+        """
+        Builds the contexts up front so the first session of each tenant is fast
+
+        Returns:
+            Dict with build time in seconds per tenant
+        """
+        timings = {}
+        for tenant_id in tenant_ids:
+            try:
+                timings[tenant_id] = self.get(tenant_id).build_seconds
+            except Exception as e:
+                print(f"⚠️ Could not preload tenant '{tenant_id}': {e}", flush=True)
+        return timings
+
+
+# Shared OpenAI-compatible clients. A client does not depend on the model
+# (it is a per-request parameter), so one client per API key serves every
+# model of that key and reuses its HTTP connection pool across sessions.
+_clients: Dict[Tuple[str, str], OpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str, base_url: str = GEMINI_BASE_URL) -> OpenAI:
+    """
+    Returns the shared client for an API key, creating it on first use
+
+    Args:
+        api_key: API key
+        base_url: OpenAI-compatible endpoint
+
+    Returns:
+        OpenAI client (thread-safe, shared by all sessions)
+    """
+    client = _clients.get((api_key, base_url))
+    if client is None:
+        with _clients_lock:
+            client = _clients.get((api_key, base_url))
+            if client is None:
+                client = OpenAI(api_key=api_key, base_url=base_url)
+                _clients[(api_key, base_url)] = client
+    return client
+
+
+# Async clients are tied to the event loop their connections were opened on,
+# so they are shared per loop (Gradio serves every async handler on one loop)
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], AsyncOpenAI]]" = \
+    weakref.WeakKeyDictionary()
+
+
+def get_async_client(api_key: str, base_url: str = GEMINI_BASE_URL) -> AsyncOpenAI:
+    """
+    Returns the shared async client for an API key on the running event loop
+
+    Args:
+        api_key: API key
+        base_url: OpenAI-compatible endpoint
+
+    Returns:
+        AsyncOpenAI client shared by all sessions on this loop
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get((api_key, base_url))
+    if client is None:
+        client = clients[(api_key, base_url)] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+    return client
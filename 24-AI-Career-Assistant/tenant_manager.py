@@ -32,13 +32,7 @@ class TenantManager:
             return self._cache[tenant_id]
         
         # Load from file
-        config_path = os.path.join(self.tenants_dir, f"{tenant_id}.json")
-        
-        if not os.path.exists(config_path):
-            # Fallback to daniel if not exists
-            config_path = os.path.join(self.tenants_dir, "daniel.json")
-            if not os.path.exists(config_path):
-                raise FileNotFoundError(f"Configuration not found for tenant: {tenant_id}")
+        config_path = self.get_config_path(tenant_id)
         
         with open(config_path, 'r', encoding='utf-8') as f:
             config = json.load(f)
@@ -51,6 +45,36 @@ class TenantManager:
         
         return config
     
+    def get_config_path(self, tenant_id: str) -> str:
+        """
+        Resolves the JSON file that holds a tenant's configuration
+        
+        Args:
+            tenant_id: Tenant ID
+            
+        Returns:
+            Path to the tenant's JSON file (daniel.json if the tenant does not exist)
+            
+        Raises:
+            FileNotFoundError: If neither the tenant nor the fallback exist
+        """
+        config_path = os.path.join(self.tenants_dir, f"{tenant_id}.json")
+        
+        if not os.path.exists(config_path):
+            # Fallback to daniel if not exists
+            config_path = os.path.join(self.tenants_dir, "daniel.json")
+            if not os.path.exists(config_path):
+                raise FileNotFoundError(f"Configuration not found for tenant: {tenant_id}")
+        
+        return config_path
+    
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Drops a tenant's cached configuration (all tenants if None) so it is re-read"""
+        if tenant_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(tenant_id, None)
+    
     def _validate_config(self, config: Dict[str, Any]) -> None:
         """Validates that configuration has required fields"""
         required_fields = [
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import notifier
+from notifier import DIGEST_SEPARATOR, MESSAGE_LIMIT, NotificationDispatcher
+
+
+class Pushover:
+    """Stands in for requests.post; records what would have been sent"""
+
+    def __init__(self):
+        self.sent = []
+        self.status = 200
+        self.headers = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, url, data, timeout):
+        with self._lock:
+            self.sent.append(data)
+        return SimpleNamespace(status_code=self.status, headers=self.headers, text="")
+
+
+@pytest.fixture
+def pushover(monkeypatch):
+    pushover = Pushover()
+    monkeypatch.setattr(notifier.requests, "post", pushover)
+    return pushover
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "notifications.db")
+
+
+def _dispatcher(path, **options):
+    return NotificationDispatcher("token", "user", path, **{"coalesce_seconds": 0, **options})
+
+
+def _deliver_due(dispatcher):
+    """One delivery round, without the background thread"""
+    due, _ = dispatcher._due(time.time())
+    for title, message, priority, ids in dispatcher._batch(due):
+        dispatcher._deliver(title, message, priority, ids)
+    dispatcher._release()
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_unconfigured_notifications_are_dropped(path, pushover):
+    dispatcher = NotificationDispatcher(None, None, path)
+
+    assert dispatcher.send("Title", "Body") is None
+    assert dispatcher.pending() == 0
+
+
+def test_normal_notifications_are_merged_into_one_digest(path, pushover):
+    dispatcher = _dispatcher(path, footer=lambda: "\n\nusage: 3/20")
+    for i in range(3):
+        dispatcher.send(f"Question {i}", f"Message {i}\n")
+    dispatcher.send("Quota", "All keys exhausted", priority=1)
+
+    _deliver_due(dispatcher)
+
+    alert, digest = pushover.sent
+    assert (alert["title"], alert["message"], alert["priority"]) == ("Quota", "All keys exhausted", 1)
+    assert digest["title"] == "📬 3 notifications"
+    assert digest["message"].split(DIGEST_SEPARATOR)[0] == "Question 0\nMessage 0"
+    assert digest["message"].count("usage: 3/20") == 1
+    assert dispatcher.pending() == 0
+
+
+def test_single_notification_keeps_its_title(path, pushover):
+    dispatcher = _dispatcher(path)
+    dispatcher.send("New contact", "Ana, ana@example.com")
+
+    _deliver_due(dispatcher)
+
+    assert [(m["title"], m["message"]) for m in pushover.sent] == [("New contact", "Ana, ana@example.com")]
+
+
+def test_digests_fit_the_pushover_message_limit(path, pushover):
+    dispatcher = _dispatcher(path)
+    for i in range(5):
+        dispatcher.send(f"Job offer {i}", "x" * 400)
+
+    _deliver_due(dispatcher)
+
+    assert len(pushover.sent) == 3
+    assert all(len(m["message"]) <= MESSAGE_LIMIT for m in pushover.sent)
+    assert sum(m["message"].count("Job offer") for m in pushover.sent[:2]) + 1 == 5
+
+
+def test_notifications_wait_to_coalesce(path, pushover):
+    dispatcher = _dispatcher(path, coalesce_seconds=60)
+    dispatcher.send("Question", "Body")
+    dispatcher.send("Quota", "Exhausted", priority=1)
+
+    due, next_check = dispatcher._due(time.time())
+
+    assert [item.title for item in due] == ["Quota"]
+    assert next_check == pytest.approx(time.time() + 60, abs=1)
+
+
+def test_server_errors_are_retried_and_rejections_dropped(path, pushover):
+    dispatcher = _dispatcher(path)
+    dispatcher.send("Question", "Body")
+
+    pushover.status = 503
+    _deliver_due(dispatcher)
+    row = sqlite3.connect(path).execute("SELECT attempts, next_attempt, claimed_by FROM outbox").fetchone()
+    assert row[0] == 1 and row[1] > time.time() + 20 and row[2] is None
+    assert dispatcher._due(time.time())[0] == []  # backing off
+
+    sqlite3.connect(path, isolation_level=None).execute("UPDATE outbox SET next_attempt = 0")
+    pushover.status = 400
+    _deliver_due(dispatcher)
+    assert dispatcher.pending() == 0 and dispatcher.sent == 0
+
+
+def test_rate_limit_headers_pace_the_bucket(path, pushover):
+    dispatcher = _dispatcher(path)
+    reset_at = int(time.time()) + 1000
+    pushover.headers = {"X-Limit-App-Remaining": "100", "X-Limit-App-Reset": str(reset_at)}
+    dispatcher.send("Question", "Body")
+
+    _deliver_due(dispatcher)
+
+    assert (dispatcher.remaining, dispatcher.reset_at) == (100, reset_at)
+    assert dispatcher._bucket.rate == pytest.approx(0.1, rel=0.05)
+
+
+def test_undelivered_notifications_survive_a_restart(path, pushover):
+    _dispatcher(path).send("Question", "Body")
+
+    dispatcher = _dispatcher(path)
+    dispatcher.start()
+    try:
+        _wait_until(lambda: dispatcher.pending() == 0)
+    finally:
+        dispatcher.stop()
+    assert [m["title"] for m in pushover.sent] == ["Question"]
+
+
+def test_workers_sharing_the_outbox_send_each_notification_once(path, pushover):
+    dispatchers = [_dispatcher(path, coalesce_seconds=0.05, burst=1000) for _ in range(3)]
+    for dispatcher in dispatchers:
+        dispatcher.start()
+    try:
+        for i in range(30):
+            dispatchers[i % 3].send(f"T{i}", f"m{i}", priority=i % 2)
+            time.sleep(0.002)
+        _wait_until(lambda: dispatchers[0].pending() == 0)
+    finally:
+        for dispatcher in dispatchers:
+            dispatcher.stop()
+
+    # A digest part is "title\nmessage"; alerts and single notifications are the bare message
+    bodies = [part.split("\n")[-1] for m in pushover.sent for part in m["message"].split(DIGEST_SEPARATOR)]
+    assert sorted(bodies, key=lambda body: int(body[1:])) == [f"m{i}" for i in range(30)]
+
+
+def test_claims_of_a_crashed_worker_expire(path, pushover):
+    crashed = _dispatcher(path)
+    crashed.send("Question", "Body")
+    assert len(crashed._due(time.time())[0]) == 1  # claimed, never delivered
+
+    other = _dispatcher(path)
+    assert other._due(time.time())[0] == []
+    assert len(other._due(time.time() + notifier.LEASE_SECONDS + 1)[0]) == 1
+
+
+def test_outbox_from_an_older_version_is_migrated(path, pushover):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, message TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL DEFAULT 0
+        );
+        INSERT INTO outbox (title, message, created) VALUES ('Question', 'Body', 0);
+    """)
+    conn.close()
+
+    _deliver_due(_dispatcher(path))
+    assert [m["title"] for m in pushover.sent] == ["Question"]
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quota_ledger import QuotaLedger, key_id
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "quota_ledger.db")
+
+
+def test_key_id_is_stable_and_hides_the_key():
+    assert key_id("secret-key") == key_id("secret-key") != key_id("other-key")
+    assert "secret" not in key_id("secret-key") and len(key_id("secret-key")) == 16
+
+
+def test_requests_are_counted_until_the_limit(path):
+    ledger = QuotaLedger(path, window_seconds=3600, limit=3)
+    assert ledger.usage([("k1", "flash")])[("k1", "flash")].requests == 0
+
+    for expected in (1, 2, 3):
+        usage = ledger.record_request("k1", "flash")
+        assert usage.requests == expected
+    assert usage.remaining(3) == 0 and usage.is_exhausted(3)
+    assert usage.available_at(3, 3600) == pytest.approx(usage.window_start + 3600)
+
+
+def test_window_rolls_over(path):
+    ledger = QuotaLedger(path, window_seconds=0.05, limit=1)
+    ledger.record_request("k1", "flash")
+    assert ledger.usage([("k1", "flash")])[("k1", "flash")].is_exhausted(1)
+
+    time.sleep(0.1)
+    assert ledger.usage([("k1", "flash")])[("k1", "flash")].requests == 0
+    assert ledger.record_request("k1", "flash").requests == 1
+
+
+def test_pick_prefers_the_best_model_then_the_healthiest_key(path):
+    ledger = QuotaLedger(path, window_seconds=3600, limit=2)
+    candidates = [(0, "k1", "pro"), (0, "k2", "pro"), (1, "k1", "flash"), (1, "k2", "flash")]
+
+    ledger.record_request("k1", "pro")
+    assert ledger.pick(candidates) == ("k2", "pro")  # more quota left
+
+    ledger.mark_exhausted("k2", "pro", seconds=3600)
+    assert ledger.pick(candidates) == ("k1", "pro")  # k2 is out of rotation
+
+    ledger.record_request("k1", "pro")
+    assert ledger.pick(candidates) == ("k1", "flash")  # every pro key is exhausted
+
+    for key in ("k1", "k2"):
+        ledger.mark_exhausted(key, "flash", seconds=3600)
+    assert ledger.pick(candidates) is None
+
+
+def test_exhaustion_expires(path):
+    ledger = QuotaLedger(path, window_seconds=3600, limit=10)
+    usage = ledger.mark_exhausted("k1", "flash", seconds=0.05)
+    assert usage.failures == 1 and usage.is_exhausted(10)
+    assert ledger.pick([(0, "k1", "flash")]) is None
+
+    time.sleep(0.1)
+    assert ledger.pick([(0, "k1", "flash")]) == ("k1", "flash")
+
+
+def test_workers_sharing_the_file_see_the_same_counts(path):
+    ledgers = [QuotaLedger(path, window_seconds=3600, limit=1000) for _ in range(2)]
+
+    def work(ledger):
+        for _ in range(25):
+            ledger.record_request("k1", "flash")
+
+    threads = [threading.Thread(target=work, args=(ledger,)) for ledger in ledgers for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for ledger in ledgers:
+        assert ledger.usage([("k1", "flash")])[("k1", "flash")].requests == 100
+
+
+def test_shared_state(path):
+    first = QuotaLedger(path, window_seconds=3600, limit=10)
+    second = QuotaLedger(path, window_seconds=3600, limit=10)
+
+    assert first.get_state("backoff_until", default=-1) == -1
+    first.set_state("backoff_until", 123.5)
+    assert second.get_state("backoff_until") == 123.5
+
+    assert [first.increment_state("failures"), second.increment_state("failures")] == [1, 2]
+
+    # Only one worker sends the "all exhausted" alert
+    assert first.compare_and_set("alerted", 0, 1)
+    assert not second.compare_and_set("alerted", 0, 1)
+    assert second.get_state("alerted") == 1
@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tenant_tools
+from tenant_context import TenantContextRegistry
+from tenant_manager import TenantManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def context(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    return TenantContextRegistry(TenantManager(os.path.join(ROOT, "tenants"))).get("clinica1")
+
+
+def test_shared_tool_schemas_are_read_only(context):
+    schema = context.tools_schemas[0]
+
+    with pytest.raises(TypeError):
+        schema["function"]["name"] = "hijacked"
+    with pytest.raises(AttributeError):
+        context.tools_schemas.append({})
+
+
+def test_each_session_gets_its_own_serializable_copy(context):
+    original = json.dumps(tenant_tools.TENANT_TOOLS["clinica1"]["schemas"])
+    first, second = context.tools_param(), context.tools_param()
+
+    first[0]["function"]["name"] = "hijacked"
+    first.append({"type": "function"})
+
+    assert second == json.loads(original)
+    assert context.tools_param() == json.loads(original)
+    assert json.dumps(tenant_tools.TENANT_TOOLS["clinica1"]["schemas"]) == original
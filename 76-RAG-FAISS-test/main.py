@@ -1,125 +1,134 @@
 # Simple Retriever using FAISS and OpenAI Embeddings
-import os, pickle, sys
+import os, sys
 from typing import List, Dict
 import numpy as np
-import fitz  # PyMuPDF
 import faiss  # Facebook AI Similarity Search
 from tqdm import tqdm
 import openai
 from dotenv import load_dotenv
 
+from chunk_store import commit_store, current_dir, load_store, migrate_legacy, store_exists
+from chunker import TokenChunker
+from embedding_cache import get_default_cache
+from index_factory import IndexSpec, new_index, set_search_params
+from incremental import (
+    IndexState,
+    IngestReport,
+    load_manifest,
+    new_manifest,
+    sync_folder,
+)
+
 load_dotenv()
 
 # -------------------------- Config ---------------------------------
 DB_DIR = "faiss_index"
-INDEX_FILE = os.path.join(DB_DIR, "index.faiss")
-META_FILE = os.path.join(DB_DIR, "docs.pkl")
-CHUNK_SIZE = 500  # characters
-CHUNK_OVERLAP = 100
+CHUNK_TOKENS = 128  # tiktoken tokens, see chunker.py
+CHUNK_OVERLAP_TOKENS = 24
 EMB_MODEL = "text-embedding-3-small"  # or any OpenAI embedding model
+# ANN index: flat (exact) | ivf_flat | ivf_pq | hnsw — see index_factory.py
+INDEX_SPEC = IndexSpec.from_env()
+
+CHUNKER = TokenChunker(CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS)
+
+# anything that changes the vectors invalidates the incremental manifest
+INDEX_CONFIG = {
+    "embed_model": EMB_MODEL,
+    "chunker": CHUNKER.key,
+    "index": INDEX_SPEC.build_key(),
+}
 # -------------------------------------------------------------------
 
 
-# ---------- 1. PDF/TXT LOADING ------------------------------------
-def extract_text_from_pdf(path: str) -> str:
-    text = []
-    with fitz.open(path) as doc:
-        for page in doc:
-            text.append(page.get_text("text"))
-    return "\n".join(text)
-
-
-def load_documents(folder: str) -> List[Dict]:
-    """Return [{text: str, metadata: dict}, ...]"""
-    docs = []
-    for fname in os.listdir(folder):
-        fpath = os.path.join(folder, fname)
-        if fname.lower().endswith(".pdf"):
-            raw = extract_text_from_pdf(fpath)
-        elif fname.lower().endswith(".txt"):
-            raw = open(fpath, encoding="utf-8").read()
-        else:
-            continue
-        if raw.strip():
-            docs.append({"text": raw, "metadata": {"source": fname}})
-    return docs
-
-
-# ---------- 2. SIMPLE TEXT SPLITTER -------------------------------
-def split_text(text: str, size: int, overlap: int) -> List[str]:
-    """Character splitter with overlap."""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = min(start + size, len(text))
-        chunks.append(text[start:end])
-        start += size - overlap
-    return chunks
-
-
-# ---------- 3. EMBEDDING UTILS ------------------------------------
-def embed_texts(texts: List[str]) -> np.ndarray:
-    """Returns (n, d) float32 numpy array of L2-normalized embeddings."""
+# ---------- 1. EMBEDDING UTILS ------------------------------------
+def fetch_embeddings(texts: List[str]) -> List[List[float]]:
+    """Raw embeddings straight from the OpenAI API."""
     client = openai.OpenAI()
     # OpenAI allows batching up to ~2048 tokens total; we batch by 100 strings
     embs = []
     for i in range(0, len(texts), 100):
         resp = client.embeddings.create(input=texts[i : i + 100], model=EMB_MODEL)
         embs.extend([d.embedding for d in resp.data])
+    return embs
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Returns (n, d) float32 numpy array of L2-normalized embeddings."""
+    # only cache misses reach the API (see embedding_cache.py)
+    embs = get_default_cache().embed(EMB_MODEL, texts, fetch_embeddings)
     arr = np.array(embs, dtype="float32")
     # Normalize for cosine similarity (so we can use inner product index)
     faiss.normalize_L2(arr)
     return arr
 
 
-# ---------- 4. BUILD & SAVE FAISS INDEX ---------------------------
-def create_vector_db(docs: List[Dict]):
-    os.makedirs(DB_DIR, exist_ok=True)
-    chunks, meta = [], []
-    for d in docs:
-        for chunk in split_text(d["text"], CHUNK_SIZE, CHUNK_OVERLAP):
-            chunks.append(chunk)
-            meta.append(d["metadata"])
-    print(f"→ Embedding {len(chunks)} chunks …")
-    embeddings = embed_texts(chunks)
-    index = faiss.IndexFlatIP(embeddings.shape[1])  # cosine via inner product
-    index.add(embeddings)
-    faiss.write_index(index, INDEX_FILE)
-    with open(META_FILE, "wb") as f:
-        pickle.dump({"texts": chunks, "meta": meta}, f)
-    print(f"✅ Vector DB saved to {DB_DIR}")
-
-
-def load_vector_db():
-    if not (os.path.exists(INDEX_FILE) and os.path.exists(META_FILE)):
-        sys.exit("No FAISS DB found. Run indexing first.")
-    index = faiss.read_index(INDEX_FILE)
-    with open(META_FILE, "rb") as f:
-        store = pickle.load(f)
-    return index, store["texts"], store["meta"]
+# ---------- 2. LOAD FAISS INDEX ----------------------------------
+def load_vector_db(mmap: bool = False):
+    """Index + memory-mapped chunk store of the live generation.
 
-
-# ---------- 5. RETRIEVAL ------------------------------------------
+    mmap=True also maps the index (search only, it is read-only)."""
+    if not store_exists(DB_DIR):
+        sys.exit("No FAISS DB found. Run indexing first.")
+    index, store = load_store(DB_DIR, mmap)
+    return set_search_params(index, INDEX_SPEC), store
+
+
+# ---------- 2b. INCREMENTAL SYNC ----------------------------------
+def load_index_state() -> IndexState:
+    store_dir = current_dir(DB_DIR)
+    manifest = load_manifest(store_dir, INDEX_CONFIG) if store_dir else None
+    if manifest is None:
+        return IndexState(manifest=new_manifest(INDEX_CONFIG))
+    index, store = load_vector_db()
+    return IndexState(
+        index=index,
+        texts=[store.text(i) for i in range(len(store))],
+        metas=[store.meta(i) for i in range(len(store))],
+        manifest=manifest,
+    )
+
+
+def update_vector_db(folder: str) -> IngestReport:
+    """Sync the index with `folder`, embedding only new/changed chunks."""
+    os.makedirs(DB_DIR, exist_ok=True)
+    state = load_index_state()
+    report = sync_folder(
+        folder,
+        state,
+        CHUNKER.split_pages,
+        embed_texts,
+        lambda vecs: new_index(vecs, INDEX_SPEC),
+    )
+    if state.index is not None:
+        commit_store(DB_DIR, state.index, state.texts, state.metas, state.manifest)
+    print(f"✅ Vector DB synced: {report}")
+    print(f"   embedding cache: {get_default_cache().stats}")
+    return report
+
+
+# ---------- 3. RETRIEVAL ------------------------------------------
 def retrieve(query: str, k: int = 3) -> List[Dict]:
-    index, texts, meta = load_vector_db()
+    index, store = load_vector_db(mmap=True)
     q_emb = embed_texts([query])
     D, I = index.search(q_emb, k)  # distances & indices
     return [
-        {"text": texts[i], "meta": meta[i], "score": float(D[0][rank])}
+        {"text": store.text(i), "meta": store.meta(i), "score": float(D[0][rank])}
         for rank, i in enumerate(I[0])
+        if i != -1
     ]
 
 
-# ---------- 6. MAIN -----------------------------------------------
+# ---------- 4. MAIN -----------------------------------------------
 if __name__ == "__main__":
     folder = "../documents"
 
-    if not (os.path.exists(INDEX_FILE) and os.path.exists(META_FILE)):
-        print("No existing index – building one …")
-        docs = load_documents(folder)
-        if not docs:
+    if migrate_legacy(DB_DIR):
+        print("Migrated index.faiss + docs.pkl to the columnar chunk store.")
+    if "--update" in sys.argv or not store_exists(DB_DIR):
+        print("Syncing index (only new/changed chunks are embedded) …")
+        update_vector_db(folder)
+        if not store_exists(DB_DIR):
             sys.exit(f"No PDFs/TXTs found in '{folder}'.")
-        create_vector_db(docs)
 
     while True:
         q = input("\nQuery (or 'exit'): ")
@@ -0,0 +1,244 @@
+"""
+FAISS index factory: Flat, IVF-Flat, IVF-PQ and HNSW behind one spec.
+
+All indexes use inner product on L2-normalized vectors (cosine similarity),
+like the original IndexFlatIP. Approximate indexes are trained on a random
+sample of the corpus, and their query-time knobs (nprobe / efSearch) can be
+changed without rebuilding.
+
+Run this file to compare every index type against the exact index:
+
+    python index_factory.py                    # vectors of the index in faiss_index/
+    python index_factory.py --synthetic 100000 # random unit vectors
+"""
+
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from chunk_store import load_store
+
+INDEX_KINDS = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+MIN_POINTS_PER_CENTROID = 39  # FAISS warns below this when training k-means
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    kind: str = "flat"
+    nlist: Optional[int] = None  # IVF cells; None → ~4·√n
+    pq_m: int = 64  # IVF-PQ sub-quantizers (must divide the dimension)
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    nprobe: int = 16  # IVF cells visited per query
+    ef_search: int = 64  # HNSW candidate list size per query
+    train_sample: int = 50_000
+
+    @classmethod
+    def from_env(cls) -> "IndexSpec":
+        """FAISS_INDEX_KIND, FAISS_NLIST, FAISS_NPROBE, FAISS_EF_SEARCH."""
+        spec = cls(kind=os.getenv("FAISS_INDEX_KIND", "flat").lower())
+        if spec.kind not in INDEX_KINDS:
+            raise ValueError(f"FAISS_INDEX_KIND must be one of {INDEX_KINDS}")
+        if os.getenv("FAISS_NLIST"):
+            spec = replace(spec, nlist=int(os.environ["FAISS_NLIST"]))
+        if os.getenv("FAISS_NPROBE"):
+            spec = replace(spec, nprobe=int(os.environ["FAISS_NPROBE"]))
+        if os.getenv("FAISS_EF_SEARCH"):
+            spec = replace(spec, ef_search=int(os.environ["FAISS_EF_SEARCH"]))
+        return spec
+
+    def build_key(self) -> str:
+        """Identifies the index structure (query-time knobs excluded)."""
+        if self.kind in ("ivf_flat", "ivf_pq"):
+            key = f"{self.kind}:nlist={self.nlist or 'auto'}"
+            if self.kind == "ivf_pq":
+                key += f":m={self.pq_m}:nbits={self.pq_nbits}"
+            return key
+        if self.kind == "hnsw":
+            return f"hnsw:m={self.hnsw_m}:efc={self.ef_construction}"
+        return "flat"
+
+
+def _resolve_nlist(spec: IndexSpec, n: int) -> int:
+    nlist = spec.nlist or int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+
+
+def _train_sample(vecs: np.ndarray, size: int) -> np.ndarray:
+    if len(vecs) <= size:
+        return vecs
+    rng = np.random.default_rng(0)
+    return vecs[np.sort(rng.choice(len(vecs), size, replace=False))]
+
+
+def new_index(vecs: np.ndarray, spec: IndexSpec) -> faiss.Index:
+    """Empty index for `spec`, trained on a sample of `vecs` when needed.
+
+    Falls back to a flat index when the corpus is too small to train the
+    requested structure."""
+    n, d = vecs.shape
+    ip = faiss.METRIC_INNER_PRODUCT
+    if spec.kind == "hnsw":
+        index = faiss.IndexHNSWFlat(d, spec.hnsw_m, ip)
+        index.hnsw.efConstruction = spec.ef_construction
+    elif spec.kind in ("ivf_flat", "ivf_pq"):
+        nlist = _resolve_nlist(spec, n)
+        too_small = nlist < 2 or (spec.kind == "ivf_pq" and n < 2**spec.pq_nbits)
+        if too_small or (spec.kind == "ivf_pq" and d % spec.pq_m):
+            print(f"⚠️  {spec.kind} not usable for {n} vectors of dim {d}; using flat")
+            return faiss.IndexFlatIP(d)
+        quantizer = faiss.IndexFlatIP(d)
+        if spec.kind == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, d, nlist, ip)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, spec.pq_m, spec.pq_nbits, ip)
+        index.train(_train_sample(vecs, spec.train_sample))
+    else:
+        index = faiss.IndexFlatIP(d)
+    set_search_params(index, spec)
+    return index
+
+
+def build_index(vecs: np.ndarray, spec: IndexSpec) -> faiss.Index:
+    index = new_index(vecs, spec)
+    index.add(vecs)
+    return index
+
+
+def set_search_params(index: faiss.Index, spec: IndexSpec) -> faiss.Index:
+    """Apply nprobe / efSearch, looking through IndexIDMap wrappers."""
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    inner = faiss.downcast_index(inner)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = spec.nprobe
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = spec.ef_search
+    return index
+
+
+def with_ids(index: faiss.Index) -> faiss.Index:
+    """Index that stores caller-chosen ids (add_with_ids / remove_ids).
+
+    IVF indexes keep ids in their inverted lists; anything else is wrapped
+    in an IndexIDMap."""
+    if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap(index)
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """True if remove_ids leaves every surviving id on its own vector.
+
+    HNSW can't delete vectors at all, and an IndexIDMap over IVF loses track
+    of which inner slot holds which id after a removal; both need a rebuild.
+    A bare IVF index (see with_ids) removes its own ids correctly."""
+    if hasattr(index, "id_map"):
+        inner = faiss.downcast_index(index.index)
+        return not isinstance(inner, (faiss.IndexHNSW, faiss.IndexIVF))
+    return isinstance(faiss.downcast_index(index), faiss.IndexIVF)
+
+
+# ─────────────────────────────────────
+# RECALL / LATENCY REPORT
+# ─────────────────────────────────────
+def _search_timed(index: faiss.Index, queries: np.ndarray, k: int):
+    timings, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, I = index.search(q.reshape(1, -1), k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(I[0])
+    return np.array(results), timings
+
+
+def recall_report(
+    vecs: np.ndarray, k: int = 5, n_queries: int = 200, specs: Optional[List[IndexSpec]] = None
+) -> List[Dict]:
+    """recall@k and per-query latency of each spec vs the exact flat index.
+
+    Queries are perturbed corpus vectors, so they look like real questions
+    that land near existing chunks."""
+    rng = np.random.default_rng(1)
+    queries = vecs[rng.choice(len(vecs), min(n_queries, len(vecs)), replace=False)]
+    queries = queries + rng.normal(0, 0.05, queries.shape).astype("float32")
+    faiss.normalize_L2(queries)
+
+    exact = build_index(vecs, IndexSpec("flat"))
+    truth, _ = _search_timed(exact, queries, k)
+
+    if specs is None:
+        specs = [IndexSpec("flat")]
+        specs += [IndexSpec("ivf_flat", nprobe=p) for p in (1, 4, 16, 64)]
+        specs += [IndexSpec("ivf_pq", nprobe=p) for p in (4, 16, 64)]
+        specs += [IndexSpec("hnsw", ef_search=ef) for ef in (16, 32, 64, 128)]
+
+    rows, built = [], {}
+    for spec in specs:
+        key = spec.build_key()
+        if key not in built:
+            start = time.perf_counter()
+            built[key] = (build_index(vecs, spec), time.perf_counter() - start)
+        index, build_s = built[key]
+        set_search_params(index, spec)
+        found, timings = _search_timed(index, queries, k)
+        hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+        rows.append(
+            {
+                "index": key,
+                "nprobe": spec.nprobe if "ivf" in spec.kind else "-",
+                "ef_search": spec.ef_search if spec.kind == "hnsw" else "-",
+                f"recall@{k}": hits / truth.size,
+                "p50_ms": float(np.percentile(timings, 50)),
+                "p99_ms": float(np.percentile(timings, 99)),
+                "build_s": build_s,
+                "size_mb": faiss.serialize_index(index).nbytes / 1e6,
+            }
+        )
+    return rows
+
+
+def print_report(rows: List[Dict]) -> None:
+    recall_key = next(key for key in rows[0] if key.startswith("recall@"))
+    print(f"{'index':<34} {'nprobe':>6} {'ef':>4} {recall_key:>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'MB':>8}")
+    for r in rows:
+        print(f"{r['index']:<34} {r['nprobe']:>6} {r['ef_search']:>4} "
+              f"{r[recall_key]:>9.3f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+              f"{r['build_s']:>8.2f} {r['size_mb']:>8.1f}")
+    good = [r for r in rows if r[recall_key] >= 0.95]
+    if good:
+        best = min(good, key=lambda r: r["p50_ms"])
+        print(f"\nFastest setting with {recall_key} ≥ 0.95: {best['index']} "
+              f"(nprobe={best['nprobe']}, ef_search={best['ef_search']})")
+
+
+def _load_corpus_vectors(index: faiss.Index) -> np.ndarray:
+    inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+    inner = faiss.downcast_index(inner)
+    if isinstance(inner, faiss.IndexIVF):
+        # Ids may have holes after removals: look them up in the inverted lists
+        inner.set_direct_map_type(faiss.DirectMap.Hashtable)
+        ids = np.concatenate([
+            faiss.rev_swig_ptr(inner.invlists.get_ids(l), inner.invlists.list_size(l)).copy()
+            for l in range(inner.nlist)
+        ])
+        return inner.reconstruct_batch(np.sort(ids))
+    return inner.reconstruct_n(0, inner.ntotal)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--synthetic":
+        rng = np.random.default_rng(0)
+        corpus = rng.standard_normal((int(sys.argv[2]), 1536), dtype=np.float32)
+        faiss.normalize_L2(corpus)
+    else:
+        corpus = _load_corpus_vectors(load_store("faiss_index")[0])
+    print(f"Corpus: {corpus.shape[0]} vectors × {corpus.shape[1]} dims\n")
+    print_report(recall_report(corpus))
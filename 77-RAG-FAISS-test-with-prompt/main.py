@@ -1,14 +1,25 @@
 from __future__ import annotations
-import os, pickle, sys
-from typing import List, Dict
+import os, sys
+from typing import List
 
 import numpy as np
-import fitz  # PyMuPDF
 import faiss  # Facebook AI Similarity Search
 from tqdm import tqdm
 import openai  # still used for embeddings, not for chat
 from dotenv import load_dotenv
 
+from chunk_store import commit_store, current_dir, load_store, migrate_legacy, store_exists
+from chunker import TokenChunker
+from embedding_cache import get_default_cache
+from index_factory import IndexSpec, new_index, set_search_params
+from incremental import (
+    IndexState,
+    IngestReport,
+    load_manifest,
+    new_manifest,
+    sync_folder,
+)
+
 load_dotenv()
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -16,132 +27,129 @@ load_dotenv()
 # ─────────────────────────────────────────────────────────────────────────────
 DOCS_DIR = "../documents"  # Folder with source docs
 DB_DIR = "faiss_index"  # Where the index lives
-INDEX_FILE = os.path.join(DB_DIR, "index.faiss")
-META_FILE = os.path.join(DB_DIR, "docs.pkl")
 
-CHUNK_SIZE = 500
-CHUNK_OVERLAP = 100
+CHUNK_TOKENS = 128  # tiktoken tokens, see chunker.py
+CHUNK_OVERLAP_TOKENS = 24
 EMBED_MODEL = "text-embedding-3-small"
 MAX_CONTEXTS = 3  # chunks to display
+# ANN index: flat (exact) | ivf_flat | ivf_pq | hnsw — see index_factory.py
+INDEX_SPEC = IndexSpec.from_env()
+
+CHUNKER = TokenChunker(CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS)
+
+# Anything that changes the vectors invalidates the incremental manifest
+INDEX_CONFIG = {
+    "embed_model": EMBED_MODEL,
+    "chunker": CHUNKER.key,
+    "index": INDEX_SPEC.build_key(),
+}
+
 SYSTEM_PROMPT = (
     "You are a concise, highly accurate assistant. "
     "If the answer cannot be found in the provided context, say 'I don't know.'"
 )
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 1. Document loading
-# ─────────────────────────────────────────────────────────────────────────────
-
-
-def extract_text_from_pdf(path: str) -> str:
-    out = []
-    with fitz.open(path) as doc:
-        for page in doc:
-            out.append(page.get_text("text"))
-    return "\n".join(out)
-
-
-def load_documents(folder: str = DOCS_DIR) -> List[Dict]:
-    docs: List[Dict] = []
-    for fn in os.listdir(folder):
-        fp = os.path.join(folder, fn)
-        if fn.lower().endswith(".pdf"):
-            raw = extract_text_from_pdf(fp)
-        elif fn.lower().endswith(".txt"):
-            with open(fp, encoding="utf-8") as f:
-                raw = f.read()
-        else:
-            continue
-        if raw.strip():
-            docs.append({"text": raw, "metadata": {"source": fn}})
-    return docs
-
-
-# ─────────────────────────────────────────────────────────────────────────────
-# 2. Chunking & embeddings
+# 1. Chunking & embeddings
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def split_text(
-    text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP
-) -> List[str]:
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = min(start + size, len(text))
-        chunks.append(text[start:end])
-        start += size - overlap
-    return chunks
-
-
-def embed_texts(texts: List[str], model: str = EMBED_MODEL) -> np.ndarray:
+def fetch_embeddings(texts: List[str], model: str = EMBED_MODEL) -> List[List[float]]:
     client = openai.OpenAI()
     all_vecs: List[List[float]] = []
     batch = 100
     for i in tqdm(range(0, len(texts), batch), desc="Embedding", leave=False):
         resp = client.embeddings.create(input=texts[i : i + batch], model=model)
         all_vecs.extend([d.embedding for d in resp.data])
-    arr = np.array(all_vecs, dtype="float32")
+    return all_vecs
+
+
+def embed_texts(texts: List[str], model: str = EMBED_MODEL) -> np.ndarray:
+    # Only cache misses reach the API (see embedding_cache.py)
+    vecs = get_default_cache().embed(
+        model, texts, lambda missing: fetch_embeddings(missing, model)
+    )
+    arr = np.array(vecs, dtype="float32")
     faiss.normalize_L2(arr)
     return arr
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 3. Build / load FAISS
+# 2. Load FAISS
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def create_vector_db(docs: List[Dict]):
-    os.makedirs(DB_DIR, exist_ok=True)
-    chunks, metas = [], []
-    for d in docs:
-        for ch in split_text(d["text"]):
-            chunks.append(ch)
-            metas.append(d["metadata"])
-    print(f"Embedding {len(chunks)} chunks …")
-    vecs = embed_texts(chunks)
-    index = faiss.IndexFlatIP(vecs.shape[1])
-    index.add(vecs)
-    faiss.write_index(index, INDEX_FILE)
-    with open(META_FILE, "wb") as f:
-        pickle.dump({"texts": chunks, "meta": metas}, f)
-    print("✅ Vector DB built at", DB_DIR)
-
-
-def load_vector_db():
-    if not (os.path.exists(INDEX_FILE) and os.path.exists(META_FILE)):
+def load_vector_db(mmap: bool = False):
+    """Index + memory-mapped chunk store of the live generation.
+
+    mmap=True also maps the index (search only, it is read-only)."""
+    if not store_exists(DB_DIR):
         raise FileNotFoundError("FAISS DB not found.")
-    index = faiss.read_index(INDEX_FILE)
-    with open(META_FILE, "rb") as f:
-        store = pickle.load(f)
-    return index, store["texts"], store["meta"]
+    index, store = load_store(DB_DIR, mmap)
+    return set_search_params(index, INDEX_SPEC), store
+
+
+def load_index_state() -> IndexState:
+    store_dir = current_dir(DB_DIR)
+    manifest = load_manifest(store_dir, INDEX_CONFIG) if store_dir else None
+    if manifest is None:
+        return IndexState(manifest=new_manifest(INDEX_CONFIG))
+    index, store = load_vector_db()
+    return IndexState(
+        index=index,
+        texts=[store.text(i) for i in range(len(store))],
+        metas=[store.meta(i) for i in range(len(store))],
+        manifest=manifest,
+    )
 
 
-# Build if missing
-if not os.path.exists(INDEX_FILE):
-    print("No index found; building one now …")
-    docs = load_documents()
-    if not docs:
-        sys.exit(f"No PDFs/TXTs found in '{DOCS_DIR}'.")
-    create_vector_db(docs)
+def update_vector_db(folder: str = DOCS_DIR) -> IngestReport:
+    """Sync the index with `folder`, embedding only new/changed chunks."""
+    os.makedirs(DB_DIR, exist_ok=True)
+    state = load_index_state()
+    report = sync_folder(
+        folder,
+        state,
+        CHUNKER.split_pages,
+        embed_texts,
+        lambda vecs: new_index(vecs, INDEX_SPEC),
+    )
+    if state.index is not None:
+        commit_store(DB_DIR, state.index, state.texts, state.metas, state.manifest)
+    print("✅ Vector DB synced:", report)
+    print("Embedding cache:", get_default_cache().stats)
+    return report
+
+
+# Build if missing, or sync incrementally with `--update`.
+# Skipped in ingest worker processes, which re-import this file as __mp_main__.
+if __name__ != "__mp_main__":
+    if migrate_legacy(DB_DIR):
+        print("Migrated index.faiss + docs.pkl to the columnar chunk store.")
+    if not store_exists(DB_DIR) or "--update" in sys.argv:
+        print("Syncing index with", DOCS_DIR, "…")
+        update_vector_db()
+        if not store_exists(DB_DIR):
+            sys.exit(f"No PDFs/TXTs found in '{DOCS_DIR}'.")
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 4. Retrieval
+# 3. Retrieval
 # ─────────────────────────────────────────────────────────────────────────────
 
 
 def retrieve(query: str, k: int = MAX_CONTEXTS):
-    index, texts, meta = load_vector_db()
+    index, store = load_vector_db(mmap=True)
     q_vec = embed_texts([query])
     D, I = index.search(q_vec, k)
     return [
-        {"text": texts[i], "meta": meta[i], "score": float(D[0][rank])}
+        {"text": store.text(i), "meta": store.meta(i), "score": float(D[0][rank])}
         for rank, i in enumerate(I[0])
+        if i != -1
     ]
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 5. Build and show prompt (no generation)
+# 4. Build and show prompt (no generation)
 # ─────────────────────────────────────────────────────────────────────────────
 
 
@@ -168,7 +176,7 @@ def show_prompt(query: str):
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# 6. CLI
+# 5. CLI
 # ─────────────────────────────────────────────────────────────────────────────
 
 
@@ -0,0 +1,104 @@
+"""
+Chunking benchmark: character slicer vs token-aware chunker.
+
+Runs both splitters over the same pages (synthetic prose, no API calls, or
+the PDFs/TXTs of a folder) and reports
+  - throughput: MB of page text and chunks per second
+  - tokens:     mean / max tokens per chunk, and how many chunks exceed the
+                token budget (would be truncated or rejected by the embedder)
+  - cuts:       chunks that start or end in the middle of a word
+
+Usage:
+    python benchmark_chunking.py                  # synthetic, 200 pages
+    python benchmark_chunking.py 1000             # synthetic, 1000 pages
+    python benchmark_chunking.py ../documents     # real documents
+"""
+
+import os
+import random
+import sys
+import time
+from typing import Callable, List
+
+from chunker import TokenChunker
+from ingest import iter_documents, list_documents
+
+CHUNK_CHARS = 500  # old split_text defaults
+CHUNK_OVERLAP_CHARS = 100
+CHUNK_TOKENS = 128  # ≈ 500 characters of English prose
+CHUNK_OVERLAP_TOKENS = 24
+DEFAULT_PAGES = 200
+WORDS = (
+    "the index stores every chunk with its page so answers can cite a source "
+    "embedding models measure input in tokens rather than characters and long "
+    "numbers like 1234567 or identifiers such as faiss.IndexFlatIP cost more"
+).split()
+
+
+def char_split(pages: List[str]) -> List[str]:
+    """The previous splitter: fixed character windows over the joined text."""
+    text = "\n".join(pages)
+    chunks, start = [], 0
+    while start < len(text):
+        chunks.append(text[start : start + CHUNK_CHARS])
+        start += CHUNK_CHARS - CHUNK_OVERLAP_CHARS
+    return chunks
+
+
+def synthetic_pages(n: int, rng: random.Random) -> List[List[str]]:
+    """One document of `n` pages, a few paragraphs of short sentences each."""
+    def sentence() -> str:
+        return " ".join(rng.choices(WORDS, k=rng.randint(6, 30))).capitalize() + "."
+
+    def paragraph() -> str:
+        return " ".join(sentence() for _ in range(rng.randint(2, 6)))
+
+    return [["\n\n".join(paragraph() for _ in range(rng.randint(3, 6))) for _ in range(n)]]
+
+
+def _mid_word(chunk: str, page_text: str) -> bool:
+    pos = page_text.find(chunk)
+    if pos < 0:
+        return False
+    end = pos + len(chunk)
+    before = page_text[pos - 1] if pos > 0 else " "
+    after = page_text[end] if end < len(page_text) else " "
+    return (before.isalnum() and chunk[:1].isalnum()) or (chunk[-1:].isalnum() and after.isalnum())
+
+
+def report(name: str, split: Callable[[List[str]], List[str]], docs: List[List[str]], chunker: TokenChunker) -> None:
+    start = time.perf_counter()
+    per_doc = [split(pages) for pages in docs]
+    secs = max(time.perf_counter() - start, 1e-9)
+
+    chunks = [c for doc in per_doc for c in doc]
+    mb = sum(len(p.encode("utf-8")) for pages in docs for p in pages) / 1e6
+    tokens = [chunker.count(c) for c in chunks] or [0]
+    over = sum(t > CHUNK_TOKENS for t in tokens)
+    cuts = 0
+    for pages, doc in zip(docs, per_doc):
+        text = "\n".join(pages)
+        cuts += sum(_mid_word(c, text) for c in doc)
+    n = max(len(chunks), 1)
+    print(
+        f"{name:>6} | {mb / secs:>7.2f} {len(chunks) / secs:>9.0f} | {len(chunks):>7} "
+        f"{sum(tokens) / n:>7.1f} {max(tokens):>5} {100 * over / n:>7.1f}% | {100 * cuts / n:>7.1f}%"
+    )
+
+
+def run(docs: List[List[str]]) -> None:
+    chunker = TokenChunker(CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS)
+    pages = sum(len(d) for d in docs)
+    print(f"{len(docs)} documents, {pages} pages, budget {CHUNK_TOKENS} tokens\n")
+    print(f"{'':>6} | {'MB/s':>7} {'chunks/s':>9} | {'chunks':>7} "
+          f"{'tok avg':>7} {'max':>5} {'> budget':>8} | {'mid-word':>8}")
+    report("chars", char_split, docs, chunker)
+    report("tokens", lambda p: [c.text for c in chunker.split_pages(p)], docs, chunker)
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else str(DEFAULT_PAGES)
+    if os.path.isdir(arg):
+        run([doc.pages for doc in iter_documents(list_documents(arg)) if not doc.is_blank()])
+    else:
+        run(synthetic_pages(int(arg), random.Random(0)))
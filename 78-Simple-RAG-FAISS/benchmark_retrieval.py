@@ -0,0 +1,84 @@
+"""
+Query latency benchmark: reload-per-query vs resident retriever.
+
+Builds synthetic indexes of increasing size (random unit vectors, no API
+calls) and reports p50/p99 search latency for
+  - reload:   faiss.read_index + pickle.load on every query (old retrieve())
+  - resident: one Retriever kept alive across queries
+
+Usage:
+    python benchmark_retrieval.py                 # default sizes
+    python benchmark_retrieval.py 1000 10000      # custom sizes
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import faiss
+import numpy as np
+
+from chunk_store import commit_store
+from retriever import Retriever
+
+DIM = 1536  # text-embedding-3-small
+CHUNK_CHARS = 500
+QUERIES = 200
+K = 3
+DEFAULT_SIZES = [1_000, 5_000, 20_000, 50_000]
+
+
+def _unit_vectors(n: int, rng: np.random.Generator) -> np.ndarray:
+    vecs = rng.standard_normal((n, DIM), dtype=np.float32)
+    faiss.normalize_L2(vecs)
+    return vecs
+
+
+def _percentiles(fn: Callable[[np.ndarray], object], queries: np.ndarray):
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q.reshape(1, -1))
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def run(sizes: List[int]) -> None:
+    rng = np.random.default_rng(0)
+    queries = _unit_vectors(QUERIES, rng)
+    print(f"{'chunks':>8} | {'reload p50':>10} {'reload p99':>10} | "
+          f"{'resident p50':>12} {'resident p99':>12}  (ms)")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as db_dir:
+            index_file = os.path.join(db_dir, "index.faiss")
+            pkl_file = os.path.join(db_dir, "docs.pkl")
+            texts = ["x" * CHUNK_CHARS for _ in range(n)]
+            metas = [{"source": "bench.pdf"} for _ in range(n)]
+
+            index = faiss.IndexFlatIP(DIM)
+            index.add(_unit_vectors(n, rng))
+            faiss.write_index(index, index_file)
+            commit_store(db_dir, index, texts, metas)
+            with open(pkl_file, "wb") as f:
+                pickle.dump({"texts": texts, "meta": metas}, f)
+
+            def reload_search(q):
+                idx = faiss.read_index(index_file)
+                with open(pkl_file, "rb") as f:
+                    store = pickle.load(f)
+                D, I = idx.search(q, K)
+                return [store["texts"][i] for i in I[0]]
+
+            retriever = Retriever(db_dir)
+            retriever.search(queries[:1], K)  # warm-up load
+
+            r50, r99 = _percentiles(reload_search, queries)
+            m50, m99 = _percentiles(lambda q: retriever.search(q, K), queries)
+            print(f"{n:>8} | {r50:>10.2f} {r99:>10.2f} | {m50:>12.2f} {m99:>12.2f}")
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,65 @@
+"""
+Resident FAISS retriever.
+Loads the index and chunk store once, memory-maps them where FAISS allows
+it, and reloads only when a new generation is committed.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from chunk_store import INDEX_NAME, ChunkStore, current_dir, read_index
+from index_factory import IndexSpec, set_search_params
+
+
+class Retriever:
+    """
+    Long-lived retriever over the live generation in `db_dir`.
+
+    Each search reads the CURRENT pointer (a few bytes) and reloads when it
+    names another generation, so a rebuilt index is picked up without
+    restarting, however close together two commits land.
+    """
+
+    def __init__(
+        self,
+        db_dir: str,
+        mmap: bool = True,
+        spec: Optional[IndexSpec] = None,
+    ):
+        self.db_dir = db_dir
+        self.mmap = mmap
+        self.spec = spec or IndexSpec()  # nprobe / efSearch for ANN indexes
+        self._lock = threading.Lock()
+        # (generation dir, index, store), replaced as a whole so a search
+        # never pairs one generation's index with another's chunks
+        self._loaded: Optional[Tuple[str, faiss.Index, ChunkStore]] = None
+        self.reloads = 0
+
+    def _ensure_loaded(self) -> Tuple[faiss.Index, ChunkStore]:
+        gen_dir = current_dir(self.db_dir)
+        loaded = self._loaded
+        if loaded is None or loaded[0] != gen_dir:
+            with self._lock:
+                loaded = self._loaded
+                if loaded is None or loaded[0] != gen_dir:
+                    if gen_dir is None:
+                        raise FileNotFoundError("FAISS DB not found.")
+                    index = read_index(os.path.join(gen_dir, INDEX_NAME), self.mmap)
+                    loaded = (gen_dir, set_search_params(index, self.spec), ChunkStore(gen_dir))
+                    self._loaded = loaded
+                    self.reloads += 1
+        return loaded[1], loaded[2]
+
+    def search(self, q_vecs: np.ndarray, k: int) -> List[Dict]:
+        """Search with a (1, d) normalized query vector."""
+        index, store = self._ensure_loaded()
+        D, I = index.search(q_vecs, k)
+        return [
+            {"text": store.text(i), "meta": store.meta(i), "score": float(D[0][rank])}
+            for rank, i in enumerate(I[0])
+            if i != -1
+        ]
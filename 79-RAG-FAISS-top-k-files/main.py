@@ -1,47 +1,39 @@
-import os, pickle
+import itertools, os, pickle
 from typing import List, Tuple
 
-import fitz  # PyMuPDF  →  pip install pymupdf
 import numpy as np
 import faiss  # pip install faiss-cpu
 import openai  # pip install openai
 from dotenv import load_dotenv
 
+from chunk_store import commit_store, load_store, store_exists
+from chunker import TokenChunker
+from embedding_cache import get_default_cache
+from ingest import IngestStats, iter_chunks, iter_documents, list_documents
+
 load_dotenv()
 
 DOCS_DIR = "../documents"
-DB_DIR = "faiss_index"
-DOC_INDEX_FILE = os.path.join(DB_DIR, "doc_index.faiss")
-DOC_META_FILE = os.path.join(DB_DIR, "doc_meta.pkl")
+DB_DIR = "faiss_index"  # index + chunk store generations (see chunk_store.py)
+LEGACY_INDEX_FILE = os.path.join(DB_DIR, "doc_index.faiss")
+LEGACY_META_FILE = os.path.join(DB_DIR, "doc_meta.pkl")
 EMBED_MODEL = "text-embedding-3-small"  # adjust if needed
+CHUNKER = TokenChunker(max_tokens=256, overlap_tokens=48)  # see chunker.py
 
 
 # ── helpers ──────────────────────────────────────────────────────────────
-def extract_text_from_pdf(path: str) -> str:
-    text = []
-    with fitz.open(path) as doc:
-        for page in doc:
-            text.append(page.get_text("text"))
-    return "\n".join(text)
-
-
-def split_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-    """Split text into chunks to avoid token limits"""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = min(start + chunk_size, len(text))
-        chunks.append(text[start:end])
-        start += chunk_size - overlap
-    return chunks
-
-
-def embed_texts(texts: List[str]) -> np.ndarray:
+def fetch_embeddings(texts: List[str]) -> List[List[float]]:
     client = openai.OpenAI()  # requires OPENAI_API_KEY env-var
     out = []
     for i in range(0, len(texts), 100):  # batch ≤ 100 inputs
         resp = client.embeddings.create(input=texts[i : i + 100], model=EMBED_MODEL)
         out.extend([d.embedding for d in resp.data])
+    return out
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    # only cache misses hit the API  →  see embedding_cache.py
+    out = get_default_cache().embed(EMBED_MODEL, texts, fetch_embeddings)
     vecs = np.array(out, dtype="float32")
     faiss.normalize_L2(vecs)  # cosine → inner product
     return vecs
@@ -51,50 +43,59 @@ def embed_texts(texts: List[str]) -> np.ndarray:
 def build_doc_index(folder: str = DOCS_DIR) -> None:
     os.makedirs(DB_DIR, exist_ok=True)  # Create directory if it doesn't exist
 
-    texts, names = [], []
-    for fn in os.listdir(folder):
-        fp = os.path.join(folder, fn)
-        if fn.lower().endswith(".pdf"):
-            full_text = extract_text_from_pdf(fp)
-            chunks = split_text(full_text)  # Split into chunks
-            for i, chunk in enumerate(chunks):
-                texts.append(chunk)
-                names.append(f"{fn}_chunk_{i + 1}")
-        elif fn.lower().endswith(".txt"):
-            full_text = open(fp, encoding="utf-8").read()
-            chunks = split_text(full_text)  # Split into chunks
-            for i, chunk in enumerate(chunks):
-                texts.append(chunk)
-                names.append(f"{fn}_chunk_{i + 1}")
+    # PDFs are extracted in a process pool and streamed into the embedder,
+    # so extraction of later files overlaps embedding of earlier ones
+    stats = IngestStats()
+    records = iter_chunks(iter_documents(list_documents(folder), stats), CHUNKER.split_pages, stats)
+    texts, metas, parts = [], [], []
+    for batch in itertools.batched(records, 100):
+        parts.append(embed_texts([r.text for r in batch]))
+        texts.extend(r.text for r in batch)
+        metas.extend({"name": f"{r.source}_chunk_{r.chunk + 1}", "page": r.page} for r in batch)
+    stats.finish()
 
     if not texts:
         raise ValueError("No PDFs/TXTs found to index.")
 
-    print(f"Embedding {len(texts)} document chunks …")
-    vecs = embed_texts(texts)
+    print(f"Embedded {len(texts)} document chunks — ingest: {stats}")
+    vecs = np.vstack(parts)
     index = faiss.IndexFlatIP(vecs.shape[1])
     index.add(vecs)
 
-    faiss.write_index(index, DOC_INDEX_FILE)
-    with open(DOC_META_FILE, "wb") as f:
-        pickle.dump(names, f)
+    commit_store(DB_DIR, index, texts, metas)
     print("✅ doc-level FAISS index saved.")
+    print("Embedding cache:", get_default_cache().stats)
+
+
+def migrate_legacy_index() -> None:
+    """Move doc_index.faiss + doc_meta.pkl (chunk names only) into the
+    chunk store; texts weren't kept, so they are stored empty."""
+    with open(LEGACY_META_FILE, "rb") as f:
+        names = pickle.load(f)
+    index = faiss.read_index(LEGACY_INDEX_FILE)
+    commit_store(DB_DIR, index, [""] * len(names), [{"name": n} for n in names])
+    os.remove(LEGACY_INDEX_FILE)
+    os.remove(LEGACY_META_FILE)
 
 
 def load_doc_index():
-    if not os.path.exists(DOC_INDEX_FILE):
+    if not store_exists(DB_DIR) and os.path.exists(LEGACY_META_FILE):
+        migrate_legacy_index()
+    if not store_exists(DB_DIR):
         build_doc_index()  # auto-build on first use
-    index = faiss.read_index(DOC_INDEX_FILE)
-    names = pickle.load(open(DOC_META_FILE, "rb"))
-    return index, names
+    return load_store(DB_DIR, mmap=True)  # chunk names are read per hit
 
 
 # ── public API ───────────────────────────────────────────────────────────
 def top_k_docs(query: str, k: int = 5) -> List[Tuple[str, float]]:
-    index, names = load_doc_index()
+    index, store = load_doc_index()
     qvec = embed_texts([query])
     D, I = index.search(qvec, k)
-    return [(names[i], float(D[0][rank])) for rank, i in enumerate(I[0])]
+    return [
+        (store.meta(i)["name"], float(D[0][rank]))
+        for rank, i in enumerate(I[0])
+        if i != -1
+    ]
 
 
 # ── demo ─────────────────────────────────────────────────────────────────
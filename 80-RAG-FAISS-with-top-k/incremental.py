@@ -0,0 +1,199 @@
+"""
+Incremental, content-hashed indexing.
+
+`manifest.json` (committed together with the index and chunks, see
+chunk_store.py) records, per source file, the sha256 of the file bytes plus
+the id and sha256 of every chunk it produced. A sync then only:
+  - skips files whose bytes are unchanged (no extraction, no embedding),
+  - embeds chunks whose hash is new for that file,
+  - removes vectors of deleted files / vanished chunks by id (see
+    index_factory.with_ids).
+
+Chunk ids are stable and never reused, so `texts[id]` / `metas[id]` stay
+valid across syncs; removed ids are left as `None` holes.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from index_factory import supports_removal, with_ids
+from ingest import IngestStats, SplitPages, chunk_document, iter_documents, list_documents
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+EMBED_BATCH = 256  # chunks per embed_fn call while files are still extracting
+
+
+@dataclass
+class IndexState:
+    """Everything a sync reads and mutates; persisted by the caller."""
+
+    index: Optional[faiss.Index] = None
+    texts: List[Optional[str]] = field(default_factory=list)
+    metas: List[Optional[Dict]] = field(default_factory=list)
+    manifest: Dict = field(default_factory=dict)
+
+
+@dataclass
+class IngestReport:
+    skipped: int = 0
+    added: int = 0
+    removed: int = 0
+    files_changed: int = 0
+    files_deleted: int = 0
+    ingest: IngestStats = field(default_factory=IngestStats)
+
+    def __str__(self) -> str:
+        out = (
+            f"chunks skipped={self.skipped} added={self.added} "
+            f"removed={self.removed} "
+            f"(files changed={self.files_changed}, deleted={self.files_deleted})"
+        )
+        if self.files_changed:
+            out += f"\n   ingest: {self.ingest}"
+        return out
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path(store_dir: str) -> str:
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def new_manifest(config: Dict) -> Dict:
+    return {"version": MANIFEST_VERSION, "config": config, "next_id": 0, "files": {}}
+
+
+def load_manifest(store_dir: str, config: Dict) -> Optional[Dict]:
+    """Return the manifest stored in `store_dir`, or None if missing or built with a
+    different config (embedding model, chunk size …)."""
+    try:
+        with open(manifest_path(store_dir), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("config") != config:
+        return None
+    return manifest
+
+
+def sync_folder(
+    folder: str,
+    state: IndexState,
+    split_pages_fn: SplitPages,
+    embed_fn: Callable[[List[str]], np.ndarray],
+    new_index_fn: Optional[Callable[[np.ndarray], faiss.Index]] = None,
+    workers: Optional[int] = None,
+) -> IngestReport:
+    """Bring `state` in line with the PDFs/TXTs currently in `folder`.
+
+    Changed files are extracted in parallel (see ingest.py) and their new
+    chunks are embedded in batches of EMBED_BATCH while later files are
+    still being extracted. `new_index_fn(vecs)` creates the (trained, empty)
+    index when none exists yet, which with_ids makes id-addressable;
+    defaults to IndexFlatIP."""
+    report = IngestReport()
+    manifest = state.manifest
+    files = manifest["files"]
+    to_remove: List[int] = []
+    new_ids: List[int] = []
+    vec_parts: List[np.ndarray] = []
+    pending: List[str] = []
+
+    def flush() -> None:
+        if pending:
+            vec_parts.append(embed_fn(pending))
+            pending.clear()
+
+    present = [os.path.basename(p) for p in list_documents(folder)]
+
+    for fn in set(files) - set(present):
+        to_remove.extend(c["id"] for c in files.pop(fn)["chunks"])
+        report.files_deleted += 1
+
+    changed: Dict[str, str] = {}
+    for fn in present:
+        digest = file_sha256(os.path.join(folder, fn))
+        old = files.get(fn)
+        if old and old["sha256"] == digest:
+            report.skipped += len(old["chunks"])
+        else:
+            changed[fn] = digest
+    report.files_changed = len(changed)
+
+    paths = [os.path.join(folder, fn) for fn in changed]
+    for doc in iter_documents(paths, report.ingest, workers):
+        fn = doc.source
+        # hash -> ids of the previous version, so unchanged chunks keep theirs
+        reusable: Dict[str, List[int]] = {}
+        for c in files.get(fn, {}).get("chunks", []):
+            reusable.setdefault(c["sha256"], []).append(c["id"])
+
+        chunks = []
+        for record in chunk_document(doc, split_pages_fn):
+            h = sha256_text(record.text)
+            meta = {"source": fn, "page": record.page, "start": record.start, "end": record.end}
+            if reusable.get(h):
+                chunk_id = reusable[h].pop()
+                state.metas[chunk_id] = meta  # same text, possibly moved on the page
+                report.skipped += 1
+            else:
+                chunk_id = manifest["next_id"]
+                manifest["next_id"] += 1
+                new_ids.append(chunk_id)
+                state.texts.extend([None] * (chunk_id + 1 - len(state.texts)))
+                state.metas.extend([None] * (chunk_id + 1 - len(state.metas)))
+                state.texts[chunk_id] = record.text
+                state.metas[chunk_id] = meta
+                pending.append(record.text)
+                if len(pending) >= EMBED_BATCH:
+                    flush()
+            chunks.append({"id": chunk_id, "sha256": h})
+        report.ingest.chunks += len(chunks)
+
+        for ids in reusable.values():
+            to_remove.extend(ids)
+        files[fn] = {"sha256": changed[fn], "chunks": chunks}
+    flush()
+    report.ingest.finish()
+
+    # HNSW (and IVF behind an IndexIDMap, from older stores) can't remove
+    # vectors safely: rebuild from the live chunks instead
+    rebuild = bool(to_remove) and state.index is not None and not supports_removal(state.index)
+    if to_remove and state.index is not None and not rebuild:
+        state.index.remove_ids(np.array(to_remove, dtype="int64"))
+    for chunk_id in to_remove:
+        state.texts[chunk_id] = None
+        state.metas[chunk_id] = None
+    report.removed = len(to_remove)
+    report.added = len(new_ids)
+
+    if rebuild:
+        print("Index type can't remove vectors; rebuilding from live chunks …")
+        new_ids = sorted(c["id"] for f in files.values() for c in f["chunks"])
+        vec_parts = [embed_fn([state.texts[i] for i in new_ids])]
+        state.index = None
+
+    if new_ids:
+        vecs = np.vstack(vec_parts)
+        if state.index is None:
+            inner = new_index_fn(vecs) if new_index_fn else faiss.IndexFlatIP(vecs.shape[1])
+            state.index = with_ids(inner)
+        state.index.add_with_ids(vecs, np.array(new_ids, dtype="int64"))
+    return report
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chunk_store
+from chunk_store import commit_store, current_dir, load_store, store_exists
+
+
+def _index(n, d=8):
+    vecs = np.random.default_rng(0).standard_normal((n, d)).astype("float32")
+    faiss.normalize_L2(vecs)
+    index = faiss.IndexFlatIP(d)
+    index.add(vecs)
+    return index
+
+
+def test_roundtrip_with_holes_and_mixed_metadata(tmp_path):
+    db_dir = str(tmp_path)
+    texts = ["première chunk", None, "third", ""]
+    metas = [{"source": "a.pdf", "page": 1}, None, {"source": "b.txt", "page": 7}, {"source": "a.pdf"}]
+    commit_store(db_dir, _index(4), texts, metas, manifest={"next_id": 4})
+
+    index, store = load_store(db_dir)
+    assert index.ntotal == 4 and len(store) == 4
+    assert [store.text(i) for i in range(4)] == texts
+    assert store.meta(0) == {"source": "a.pdf", "page": 1}
+    assert store.meta(1) is None
+    assert store.meta(2) == {"source": "b.txt", "page": 7}
+    assert store.meta(3) == {"source": "a.pdf"}
+    assert os.path.exists(os.path.join(current_dir(db_dir), "manifest.json"))
+
+
+def test_commit_replaces_generation(tmp_path):
+    db_dir = str(tmp_path)
+    commit_store(db_dir, _index(1), ["old"], [{"source": "old.txt"}])
+    first = current_dir(db_dir)
+    commit_store(db_dir, _index(2), ["new", "newer"], [{"source": "new.txt"}] * 2)
+    second = current_dir(db_dir)
+
+    assert second != first
+    assert os.path.exists(first)  # a reader may have resolved it just before the swap
+    _, store = load_store(db_dir)
+    assert store.text(1) == "newer"
+
+    commit_store(db_dir, _index(1), ["newest"], [{"source": "new.txt"}])
+    assert not os.path.exists(first) and os.path.exists(second)
+
+
+def test_commit_keeps_generations_still_being_written(tmp_path, monkeypatch):
+    db_dir = str(tmp_path)
+    commit_store(db_dir, _index(1), ["a"], [{}])
+    building = tmp_path / "gen-1"  # older than anything committed, but unfinished
+    building.mkdir()
+    (building / "index.faiss").write_bytes(b"partial")
+    commit_store(db_dir, _index(1), ["b"], [{}])
+    commit_store(db_dir, _index(1), ["c"], [{}])
+    assert building.exists()
+
+    monkeypatch.setattr(chunk_store, "ABANDONED_SECONDS", 0)
+    commit_store(db_dir, _index(1), ["d"], [{}])
+    assert not building.exists()
+
+
+def test_commit_keeps_newer_generations_of_a_concurrent_writer(tmp_path):
+    db_dir = str(tmp_path)
+    commit_store(db_dir, _index(1), ["a"], [{}])
+    commit_store(db_dir, _index(1), ["b"], [{}])
+    # Finished by another writer, which hasn't swapped CURRENT yet
+    pending = tmp_path / "gen-99999999999999999999"
+    pending.mkdir()
+    (pending / "store.json").write_text("{}", encoding="utf-8")
+
+    commit_store(db_dir, _index(1), ["c"], [{}])
+    commit_store(db_dir, _index(1), ["d"], [{}])
+    assert pending.exists()
+    assert len([n for n in os.listdir(db_dir) if n.startswith("gen-")]) == 3
+
+
+def test_failed_commit_keeps_previous_generation(tmp_path, monkeypatch):
+    db_dir = str(tmp_path)
+    commit_store(db_dir, _index(1), ["kept"], [{"source": "a.txt"}])
+    live = current_dir(db_dir)
+
+    def boom(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(chunk_store, "_write_chunks", boom)
+    with pytest.raises(OSError):
+        commit_store(db_dir, _index(2), ["x", "y"], [{}, {}])
+
+    assert current_dir(db_dir) == live
+    assert sorted(os.listdir(db_dir)) == sorted(["CURRENT", os.path.basename(live)])
+    _, store = load_store(db_dir)
+    assert store.text(0) == "kept"
+
+
+def test_store_exists_needs_a_commit(tmp_path):
+    assert not store_exists(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        load_store(str(tmp_path))
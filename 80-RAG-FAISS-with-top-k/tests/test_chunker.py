@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunker import TokenChunker
+
+PAGE = (
+    "Refunds are issued within 14 days. Shipping is free over $50!\n\n"
+    "Returns must be unused. Keep the receipt? Yes, always.\n\n"
+    "Gift cards cannot be refunded. " + "Warranty terms apply to every device sold. " * 6
+)
+
+
+def test_chunks_fit_the_token_budget_and_slice_the_page():
+    chunker = TokenChunker(max_tokens=24, overlap_tokens=6)
+    chunks = chunker.split_page(PAGE, page=4)
+
+    assert len(chunks) > 2
+    for c in chunks:
+        assert c.page == 4
+        assert c.text == PAGE[c.start : c.end]
+        assert c.tokens == chunker.count(c.text) <= 24
+
+
+def test_breaks_fall_on_sentence_ends():
+    chunks = TokenChunker(max_tokens=24, overlap_tokens=0).split_page(PAGE)
+
+    assert all(c.text[-1] in ".!?" for c in chunks)
+    assert all(c.text[0].isupper() for c in chunks)
+    # without overlap, chunks tile the page in order
+    assert all(a.end <= b.start for a, b in zip(chunks, chunks[1:]))
+
+
+def test_overlong_sentence_is_cut_on_tokens():
+    text = "word " * 100
+    chunks = TokenChunker(max_tokens=16, overlap_tokens=0).split_page(text)
+
+    assert len(chunks) > 1
+    assert all(c.tokens <= 16 and not c.text.startswith(" ") for c in chunks)
+    assert "".join(text[c.start : c.end] + " " for c in chunks).split() == text.split()
+
+
+def test_pages_are_never_merged():
+    chunks = TokenChunker(max_tokens=64, overlap_tokens=8).split_pages(["One page.", "", "  ", "Three."])
+
+    assert [(c.page, c.text) for c in chunks] == [(1, "One page."), (4, "Three.")]
+
+
+def test_overlap_must_be_smaller_than_chunk():
+    with pytest.raises(ValueError):
+        TokenChunker(max_tokens=32, overlap_tokens=32)
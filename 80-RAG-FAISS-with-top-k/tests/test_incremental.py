@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunker import Chunk
+from index_factory import IndexSpec, new_index, supports_removal, with_ids
+from incremental import IndexState, load_manifest, manifest_path, new_manifest, sync_folder
+
+DIM = 32
+
+
+def _split_pages(pages, size=10):
+    return [
+        Chunk(page[i : i + size], page_no, i, min(i + size, len(page)), size)
+        for page_no, page in enumerate(pages, 1)
+        for i in range(0, len(page.rstrip()), size)
+    ]
+
+
+def _embed(texts):
+    """Deterministic unit vector per text"""
+    vecs = np.stack([
+        np.random.default_rng(int(hashlib.sha256(t.encode()).hexdigest()[:8], 16)).standard_normal(DIM)
+        for t in texts
+    ]).astype("float32")
+    faiss.normalize_L2(vecs)
+    return vecs
+
+
+CONFIG = {"embed_model": "text-embedding-3-small", "chunker": "tiktoken:cl100k_base:384/72", "index": "flat"}
+
+
+def _write_docs(folder, names):
+    for name in names:
+        # 10 distinct 10-character chunks per file
+        text = "".join(f"{name[:5]:<5}{i:05d}" for i in range(10))
+        (folder / f"{name}.txt").write_text(text, encoding="utf-8")
+
+
+def _sync(folder, state, spec=IndexSpec("flat"), embedded=None):
+    def embed(texts):
+        if embedded is not None:
+            embedded.extend(texts)
+        return _embed(texts)
+
+    return sync_folder(str(folder), state, _split_pages, embed, lambda vecs: new_index(vecs, spec), workers=1)
+
+
+def _assert_ids_match_vectors(state):
+    live = [i for i, text in enumerate(state.texts) if text is not None]
+    assert state.index.ntotal == len(live)
+    _, found = state.index.search(_embed([state.texts[i] for i in live]), 1)
+    assert found[:, 0].tolist() == live
+
+
+@pytest.mark.parametrize("spec", [
+    IndexSpec("flat"),
+    IndexSpec("ivf_flat", nprobe=64),
+    IndexSpec("ivf_pq", pq_m=8, pq_nbits=4, nprobe=64),
+    IndexSpec("hnsw"),
+])
+def test_removed_chunks_leave_surviving_ids_on_their_vectors(tmp_path, spec):
+    names = [f"doc{i:02d}" for i in range(30)]
+    _write_docs(tmp_path, names)
+    state = IndexState(manifest=new_manifest({}))
+    _sync(tmp_path, state, spec)
+    assert state.index.ntotal == 300
+
+    for name in names[1:3]:
+        os.remove(tmp_path / f"{name}.txt")
+    report = _sync(tmp_path, state, spec)
+
+    assert report.removed == 20 and report.files_deleted == 2
+    _assert_ids_match_vectors(state)
+    if spec.kind.startswith("ivf"):
+        assert isinstance(faiss.downcast_index(state.index), faiss.IndexIVF)
+
+
+def test_idmap_over_ivf_is_rebuilt_instead_of_removed_from():
+    vecs = _embed([f"chunk {i}" for i in range(200)])
+    ivf = new_index(vecs, IndexSpec("ivf_flat"))
+
+    assert not supports_removal(faiss.IndexIDMap(ivf))
+    assert supports_removal(with_ids(ivf))
+    assert supports_removal(with_ids(faiss.IndexFlatIP(DIM)))
+    assert not supports_removal(with_ids(new_index(vecs, IndexSpec("hnsw"))))
+
+
+def test_sync_detects_added_modified_and_deleted_files(tmp_path):
+    _write_docs(tmp_path, ["alpha", "beta", "gamma"])
+    state = IndexState(manifest=new_manifest(CONFIG))
+    report = _sync(tmp_path, state)
+    assert (report.added, report.files_changed) == (30, 3)
+    ids = {fn: [c["id"] for c in f["chunks"]] for fn, f in state.manifest["files"].items()}
+
+    embedded = []
+    report = _sync(tmp_path, state, embedded=embedded)
+    assert (report.skipped, report.added, report.removed, report.files_changed) == (30, 0, 0, 0)
+    assert embedded == []
+
+    # One chunk of beta edited: only that chunk is embedded, the rest keep their ids
+    text = (tmp_path / "beta.txt").read_text(encoding="utf-8")
+    (tmp_path / "beta.txt").write_text(text.replace("beta 00003", "BETA 00003"), encoding="utf-8")
+    report = _sync(tmp_path, state, embedded=embedded)
+    assert (report.skipped, report.added, report.removed, report.files_changed) == (29, 1, 1, 1)
+    assert embedded == ["BETA 00003"]
+    new_ids = [c["id"] for c in state.manifest["files"]["beta.txt"]["chunks"]]
+    assert new_ids[:3] + new_ids[4:] == ids["beta.txt"][:3] + ids["beta.txt"][4:]
+    assert new_ids[3] == 30 and state.texts[ids["beta.txt"][3]] is None
+
+    _write_docs(tmp_path, ["delta"])
+    os.remove(tmp_path / "alpha.txt")
+    report = _sync(tmp_path, state)
+    assert (report.added, report.removed, report.files_changed, report.files_deleted) == (10, 10, 1, 1)
+    assert sorted(state.manifest["files"]) == ["beta.txt", "delta.txt", "gamma.txt"]
+    assert all(state.texts[i] is None for i in ids["alpha.txt"])
+    _assert_ids_match_vectors(state)
+
+
+@pytest.mark.parametrize("changed", [
+    {"embed_model": "text-embedding-3-large"},
+    {"chunker": "tiktoken:cl100k_base:512/64"},
+    {"index": IndexSpec("hnsw").build_key()},
+])
+def test_manifest_is_invalidated_when_the_vectors_would_change(tmp_path, changed):
+    manifest = new_manifest(CONFIG)
+    with open(manifest_path(str(tmp_path)), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    assert load_manifest(str(tmp_path), dict(CONFIG)) == manifest
+    assert load_manifest(str(tmp_path), {**CONFIG, **changed}) is None
+
+
+def test_manifest_survives_query_time_knobs_but_not_a_new_version(tmp_path):
+    # nprobe / efSearch are applied at load time and don't change the vectors
+    assert IndexSpec("ivf_flat", nprobe=4).build_key() == IndexSpec("ivf_flat", nprobe=64).build_key()
+    assert IndexSpec("hnsw", ef_search=16).build_key() == IndexSpec("hnsw", ef_search=128).build_key()
+
+    assert load_manifest(str(tmp_path), CONFIG) is None
+    with open(manifest_path(str(tmp_path)), "w", encoding="utf-8") as f:
+        json.dump({**new_manifest(CONFIG), "version": 0}, f)
+    assert load_manifest(str(tmp_path), CONFIG) is None
@@ -0,0 +1,48 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunker import Chunk
+from ingest import Document, IngestStats, chunk_document, iter_chunks, iter_documents, list_documents
+
+
+def _split_pages(pages, size=10):
+    return [
+        Chunk(page[i : i + size], page_no, i, min(i + size, len(page)), size)
+        for page_no, page in enumerate(pages, 1)
+        for i in range(0, len(page.rstrip()), size)
+    ]
+
+
+def test_documents_keep_folder_order_across_workers(tmp_path):
+    for i in range(6):
+        (tmp_path / f"doc{i}.txt").write_text(f"document number {i}", encoding="utf-8")
+    (tmp_path / "ignored.md").write_text("not indexed", encoding="utf-8")
+
+    stats = IngestStats()
+    docs = list(iter_documents(list_documents(str(tmp_path)), stats, workers=2, pages_per_task=1))
+
+    assert [d.source for d in docs] == [f"doc{i}.txt" for i in range(6)]
+    assert docs[3].pages == ["document number 3"]
+    assert (stats.files, stats.pages) == (6, 6)
+
+
+def test_chunks_keep_their_page_and_span():
+    doc = Document("manual.pdf", ["a" * 25, "b" * 25, "c" * 25])
+    records = chunk_document(doc, _split_pages)
+
+    assert [(r.page, r.start, r.end) for r in records[:4]] == [(1, 0, 10), (1, 10, 20), (1, 20, 25), (2, 0, 10)]
+    assert all(doc.pages[r.page - 1][r.start : r.end] == r.text for r in records)
+    assert records[-1].page == 3
+    assert [r.chunk for r in records] == list(range(len(records)))
+
+
+def test_blank_documents_yield_no_chunks():
+    stats = IngestStats()
+    docs = [Document("empty.pdf", ["", "  "]), Document("a.txt", ["hello world"])]
+    records = list(iter_chunks(docs, _split_pages, stats))
+
+    assert {r.source for r in records} == {"a.txt"}
+    assert stats.chunks == len(records)
@@ -0,0 +1,74 @@
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import top_doc_top_chunk
+from top_doc_top_chunk import HierarchicalRetriever
+
+
+def _write_docs(folder, count):
+    for i in range(count):
+        with open(os.path.join(folder, f"doc{i}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Document {i} talks about topic {i}. " * 60)
+
+
+def test_search_returns_top_docs_by_top_chunks(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    _write_docs(docs_dir, 4)
+
+    retriever = HierarchicalRetriever(str(docs_dir), str(tmp_path / "index"))
+    results = retriever.search("topic 2", top_docs=3, top_chunks=2)
+
+    assert len(results) == 3
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+    for r in results:
+        assert len(r["top_chunks"]) == 2
+        chunk_scores = [c["chunk_score"] for c in r["top_chunks"]]
+        assert chunk_scores == sorted(chunk_scores, reverse=True)
+    assert os.path.exists(tmp_path / "index" / "doc_centroids.faiss")
+
+
+def test_documents_are_embedded_once(tmp_path, monkeypatch):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    _write_docs(docs_dir, 2)
+
+    calls = []
+    real_embed = top_doc_top_chunk.embed_texts
+    monkeypatch.setattr(
+        top_doc_top_chunk,
+        "embed_texts",
+        lambda texts: calls.append(len(texts)) or real_embed(texts),
+    )
+
+    index_dir = str(tmp_path / "index")
+    HierarchicalRetriever(str(docs_dir), index_dir).search("q")
+    build_calls = len(calls)
+
+    # A fresh retriever over the persisted index only embeds the query
+    HierarchicalRetriever(str(docs_dir), index_dir).search("q")
+    assert calls[build_calls:] == [1]
+
+
+def test_rebuild_removes_sub_indexes_of_deleted_documents(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    _write_docs(docs_dir, 3)
+    index_dir = tmp_path / "index"
+    HierarchicalRetriever(str(docs_dir), str(index_dir)).search("q")
+    assert (index_dir / "doc_2.faiss").exists()
+
+    os.remove(docs_dir / "doc1.txt")
+    results = HierarchicalRetriever(str(docs_dir), str(index_dir)).search("q", top_docs=3)
+
+    assert sorted(r["document"] for r in results) == ["doc0.txt", "doc2.txt"]
+    assert sorted(os.listdir(index_dir)) == ["doc_0.faiss", "doc_1.faiss", "doc_centroids.faiss", "doc_meta.json"]
+
+    for name in os.listdir(docs_dir):
+        os.remove(docs_dir / name)
+    assert HierarchicalRetriever(str(docs_dir), str(index_dir)).search("q") == []
+    assert os.listdir(index_dir) == ["doc_meta.json"]
@@ -1,4 +1,6 @@
 from typing import List, Dict
+import glob
+import json
 import os
 import faiss
 import numpy as np
@@ -11,6 +13,7 @@ DOCS_DIR = "../Documents"
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 EMBEDDING_DIM = 384
+INDEX_DIR = os.path.join("faiss_index", "hierarchical")
 
 # -------- Utilities --------
 
@@ -55,95 +58,193 @@ def embed_texts(texts: List[str]) -> np.ndarray:
     return np.array(vectors, dtype="float32")
 
 
-def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Manual cosine similarity to avoid FAISS issues"""
-    dot_product = np.dot(vec1.flatten(), vec2.flatten())
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
-
-    if norm1 == 0 or norm2 == 0:
-        return 0.0
+def write_index_atomic(index: faiss.Index, path: str) -> None:
+    """Write to a temp file and rename, so a reader never sees half an index."""
+    tmp = path + ".tmp"
+    faiss.write_index(index, tmp)
+    os.replace(tmp, path)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product == cosine similarity."""
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# -------- Hierarchical Index --------
+
+
+class HierarchicalRetriever:
+    """
+    Two-stage doc → chunk retriever backed by persisted FAISS indexes:
+
+    - one IndexFlatIP over per-document centroid vectors (mean of the
+      document's normalized chunk vectors, re-normalized)
+    - one IndexFlatIP sub-index per document over its chunk vectors
+
+    Documents are chunked and embedded once; later queries only embed the
+    query. The index is rebuilt when a file in `docs_dir` is added, removed
+    or modified (size/mtime).
+    """
+
+    def __init__(self, docs_dir: str = DOCS_DIR, index_dir: str = INDEX_DIR):
+        self.docs_dir = docs_dir
+        self.index_dir = index_dir
+        self.doc_index = None
+        self.chunk_indexes: List[faiss.Index] = []
+        self.meta: Dict = {}
+
+    # ---- persistence ----
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, "doc_meta.json")
+
+    def _chunk_index_path(self, doc_id: int) -> str:
+        return os.path.join(self.index_dir, f"doc_{doc_id}.faiss")
+
+    def _fingerprint(self) -> Dict[str, List[float]]:
+        fingerprint = {}
+        for filename in sorted(os.listdir(self.docs_dir)):
+            if filename.endswith(".pdf") or filename.endswith(".txt"):
+                st = os.stat(os.path.join(self.docs_dir, filename))
+                fingerprint[filename] = [st.st_size, st.st_mtime]
+        return fingerprint
+
+    def build(self) -> None:
+        print(f"🔍 Processing documents in: {self.docs_dir}")
+        os.makedirs(self.index_dir, exist_ok=True)
+        fingerprint = self._fingerprint()
+        docs = []
+        centroids = []
+        self.chunk_indexes = []
+
+        for filename in fingerprint:
+            path = os.path.join(self.docs_dir, filename)
+            try:
+                if filename.endswith(".pdf"):
+                    text = extract_text_from_pdf(path)
+                else:
+                    with open(path, encoding="utf-8") as f:
+                        text = f.read()
+            except Exception as e:
+                print(f"Error reading {filename}: {e}")
+                continue
+
+            chunks = split_text(text, CHUNK_SIZE, CHUNK_OVERLAP)
+            if not chunks:
+                continue
+
+            vectors = normalize_rows(embed_texts(chunks))
+            chunk_index = faiss.IndexFlatIP(vectors.shape[1])
+            chunk_index.add(vectors)
+            write_index_atomic(chunk_index, self._chunk_index_path(len(docs)))
+            self.chunk_indexes.append(chunk_index)
+
+            centroids.append(vectors.mean(axis=0))
+            docs.append({"name": filename, "chunks": chunks})
+            print(f"📄 Processed {filename}: {len(chunks)} chunks")
+
+        self.doc_index = None
+        if centroids:
+            centroid_matrix = normalize_rows(np.vstack(centroids))
+            self.doc_index = faiss.IndexFlatIP(centroid_matrix.shape[1])
+            self.doc_index.add(centroid_matrix)
+            write_index_atomic(self.doc_index, os.path.join(self.index_dir, "doc_centroids.faiss"))
+
+        self.meta = {"fingerprint": fingerprint, "docs": docs}
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._meta_path())
+        self._remove_orphans(len(docs))
+
+    def _remove_orphans(self, doc_count: int) -> None:
+        """Delete sub-indexes of documents the metadata no longer lists."""
+        live = {self._chunk_index_path(i) for i in range(doc_count)}
+        if doc_count:
+            live.add(os.path.join(self.index_dir, "doc_centroids.faiss"))
+        for path in glob.glob(os.path.join(self.index_dir, "doc_*.faiss")):
+            if path not in live:
+                os.remove(path)
+
+    def load(self) -> None:
+        """Load the persisted indexes, (re)building them if stale."""
+        fingerprint = self._fingerprint()
+        if self.meta.get("fingerprint") == fingerprint:
+            return  # already in memory and up to date
+        try:
+            with open(self._meta_path(), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = None
+        if meta is None or meta["fingerprint"] != fingerprint:
+            self.build()
+            return
+        self.meta = meta
+        self.doc_index = None
+        self.chunk_indexes = []
+        if meta["docs"]:
+            self.doc_index = faiss.read_index(os.path.join(self.index_dir, "doc_centroids.faiss"))
+            self.chunk_indexes = [
+                faiss.read_index(self._chunk_index_path(i)) for i in range(len(meta["docs"]))
+            ]
+
+    # ---- search ----
+
+    def search(self, query: str, top_docs: int = 3, top_chunks: int = 3) -> List[Dict]:
+        """Top-N documents by centroid similarity × top-M chunks of each."""
+        self.load()
+        if self.doc_index is None:
+            return []
+
+        query_vec = normalize_rows(embed_texts([query]))
+        doc_scores, doc_ids = self.doc_index.search(query_vec, min(top_docs, self.doc_index.ntotal))
+
+        results = []
+        for doc_score, doc_id in zip(doc_scores[0], doc_ids[0]):
+            doc = self.meta["docs"][doc_id]
+            chunk_index = self.chunk_indexes[doc_id]
+            scores, chunk_ids = chunk_index.search(query_vec, min(top_chunks, chunk_index.ntotal))
+            results.append(
+                {
+                    "document": doc["name"],
+                    "score": float(doc_score),
+                    "top_chunks": [
+                        {
+                            "chunk_text": doc["chunks"][cid][:200] + "...",
+                            "chunk_score": float(score),
+                            "chunk_id": int(cid),
+                        }
+                        for score, cid in zip(scores[0], chunk_ids[0])
+                    ],
+                }
+            )
+        return results
 
-    return dot_product / (norm1 * norm2)
 
+_retriever = None
 
-# -------- Main RAG Function --------
 
+def get_retriever() -> HierarchicalRetriever:
+    global _retriever
+    if _retriever is None:
+        _retriever = HierarchicalRetriever()
+    return _retriever
 
-def retrieve_best_doc_and_top_chunks(query: str) -> Dict:
-    doc_vectors = []
-    doc_names = []
-    doc_chunks_map = {}
 
-    print(f"🔍 Processing documents in: {DOCS_DIR}")
+# -------- Main RAG Function --------
 
-    # Step 1: Compute average vector for each doc
-    for filename in os.listdir(DOCS_DIR):
-        if not (filename.endswith(".pdf") or filename.endswith(".txt")):
-            continue
 
-        path = os.path.join(DOCS_DIR, filename)
-        try:
-            if filename.endswith(".pdf"):
-                text = extract_text_from_pdf(path)
-            else:
-                with open(path, encoding="utf-8") as f:
-                    text = f.read()
-        except Exception as e:
-            print(f"Error reading {filename}: {e}")
-            continue
-
-        chunks = split_text(text, CHUNK_SIZE, CHUNK_OVERLAP)
-        if not chunks:
-            continue
-
-        doc_chunks_map[filename] = chunks
-        embeddings = embed_texts(chunks)
-        avg_vec = np.mean(embeddings, axis=0)
-        doc_vectors.append(avg_vec)
-        doc_names.append(filename)
-        print(f"📄 Processed {filename}: {len(chunks)} chunks")
-
-    if not doc_vectors:
+def retrieve_best_doc_and_top_chunks(query: str) -> Dict:
+    results = get_retriever().search(query, top_docs=1, top_chunks=3)
+    if not results:
         return {"error": "No valid documents found."}
 
-    # Step 2: Retrieve best-matching document using manual similarity
-    query_vec = embed_texts([query])[0]
-
-    best_doc_idx = 0
-    best_score = -1
-
-    for i, doc_vec in enumerate(doc_vectors):
-        score = cosine_similarity(query_vec, doc_vec)
-        print(f"📊 {doc_names[i]} similarity: {score:.4f}")
-        if score > best_score:
-            best_score = score
-            best_doc_idx = i
-
-    best_doc = doc_names[best_doc_idx]
-    print(f"\n🎯 Best document: {best_doc} (score: {best_score:.4f})")
-
-    # Step 3: Score top 3 chunks from best doc
-    chunks = doc_chunks_map[best_doc]
-    chunk_embeddings = embed_texts(chunks)
-
-    chunk_scores = []
-    for i, chunk_vec in enumerate(chunk_embeddings):
-        score = cosine_similarity(query_vec, chunk_vec)
-        chunk_scores.append((i, score, chunks[i]))
-
-    # Sort by score and take top 3
-    chunk_scores.sort(key=lambda x: x[1], reverse=True)
-    top_chunks = [
-        {
-            "chunk_text": chunk_scores[i][2][:200] + "...",
-            "chunk_score": chunk_scores[i][1],
-            "chunk_id": chunk_scores[i][0],
-        }
-        for i in range(min(3, len(chunk_scores)))
-    ]
-
-    return {"document": best_doc, "top_chunks": top_chunks}
+    best = results[0]
+    print(f"\n🎯 Best document: {best['document']} (score: {best['score']:.4f})")
+    return {"document": best["document"], "top_chunks": best["top_chunks"]}
 
 
 # --------- Test ---------
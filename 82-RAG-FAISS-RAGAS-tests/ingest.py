@@ -0,0 +1,185 @@
+"""
+Parallel document ingest.
+
+PDF pages are extracted in a process pool (PyMuPDF holds the GIL and is not
+thread-safe), a few pages per task, so even a single large PDF is spread
+over every core. Documents are yielded in order as soon as their pages are
+ready, with a bounded number of tasks in flight. The caller can chunk and
+embed the first documents while the pool is still extracting later ones.
+
+    stats = IngestStats()
+    chunker = TokenChunker(max_tokens=256, overlap_tokens=48)
+    records = iter_chunks(iter_documents(paths, stats), chunker.split_pages, stats)
+    for batch in itertools.batched(records, 100):
+        vecs = embed_texts([r.text for r in batch])
+    print(stats)  # files=12 pages=812 chunks=1530 in 9.8s (83 pages/s, 156 chunks/s)
+
+Set INGEST_WORKERS to cap the pool size (1 = extract in-process).
+"""
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from chunker import Chunk
+
+SUPPORTED_EXTS = (".pdf", ".txt")
+PAGES_PER_TASK = 8
+TASKS_PER_WORKER = 4  # in-flight window, bounds memory held by finished pages
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0")) or min(8, os.cpu_count() or 1)
+
+SplitPages = Callable[[List[str]], List[Chunk]]
+
+
+@dataclass
+class Document:
+    source: str  # file name
+    pages: List[str]  # a .txt file is a single page
+
+    def is_blank(self) -> bool:
+        return not any(page.strip() for page in self.pages)
+
+
+@dataclass
+class ChunkRecord:
+    source: str
+    chunk: int  # position within the document
+    page: int  # 1-based
+    start: int  # character span on that page
+    end: int
+    text: str
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    pages: int = 0
+    chunks: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def __str__(self) -> str:
+        secs = max(self.seconds, 1e-9)
+        return (
+            f"files={self.files} pages={self.pages} chunks={self.chunks} "
+            f"in {self.seconds:.1f}s ({self.pages / secs:.0f} pages/s, "
+            f"{self.chunks / secs:.0f} chunks/s)"
+        )
+
+
+def list_documents(folder: str) -> List[str]:
+    return [
+        os.path.join(folder, fn)
+        for fn in sorted(os.listdir(folder))
+        if fn.lower().endswith(SUPPORTED_EXTS)
+    ]
+
+
+def _page_count(path: str) -> int:
+    if not path.lower().endswith(".pdf"):
+        return 1
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def _extract_pages(path: str, start: int, stop: int) -> List[str]:
+    """Worker: text of pages [start, stop) of one document."""
+    if not path.lower().endswith(".pdf"):
+        with open(path, encoding="utf-8") as f:
+            return [f.read()]
+    with fitz.open(path) as doc:
+        return [doc[i].get_text("text") for i in range(start, stop)]
+
+
+def _tasks(paths: List[str], pages_per_task: int) -> List[Tuple[str, int, int, bool]]:
+    """(path, start, stop, last task of this document)"""
+    tasks = []
+    for path in paths:
+        n = _page_count(path)
+        ranges = [(s, min(s + pages_per_task, n)) for s in range(0, n, pages_per_task)]
+        ranges = ranges or [(0, 0)]  # empty PDF still yields a Document
+        for i, (start, stop) in enumerate(ranges):
+            tasks.append((path, start, stop, i == len(ranges) - 1))
+    return tasks
+
+
+def iter_documents(
+    paths: List[str],
+    stats: Optional[IngestStats] = None,
+    workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+) -> Iterator[Document]:
+    """Extract `paths` in parallel, yielding Documents in the order given."""
+    stats = stats if stats is not None else IngestStats()
+    tasks = _tasks(paths, pages_per_task)
+    workers = min(workers or INGEST_WORKERS, len(tasks))
+    pages: List[str] = []
+
+    def collect(task, result) -> Optional[Document]:
+        path, _, _, last = task
+        pages.extend(result)
+        if not last:
+            return None
+        doc = Document(os.path.basename(path), pages.copy())
+        pages.clear()
+        stats.files += 1
+        stats.pages += len(doc.pages)
+        return doc
+
+    if workers <= 1:
+        for task in tasks:
+            doc = collect(task, _extract_pages(*task[:3]))
+            if doc:
+                yield doc
+        return
+
+    # spawn: same behaviour on every OS, and no forked copy of the parent's
+    # FAISS index / API clients in each worker
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    window = deque()
+    try:
+        for task in tasks:
+            window.append((task, pool.submit(_extract_pages, *task[:3])))
+            while len(window) >= workers * TASKS_PER_WORKER:
+                doc = collect(window[0][0], window.popleft()[1].result())
+                if doc:
+                    yield doc
+        while window:
+            doc = collect(window[0][0], window.popleft()[1].result())
+            if doc:
+                yield doc
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def chunk_document(doc: Document, split_pages_fn: SplitPages) -> List[ChunkRecord]:
+    """Split a document page by page (e.g. `TokenChunker.split_pages`)."""
+    return [
+        ChunkRecord(doc.source, i, c.page, c.start, c.end, c.text)
+        for i, c in enumerate(split_pages_fn(doc.pages))
+    ]
+
+
+def iter_chunks(
+    docs: Iterable[Document],
+    split_pages_fn: SplitPages,
+    stats: Optional[IngestStats] = None,
+) -> Iterator[ChunkRecord]:
+    for doc in docs:
+        records = chunk_document(doc, split_pages_fn)
+        if stats is not None:
+            stats.chunks += len(records)
+        yield from records
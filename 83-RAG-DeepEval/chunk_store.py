@@ -0,0 +1,283 @@
+"""
+Columnar, memory-mapped chunk store, committed atomically with the index.
+
+Every build is written to its own generation directory:
+
+    faiss_index/
+    ├── CURRENT              # name of the live generation
+    └── gen-<ns>/
+        ├── index.faiss
+        ├── chunks.bin       # chunk texts, UTF-8, concatenated
+        ├── offsets.npy      # int64[n + 1]: chunk i = chunks.bin[offsets[i]:offsets[i + 1]]
+        ├── live.npy         # bool[n]: False for ids removed by an incremental sync
+        ├── meta.<key>.npy   # one column per metadata key
+        ├── manifest.json    # incremental-sync manifest (optional)
+        └── store.json       # row count, column types, string dictionaries
+
+The generation only becomes visible when CURRENT is replaced (os.replace is
+atomic), so a reader sees either the old index + chunks or the new pair, never
+a mix or a half-written file. The previous generation is kept for readers that
+resolved CURRENT just before the swap; older ones are removed on the next
+commit. Readers memory-map offsets, text blob and
+columns: looking up chunk i touches only its own bytes, and resident memory
+stays close to the size of the index itself.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+CURRENT_FILE = "CURRENT"
+INDEX_NAME = "index.faiss"
+TEXTS_FILE = "chunks.bin"
+OFFSETS_FILE = "offsets.npy"
+LIVE_FILE = "live.npy"
+HEADER_FILE = "store.json"
+MANIFEST_FILE = "manifest.json"
+STORE_VERSION = 2
+ABANDONED_SECONDS = 3600  # an unfinished generation this old belongs to a crashed writer
+
+
+# ─────────────────────────────────────
+# GENERATIONS
+# ─────────────────────────────────────
+def current_dir(db_dir: str) -> Optional[str]:
+    """Directory of the live generation, or None if nothing was committed."""
+    try:
+        with open(os.path.join(db_dir, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(db_dir, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def store_exists(db_dir: str) -> bool:
+    return current_dir(db_dir) is not None
+
+
+def _fsync(path: str) -> None:
+    with open(path, "r+b") as f:
+        os.fsync(f.fileno())
+
+
+def _generation_ns(name: str) -> int:
+    return int(name[len("gen-"):])
+
+
+def _remove_stale_generations(db_dir: str, keep: str, previous: Optional[str]) -> None:
+    """Delete generations superseded before `previous` (what CURRENT named
+    until `keep` was published).
+
+    `previous` itself stays for readers that resolved the old CURRENT, and
+    newer generations may belong to a concurrent writer. A generation
+    without its store.json (written last) is still being built; it is only
+    removed once ABANDONED_SECONDS old."""
+    # Processes still mapping an old generation keep their view on POSIX;
+    # on Windows the delete fails while mapped and is retried next commit.
+    cutoff = _generation_ns(previous or keep)
+    for name in os.listdir(db_dir):
+        if not name.startswith("gen-") or name in (keep, previous):
+            continue
+        path = os.path.join(db_dir, name)
+        try:
+            if not os.path.exists(os.path.join(path, HEADER_FILE)):
+                if time.time() - os.path.getmtime(path) < ABANDONED_SECONDS:
+                    continue
+            elif _generation_ns(name) >= cutoff:
+                continue
+        except (OSError, ValueError):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def commit_store(
+    db_dir: str,
+    index: faiss.Index,
+    texts: List[Optional[str]],
+    metas: List[Optional[Dict]],
+    manifest: Optional[Dict] = None,
+) -> str:
+    """Write index + chunks (+ manifest) as a new generation and publish it.
+
+    `texts[i]` / `metas[i]` belong to vector id i; `None` marks a removed id."""
+    os.makedirs(db_dir, exist_ok=True)
+    name = f"gen-{time.time_ns()}"
+    gen_dir = os.path.join(db_dir, name)
+    os.makedirs(gen_dir)
+    try:
+        faiss.write_index(index, os.path.join(gen_dir, INDEX_NAME))
+        header = _write_chunks(gen_dir, texts, metas)
+        if manifest is not None:
+            with open(os.path.join(gen_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+        with open(os.path.join(gen_dir, HEADER_FILE), "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        for fn in os.listdir(gen_dir):
+            _fsync(os.path.join(gen_dir, fn))
+    except BaseException:
+        shutil.rmtree(gen_dir, ignore_errors=True)
+        raise
+
+    previous = current_dir(db_dir)
+    tmp = os.path.join(db_dir, f"{CURRENT_FILE}.{name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(db_dir, CURRENT_FILE))
+    _remove_stale_generations(db_dir, keep=name, previous=previous and os.path.basename(previous))
+    return gen_dir
+
+
+def read_index(path: str, mmap: bool = True) -> faiss.Index:
+    """Read an index memory-mapped, falling back to a full read for index
+    types that FAISS cannot map."""
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except RuntimeError:
+            pass
+    return faiss.read_index(path)
+
+
+def load_store(db_dir: str, mmap: bool = False) -> Tuple[faiss.Index, "ChunkStore"]:
+    """Index and chunk store of the same (live) generation.
+
+    Use mmap=True only for search: a memory-mapped index is read-only."""
+    gen_dir = current_dir(db_dir)
+    if gen_dir is None:
+        raise FileNotFoundError("FAISS DB not found.")
+    return read_index(os.path.join(gen_dir, INDEX_NAME), mmap), ChunkStore(gen_dir)
+
+
+def migrate_legacy(
+    db_dir: str, index_name: str = INDEX_NAME, pickle_name: str = "docs.pkl"
+) -> bool:
+    """Convert a pre-generation layout (index.faiss + docs.pkl holding
+    {"texts": [...], "meta": [...]}) into a committed generation."""
+    index_file = os.path.join(db_dir, index_name)
+    pickle_file = os.path.join(db_dir, pickle_name)
+    manifest_file = os.path.join(db_dir, MANIFEST_FILE)
+    if store_exists(db_dir) or not (
+        os.path.exists(index_file) and os.path.exists(pickle_file)
+    ):
+        return False
+    with open(pickle_file, "rb") as f:
+        legacy = pickle.load(f)
+    manifest = None
+    if os.path.exists(manifest_file):
+        with open(manifest_file, encoding="utf-8") as f:
+            manifest = json.load(f)
+    commit_store(
+        db_dir, faiss.read_index(index_file), legacy["texts"], legacy["meta"], manifest
+    )
+    for path in (index_file, pickle_file, manifest_file):
+        if os.path.exists(path):
+            os.remove(path)
+    return True
+
+
+# ─────────────────────────────────────
+# COLUMNAR LAYOUT
+# ─────────────────────────────────────
+def _column_file(key: str) -> str:
+    return f"meta.{key}.npy"
+
+
+def _write_chunks(
+    gen_dir: str, texts: List[Optional[str]], metas: List[Optional[Dict]]
+) -> Dict:
+    n = len(texts)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    live = np.zeros(n, dtype=bool)
+    with open(os.path.join(gen_dir, TEXTS_FILE), "wb") as f:
+        for i, text in enumerate(texts):
+            data = text.encode("utf-8") if text is not None else b""
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+            live[i] = text is not None
+    np.save(os.path.join(gen_dir, OFFSETS_FILE), offsets)
+    np.save(os.path.join(gen_dir, LIVE_FILE), live)
+
+    rows = [m if live[i] and m is not None else {} for i, m in enumerate(metas)]
+    keys = sorted({k for m in rows for k in m})
+    columns = {}
+    for key in keys:
+        values = [m.get(key) for m in rows]
+        present = [v for i, v in enumerate(values) if live[i]]
+        if all(type(v) is int for v in present):
+            # Dense integer column (page numbers, chunk positions …)
+            col = np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+            columns[key] = {"type": "int"}
+        else:
+            # Dictionary-encoded column: int32 codes into a small value list;
+            # -1 means the row has no value for this key
+            codes, dictionary, lookup = [], [], {}
+            for m in rows:
+                if key not in m:
+                    codes.append(-1)
+                    continue
+                v = m[key]
+                token = json.dumps(v, sort_keys=True)
+                if token not in lookup:
+                    lookup[token] = len(dictionary)
+                    dictionary.append(v)
+                codes.append(lookup[token])
+            col = np.array(codes, dtype=np.int32)
+            columns[key] = {"type": "dict", "values": dictionary}
+        np.save(os.path.join(gen_dir, _column_file(key)), col)
+    return {"version": STORE_VERSION, "count": n, "columns": columns}
+
+
+class ChunkStore:
+    """Read-only view over one generation; every file is memory-mapped."""
+
+    def __init__(self, gen_dir: str):
+        self.path = gen_dir
+        with open(os.path.join(gen_dir, HEADER_FILE), encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported chunk store version in {gen_dir}")
+        self._offsets = np.load(os.path.join(gen_dir, OFFSETS_FILE), mmap_mode="r")
+        self._live = np.load(os.path.join(gen_dir, LIVE_FILE), mmap_mode="r")
+        blob_path = os.path.join(gen_dir, TEXTS_FILE)
+        if os.path.getsize(blob_path):
+            self._blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            self._blob = np.zeros(0, dtype=np.uint8)
+        self._columns = [
+            (
+                key,
+                np.load(os.path.join(gen_dir, _column_file(key)), mmap_mode="r"),
+                spec.get("values"),
+            )
+            for key, spec in header["columns"].items()
+        ]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def text(self, i: int) -> Optional[str]:
+        if not self._live[i]:
+            return None
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def meta(self, i: int) -> Optional[Dict]:
+        if not self._live[i]:
+            return None
+        row = {}
+        for key, col, dictionary in self._columns:
+            value = int(col[i])
+            if dictionary is None:
+                row[key] = value
+            elif value >= 0:
+                row[key] = dictionary[value]
+        return row
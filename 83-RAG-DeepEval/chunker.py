@@ -0,0 +1,163 @@
+"""
+Token-aware, page-preserving chunker.
+
+Chunks are measured in tiktoken tokens (the tokenizer of the OpenAI
+embedding models), so a chunk can never exceed the embedding input limit.
+Text is packed sentence by sentence. Breaks fall on paragraph or sentence
+ends, never mid-word, unless one sentence alone is longer than a chunk.
+
+Chunks never span two pages. Each chunk records its page number and the
+character span it covers on that page. Chunk text is sliced straight out
+of the page string, so no document-wide string is ever built.
+
+    chunker = TokenChunker(max_tokens=256, overlap_tokens=48)
+    for c in chunker.split_pages(pages):
+        c.page, c.start, c.end, c.tokens, c.text
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, NamedTuple
+
+import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"  # text-embedding-3-* / ada-002
+PARAGRAPH_FILL = 0.5  # end a chunk at a paragraph break once it is this full
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+@dataclass
+class Chunk:
+    text: str
+    page: int  # 1-based
+    start: int  # character span on that page
+    end: int
+    tokens: int
+
+
+class _Unit(NamedTuple):
+    start: int
+    end: int
+    tokens: int
+    paragraph_end: bool
+
+
+class TokenChunker:
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        overlap_tokens: int = 32,
+        encoding: str = DEFAULT_ENCODING,
+    ):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be in [0, max_tokens)")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = encoding
+        self._enc = tiktoken.get_encoding(encoding)
+
+    @property
+    def key(self) -> str:
+        """Identifies the chunking scheme (for the incremental manifest)."""
+        return f"tiktoken:{self.encoding}:{self.max_tokens}/{self.overlap_tokens}"
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode_ordinary(text))
+
+    # ─────────────────────────────────────
+    # SEGMENTATION
+    # ─────────────────────────────────────
+    def _sentence_spans(self, text: str) -> List[_Unit]:
+        spans = []
+        pos = 0
+        for para_end in [m.start() for m in _PARAGRAPH_BREAK.finditer(text)] + [len(text)]:
+            first = len(spans)
+            sent_start = pos
+            for m in _SENTENCE_BREAK.finditer(text, pos, para_end):
+                spans.append((sent_start, m.start()))
+                sent_start = m.end()
+            spans.append((sent_start, para_end))
+            # trim whitespace, drop empty spans, flag the paragraph's last sentence
+            trimmed = []
+            for s, e in spans[first:]:
+                while s < e and text[s].isspace():
+                    s += 1
+                while e > s and text[e - 1].isspace():
+                    e -= 1
+                if s < e:
+                    trimmed.append((s, e))
+            spans[first:] = [(s, e, i == len(trimmed) - 1) for i, (s, e) in enumerate(trimmed)]
+            m = _PARAGRAPH_BREAK.match(text, para_end)
+            pos = m.end() if m else para_end
+
+        token_lists = self._enc.encode_ordinary_batch([text[s:e] for s, e, _ in spans])
+        units = []
+        for (s, e, para), toks in zip(spans, token_lists):
+            if len(toks) <= self.max_tokens:
+                units.append(_Unit(s, e, len(toks), para))
+                continue
+            # A single sentence longer than a chunk: cut it on token boundaries
+            _, offsets = self._enc.decode_with_offsets(toks)
+            cuts = list(range(0, len(toks), self.max_tokens))
+            for n, t in enumerate(cuts):
+                piece_start = s + offsets[t]
+                while text[piece_start].isspace():
+                    piece_start += 1
+                piece_end = s + offsets[cuts[n + 1]] if n + 1 < len(cuts) else e
+                last = n + 1 == len(cuts)
+                units.append(
+                    _Unit(piece_start, piece_end, min(self.max_tokens, len(toks) - t), para and last)
+                )
+        return units
+
+    # ─────────────────────────────────────
+    # PACKING
+    # ─────────────────────────────────────
+    def split_page(self, text: str, page: int = 1) -> List[Chunk]:
+        units = self._sentence_spans(text)
+        chunks: List[Chunk] = []
+        first, n = 0, len(units)
+        while first < n:
+            # grow: whole sentences while they fit, stopping early at a
+            # paragraph break once the chunk is reasonably full
+            last, tokens = first, units[first].tokens
+            while last + 1 < n and tokens + units[last + 1].tokens <= self.max_tokens:
+                if units[last].paragraph_end and tokens >= self.max_tokens * PARAGRAPH_FILL:
+                    break
+                last += 1
+                tokens += units[last].tokens
+            # per-sentence counts can differ by a token or two from the joined
+            # text; shrink until the exact count fits
+            span = text[units[first].start : units[last].end]
+            exact = self.count(span)
+            while exact > self.max_tokens and last > first:
+                last -= 1
+                span = text[units[first].start : units[last].end]
+                exact = self.count(span)
+            chunks.append(Chunk(span, page, units[first].start, units[last].end, exact))
+            if last + 1 >= n:
+                break
+            # overlap: repeat trailing sentences of this chunk, as long as
+            # they fit the overlap budget and leave room for the next sentence
+            nxt, carried = last + 1, 0
+            while (
+                nxt - 1 > first
+                and carried + units[nxt - 1].tokens <= self.overlap_tokens
+                and carried + units[nxt - 1].tokens + units[last + 1].tokens <= self.max_tokens
+            ):
+                nxt -= 1
+                carried += units[nxt].tokens
+            first = nxt
+        return chunks
+
+    def split_pages(self, pages: List[str]) -> List[Chunk]:
+        chunks = []
+        for page_no, page in enumerate(pages, 1):
+            chunks.extend(self.split_page(page, page_no))
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        """Drop-in replacement for the old character `split_text`."""
+        return [c.text for c in self.split_page(text)]
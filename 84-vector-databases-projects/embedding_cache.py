@@ -0,0 +1,175 @@
+"""
+Persistent embedding cache.
+SQLite-backed, keyed by (model, sha256(text)), vectors stored as float32
+blobs, evicted least-recently-used once the stored vectors exceed a byte
+budget. The same file can be shared by every project on the machine: the
+model name is part of the key, so different embedders never collide.
+
+    cache = get_default_cache()
+    vecs = cache.embed(EMBED_MODEL, texts, fetch_fn)  # fetch_fn sees misses only
+    print(cache.stats)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence
+
+DEFAULT_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "rag-embeddings", "embeddings.sqlite3"),
+)
+DEFAULT_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded LRU cache of embedding vectors.
+
+    Safe to share between threads; WAL mode lets several processes read
+    and write the same file.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model     TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector    BLOB NOT NULL,
+                nbytes    INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_lru ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vectors in input order, None for misses."""
+        keys = [text_key(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), 500):  # stay under SQLite's variable limit
+                part = unique[i : i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(part))})",
+                    [model, *part],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+            out = [found.get(k) for k in keys]
+            hits = sum(v is not None for v in out)
+            self.hits += hits
+            self.misses += len(out) - hits
+        return out
+
+    def put_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        now = time.time()
+        rows = []
+        for text, vec in zip(texts, vectors):
+            blob = array("f", vec).tobytes()
+            rows.append((model, text_key(text), blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM embeddings"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for model, text_hash, nbytes in self._conn.execute(
+            "SELECT model, text_hash, nbytes FROM embeddings ORDER BY last_used"
+        ):
+            doomed.append((model, text_hash))
+            freed += nbytes
+            if freed >= excess:
+                break
+        self._conn.executemany(
+            "DELETE FROM embeddings WHERE model = ? AND text_hash = ?", doomed
+        )
+
+    def embed(
+        self,
+        model: str,
+        texts: Sequence[str],
+        fetch_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+    ) -> List[List[float]]:
+        """Return vectors for `texts`, calling `fetch_fn` only for misses
+        (each distinct missing text is sent once)."""
+        vecs = self.get_many(model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vecs) if v is None))
+        if missing:
+            fetched = [list(v) for v in fetch_fn(missing)]
+            self.put_many(model, missing, fetched)
+            by_text = dict(zip(missing, fetched))
+            vecs = [v if v is not None else by_text[t] for t, v in zip(texts, vecs)]
+        return vecs
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM embeddings"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{self.hits / total:.1%}" if total else "0.0%",
+            "entries": entries,
+            "size_mb": round(size / (1024 * 1024), 2),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[EmbeddingCache] = None
+
+
+def get_default_cache() -> EmbeddingCache:
+    """Process-wide cache at EMBEDDING_CACHE_PATH (opened on first use)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = EmbeddingCache()
+    return _default_cache
@@ -2,13 +2,22 @@ import numpy as np
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from embedding_cache import get_default_cache
+
 load_dotenv()
 client = OpenAI()
+EMBED_MODEL = "text-embedding-3-small"
+cache = get_default_cache()
+
+
+def fetch_embeddings(texts):
+    response = client.embeddings.create(input=texts, model=EMBED_MODEL)
+    return [d.embedding for d in response.data]
 
 
 def get_embedding(text):
-    response = client.embeddings.create(input=text, model="text-embedding-3-small")
-    return np.array(response.data[0].embedding)
+    # repeated words ("good", "bad", …) are served from the on-disk cache
+    return np.array(cache.embed(EMBED_MODEL, [text], fetch_embeddings)[0])
 
 
 test_pairs = [
@@ -108,3 +117,5 @@ for i, result in enumerate(sorted_results[:3], 1):
     print(f"   Similarity: {result['similarity']:.6f}")
     print(f"   Distance:   {result['distance']:.6f}")
     print()
+
+print(f"💾 Embedding cache: {cache.stats}")